@@ -1,95 +1,95 @@
 import pandas as pd
+import numpy as np
 import os
 from IPcheck import check_ip_reputation
 from filehashcheck import scan_hash_and_decide
-from geminifw import check_message
+from intelclient import check_ips, scan_hashes
+from keyscheduler import get_scheduler, RateLimited
+from llmpool import get_llm_pool
+from llmbatch import classify_batched
+from filehasher import get_file_hasher
+from rulematcher import keyword_matcher, pattern_matcher
+from ruleengine import get_rules
+from portpolicy import get_port_policy
+from ipclass import get_ip_classifier, classify_ips, is_local_ip
+from proctree import ProcessTree
+from peinspect import get_pe_inspector, pe_reasons, compile_datetime
+from executors import get_executors
+from geminifw import check_message, check_messages_batch
 #from geminiPower import check_powerShell
-from geministartup import check_Startup
+from geministartup import check_Startup, check_Startup_batch
 from gemini import check_content
 from geminiapp import check_content2
 from geminisys import check_content3
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import json
 from datetime import datetime
-import hashlib
 import re
 import base64
 import logging
-import pefile
-import ipaddress
 import threading
+from evidenceset import EvidenceSet, ARTIFACTS, DEFAULT_INPUT_DIR, iter_frames
+from eventpipeline import (
+    EventIndex, parse_report,
+    SECURITY_EVENT_IDS, APPLICATION_EVENT_IDS, SYSTEM_EVENT_IDS,
+    SECURITY_FIELDS, APPLICATION_FIELDS, SYSTEM_FIELDS,
+)
+from correlate import correlate_events
+from eventmapreduce import map_reduce_log, DEFAULT_LOG_ANALYSIS, LOG_ANALYSIS_MODES
 
 
 API_KEYS = ["list of APIS"]
 
 Gemini_Key = ["list of APIS"]
 
-INPUT_DIR = "C:\\InvestigationData"
+# Correlation detections included in the Security log prompt
+MAX_PROMPT_DETECTIONS = 20
+
+INPUT_DIR = DEFAULT_INPUT_DIR
+
+# Artifacts are read lazily the first time an analyzer touches them
+default_evidence = EvidenceSet(INPUT_DIR)
+
+def open_evidence(input_dir, store=None):
+    """Open another evidence directory; artifacts load on first use (``store``: see EvidenceSet)."""
+    return EvidenceSet(input_dir, store)
 
 def read_csv(file):
     """Safely read a CSV file, returning an empty DataFrame if it fails."""
-    file_path = os.path.join(INPUT_DIR, file)
-    try:
-        return pd.read_csv(file_path) if os.path.exists(file_path) else pd.DataFrame()
-    except (pd.errors.EmptyDataError, Exception) as e:
-        print(f"Error reading {file}: {e}")
-        return pd.DataFrame()
-
-# Load all collected data
-systemInfo = read_csv("SystemInfo.csv")
-hardwareInfo = read_csv("HardwareInfo.csv")
-installedSoftware = read_csv("InstalledSoftware.csv")
-userAccounts = read_csv("UserAccounts.csv")
-runningProcesses = read_csv("RunningProcesses.csv")
-networkConnections = read_csv("NetworkConnections.csv")
-firewallStatus = read_csv("FirewallStatus.csv")
-recentFileChanges = read_csv("RecentFileChanges.csv")
-securityLogs = read_csv("SecurityLogs.csv")
-powershellLogs = read_csv("PowerShellLogs.csv")
-startupEntries = read_csv("StartupEntries.csv")
-applicationLogs = read_csv("ApplicationLogs.csv")
-systemLogs = read_csv("SystemLogs.csv")
-firewallModificationEvents = read_csv("FirewallModificationEvents.csv")
-scheduledTasks = read_csv("ScheduledTasks.csv")
-USB = read_csv("USBDeviceHistory.csv")
-admin_users_df = read_csv("AdminUsers.csv")
-arp_table = read_csv("ARP_Table.csv")
-dns_cache = read_csv("DNS_Cache.csv")
-env_vars = read_csv("EnvironmentVariables.csv")
-open_shares = read_csv("OpenShares.csv")
-loaded_dlls = read_csv("LoadedDLLs.csv")
-disk_info = read_csv("DiskInfo.csv")
-volume_info = read_csv("VolumeInfo.csv")
-smb=read_csv("SmbSessions.csv")
-
-
-logging.basicConfig(filename="analyzer.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
-if not runningProcesses.empty:
-    missing_columns = {'Id', 'Path'} - set(runningProcesses.columns)
-    if missing_columns:
-        logging.error(f"Missing columns in RunningProcesses.csv: {missing_columns}")
-    else:
-        merged = pd.merge(
-            networkConnections,
-            runningProcesses[['Id', 'Path']],
-            how='left',
-            left_on='PID',
-            right_on='Id'
-        ).drop(columns=['Id']).rename(columns={'Path': 'CorrectedProcessPath'})
-else:
-    logging.error("RunningProcesses.csv is empty or not loaded correctly.")
-    merged = pd.DataFrame()
+    return default_evidence.read_csv(file)
+
+# Former module constants now served from the current ruleset (rules.json)
+_RULE_CONSTANTS = {
+    'KNOWN_LEGIT_NAMES': 'known_legit_names',
+    'STANDARD_PATH_PATTERNS': 'standard_path_patterns',
+    'STANDARD_PATHS': 'standard_paths',
+}
+
+def __getattr__(name):
+    # Keeps `from AnalyzeData import runningProcesses, merged` working without
+    # reading every artifact at import time.
+    if name in ARTIFACTS or name == 'merged':
+        return default_evidence.load(name)
+    if name in _RULE_CONSTANTS:
+        return getattr(get_rules(), _RULE_CONSTANTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def configure_logging(filename="analyzer.log"):
+    """Send INFO and above to ``filename``; the GUI calls this, importing the module configures nothing."""
+    logging.basicConfig(filename=filename, level=logging.INFO, format=LOG_FORMAT)
 
 
 
 def is_suspicious_port(port):
-    uncommon = {4444, 1337, 31337, 5555, 6969}
     try:
         port = int(port)
     except:
         return False
-    return port in uncommon or port >= 49152 or port == 0
+    return get_port_policy().is_suspicious_port(port)
 
 def is_unusual_process_port(name, port):
     name = str(name).lower()
@@ -97,47 +97,12 @@ def is_unusual_process_port(name, port):
         port = int(port)
     except:
         return False
-    safe_ports = {
-        "chrome.exe": [80, 443],
-        "firefox.exe": [80, 443],
-        "msedge.exe": [80, 443],
-        "safari.exe": [80, 443],
-        "opera.exe": [80, 443],
-        "explorer.exe": [],
-        "lsass.exe": [88, 464, 389, 636, 3268, 3269],
-        "wininit.exe": [],
-        "services.exe": [],
-        "winlogon.exe": [],
-        "svchost.exe": list(range(1, 1024)),
-        "mysqld.exe": [3306],
-        "postgres.exe": [5432],
-        "mongod.exe": [27017, 27018, 27019],
-        "redis-server.exe": [6379, 6380],
-        "nginx.exe": [80, 443, 8080],
-        "apache.exe": [80, 443, 8080],
-        "httpd.exe": [80, 443, 8080],
-        "iisexpress.exe": [80, 443, 8080],
-        "smtpd.exe": [25, 465, 587],
-        "pop3d.exe": [110, 995],
-        "imapd.exe": [143, 993],
-        "rdpclip.exe": [3389],
-        "mstsc.exe": [3389],
-        "teamviewer.exe": [5938, 80, 443],
-        "anydesk.exe": [7070, 80, 443],
-        "filezilla.exe": [21, 22, 990],
-        "winscp.exe": [21, 22, 990],
-        "ftp.exe": [21, 990],
-        "openvpn.exe": [1194, 443],
-        "openconnect.exe": [443, 8443],
-        "forticlient.exe": [443, 8443]
-    }
-
-    return port not in safe_ports.get(name, []) 
+    # Per-process safe ports live in rules.json (ports.process_safe_ports)
+    return get_port_policy().is_unusual_process_port(name, port)
 
 def is_internal_lateral(ip, port):
-    try:    
-        ip_obj = ipaddress.ip_address(ip)       # smb  RPC  RDP   winram
-        return ip_obj.is_private and int(port) in {445, 135, 3389, 5985}
+    try:                                        # smb  RPC  RDP   winram
+        return get_ip_classifier().is_internal(ip) and int(port) in get_rules().lateral_ports
     except:
         return False
 
@@ -152,9 +117,22 @@ def rate_severity(reasons, ip_reputation):
         elif 'Missing process path' in r: score += 1
     return 'Critical' if score >= 6 else 'High' if score >= 4 else 'Medium' if score >= 2 else 'Low'
 
-def process_connection(connection, api_key, off_start=22, off_end=6):
+def is_local_address(ip):
+    """Empty, private (RFC 1918 / ULA), loopback, link-local, unspecified or allowlisted."""
+    return not ip or is_local_ip(ip)
+
+def process_connection(connection, api_key, off_start=22, off_end=6, ip_verdicts=None, hash_verdicts=None,
+                       port_flags=None):
+    """
+    Score one connection row.
+
+    ip_verdicts / hash_verdicts are the lookups already resolved by
+    analyze_connections; indicators missing from them are looked up here.
+    port_flags is this row's (suspicious port, unusual process port) pair
+    from PortPolicy.classify_frame, computed here when not given.
+    """
     ip = str(connection.get('RemoteAddress', ''))
-    if not ip or ip in ['127.0.0.1', '::1', '0.0.0.0'] or ip.startswith(('192.168.', '10.', '172.')):
+    if is_local_address(ip):
         return None
 
     port = connection.get('RemotePort', 0)
@@ -164,21 +142,36 @@ def process_connection(connection, api_key, off_start=22, off_end=6):
     time_collected = connection.get('TimeCollected', '')
     reasons = []
 
-    ip_result = check_ip_reputation(ip, api_key)
+    try:
+        if ip_verdicts is not None and ip in ip_verdicts:
+            ip_result = _resolved(ip_verdicts[ip])
+        else:
+            ip_result = check_ip_reputation(ip, api_key)
+    except RateLimited as e:
+        # Quota ran out before the vote was decided; say so rather than 'unknown'
+        logging.info(f"IP reputation for {ip} throttled: {e}")
+        ip_result = 'throttled'
     if ip_result == 'malicious':
         reasons.append("Malicious IP reputation")
 
-    if is_suspicious_port(port):
+    if port_flags is None:
+        port_flags = (is_suspicious_port(port), is_unusual_process_port(proc_name, port))
+    suspicious_port, unusual_process_port = port_flags
+
+    if suspicious_port:
         reasons.append(f"Unusual port used: {port}")
 
     try:
-        is_malicious_hash, hash_msg = scan_hash_and_decide(hash_value, api_key)
+        if hash_verdicts is not None and hash_value in hash_verdicts:
+            is_malicious_hash, hash_msg = _resolved(hash_verdicts[hash_value])
+        else:
+            is_malicious_hash, hash_msg = scan_hash_and_decide(hash_value, api_key)
         if is_malicious_hash:
             reasons.append(f"Malicious process hash: {hash_msg}")
     except Exception as e:
         reasons.append(f"VirusTotal scan error: {str(e)}")
 
-    if is_unusual_process_port(proc_name, port):
+    if unusual_process_port:
         reasons.append(f"Abnormal port used by {proc_name}: {port}")
 
     if is_internal_lateral(ip, port):
@@ -206,30 +199,92 @@ def process_connection(connection, api_key, off_start=22, off_end=6):
     return None
 
 ####################################################################################
+# Indicator collection: resolve each distinct IP / hash once, then join back onto rows
+
+def _resolved(result):
+    """Unpack a resolve_ips / resolve_hashes entry, re-raising a lookup error for the caller."""
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+def collect_connection_indicators(connections):
+    """Return the distinct remote IPs and process hashes worth looking up."""
+    ips, hashes = set(), set()
+    for conn in connections:
+        ip = str(conn.get('RemoteAddress', ''))
+        if is_local_address(ip):
+            continue
+        ips.add(ip)
+        hashes.add(str(conn.get('SHA256Hash', '')))
+    return ips, hashes
 
-# Setup logging format
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+def resolve_ips(ips, api_keys):
+    """
+    Look up every distinct IP exactly once, all concurrently; returns {ip: verdict}.
 
-# Patterns and heuristics
-STANDARD_PATH_PATTERNS = [
-    r'C:/Windows/System32', r'C:/Program Files', r'C:/Program Files \(x86\)', r'C:/Users/.*/AppData/Local'
-]
-SUSPICIOUS_PARENTS = {'cmd.exe', 'powershell.exe', 'python.exe', 'wscript.exe'}
+    An IP still throttled after the key scheduler's re-queues maps to the
+    RateLimited error, which process_connection reports as 'throttled'.
+    """
+    if not ips:
+        return {}
+    try:
+        return check_ips(ips, api_keys)
+    except Exception as e:
+        logging.warning(f"IP lookup error: {e}")
+        return {ip: 'unknown' for ip in ips}
 
-KNOWN_LEGIT_NAMES = {
-    'tcpsvcs', 'svchost', 'services', 'lsass', 'wininit', 'explorer', 'csrss', 'smss', 'winlogon',
-    'dwm', 'conhost', 'taskhostw', 'msmpeng', 'spoolsv', 'dllhost', 'wuauclt', 'msdtc', 'audiodg',
-    'sihost', 'ctfmon', 'searchindexer', 'runtimebroker', 'backgroundtransferhost', 'fontdrvhost',
-    'securityhealthservice', 'wlanext', 'wlms', 'wbengine', 'wermgr', 'werfault', 'wscsvc', 'wmpnetwk',
-    'wudfhost', 'wuauserv', 'trustedinstaller', 'tiworker', 'taskmgr', 'system', 'idle', 'msiexec',
-    'regsvr32', 'rundll32', 'notepad', 'calc', 'mspaint', 'defrag', 'chkdsk', 'sfc', 'diskperf',
-    'eventvwr', 'logonui', 'userinit', 'vssvc', 'sdclt', 'mobsync', 'igfxtray', 'hkcmd', 'igfxpers',
-    'soundmixer', 'rdpclip', 'mstsc', 'tskmgr', 'perfmon', 'resmon', 'mmc', 'comsurrogate', 'sdiagnhost'
-}
+def resolve_hashes(hashes, api_keys):
+    """
+    Scan every distinct hash exactly once, all concurrently.
+
+    Returns {hash: (is_malicious, message)}; a failed scan maps to the
+    exception so callers can report it the same way an inline scan would.
+    """
+    if not hashes:
+        return {}
+    try:
+        return scan_hashes(hashes, api_keys)
+    except Exception as e:
+        return {h: e for h in hashes}
+
+def analyze_connections(connections_df, api_keys):
+    """
+    Analyze every connection while spending one lookup per distinct indicator.
+
+    Network cost scales with the number of unique remote IPs and process
+    hashes instead of the number of connection rows.
+    """
+    connections = connections_df.to_dict(orient='records') if isinstance(connections_df, pd.DataFrame) else list(connections_df)
+    # Drop local traffic up front, classifying the whole address column at once
+    remote = pd.Series([str(conn.get('RemoteAddress', '')) for conn in connections], dtype=object)
+    local = (remote == '') | classify_ips(remote)['local']
+    connections = [conn for conn, is_local in zip(connections, local) if not is_local]
+    ips, hashes = collect_connection_indicators(connections)
+    logging.info(f"Resolving {len(ips)} distinct IPs and {len(hashes)} distinct hashes for {len(connections)} connections")
+    ip_verdicts = resolve_ips(ips, api_keys)
+    hash_verdicts = resolve_hashes(hashes, api_keys)
+    port_flags = get_port_policy().classify_frame(pd.DataFrame.from_records(connections, columns=['ProcessName', 'RemotePort']))
+
+    results = []
+    for conn, flags in zip(connections, port_flags.itertuples(index=False)):
+        try:
+            result = process_connection(conn, api_keys, ip_verdicts=ip_verdicts, hash_verdicts=hash_verdicts,
+                                        port_flags=tuple(flags))
+            if result:
+                results.append(result)
+        except Exception as e:
+            logging.warning(f"Connection analysis error: {e}")
+    return results
+
+####################################################################################
+
+# Patterns and heuristics; KNOWN_LEGIT_NAMES and the standard path patterns
+# are in rules.json (processes section)
+SUSPICIOUS_PARENTS = {'cmd.exe', 'powershell.exe', 'python.exe', 'wscript.exe'}
 
 def is_random_name(name):
     name = str(name).lower().replace('.exe', '')
-    if name in KNOWN_LEGIT_NAMES or len(name) < 5:
+    if name in get_rules().known_legit_names or len(name) < 5:
         return False
     entropy = len(set(name)) / len(name)
     has_vowels = any(c in 'aeiou' for c in name)
@@ -238,7 +293,7 @@ def is_random_name(name):
 
 def is_non_standard_path(path):
     path = str(path).replace('\\', '/')
-    return not any(re.match(pat, path, re.IGNORECASE) for pat in STANDARD_PATH_PATTERNS)
+    return not get_rules().standard_paths.match(path)
 
 def is_new_process(start_time):
     try:
@@ -268,23 +323,10 @@ def is_high_entropy_command(cmd):
 
 def get_compile_time(filepath):
     try:
-        pe = pefile.PE(filepath)
-        timestamp = pe.FILE_HEADER.TimeDateStamp
-        return datetime.utcfromtimestamp(timestamp)
-    except:
+        return compile_datetime(get_pe_inspector().inspect(filepath))
+    except Exception:
         return None
 
-def is_suspicious_parent(row, df):
-    parent = str(row.get('ParentProcessName', '')).strip().lower()
-    if not parent or parent == 'n/a':
-        return True
-    if 'system' in str(row.get('UserName', '')).lower():
-        return False
-    if parent.replace('.exe', '') in KNOWN_LEGIT_NAMES and not is_non_standard_path(str(row.get('Path'))):
-        return False
-    parent_exists = any(df['Name'].str.lower() == parent)
-    return not parent_exists or is_random_name(parent.replace('.exe', ''))
-
 def is_suspicious_parent_child(row):
     parent = str(row.get('ParentProcessName', '')).lower()
     child = str(row.get('Name', '')).lower()
@@ -297,45 +339,260 @@ def is_suspicious_parent_child(row):
         return parent in suspicious_parents or is_random_name(parent.replace('.exe', ''))
     return False
 
-def analyze_process(row, df):
-    path = str(row.get('Path', ''))
-    if not path or path in ('-', ''):
-        return None
-    reasons = []
-    hash_value = None
-    try:
-        with open(path, 'rb') as f:
-            hash_value = hashlib.sha256(f.read()).hexdigest()
-    except FileNotFoundError:
-        reasons.append("Path does not exist")
-    except Exception as e:
-        reasons.append(f"File read error: {e}")
-
-    if is_random_name(row.get('Name')):
-        reasons.append("Random-looking name")
-    if is_non_standard_path(path):
-        reasons.append("Non-standard path")
-    if is_new_process(row.get('StartTime')):
-        reasons.append("Recently started process")
-    if is_suspicious_parent(row, df):
-        if row.get('Name', '').lower() not in ['conhost.exe', 'firefox.exe', 'msedge.exe']:
-            reasons.append("Suspicious parent process")
-    if is_suspicious_parent_child(row):
-        reasons.append("Suspicious parent-child pattern")
-    if has_base64_command_line(row.get('CommandLine')):
-        reasons.append("Base64 command line")
-    if is_high_entropy_command(row.get('CommandLine')):
-        reasons.append("High entropy command (likely obfuscated)")
-       
-        # Integrate file hash check
-    if path and os.path.exists(path):
-        hash_value = hashlib.sha256(open(path, 'rb').read()).hexdigest()
-        is_malicious, message = scan_hash_and_decide(hash_value, API_KEYS[0])
-        if is_malicious:
-            reasons.append(f"Malicious file hash: {message}")
-
-    if len(reasons) >= 2:
-        return {
+# Vectorized versions of the heuristics above, evaluated over a whole
+# RunningProcesses frame at once. They give the same answers as the scalar
+# functions, which stay for single-row callers; the parent check needs the
+# whole frame and so only exists as suspicious_parent_mask.
+
+RISKY_CHILDREN = {'cmd.exe', 'powershell.exe', 'wscript.exe', 'cscript.exe', 'python.exe', 'bash.exe'}
+SUSPICIOUS_PARENT_NAMES = {
+    'svchost.exe', 'services.exe', 'explorer.exe', 'winlogon.exe',
+    'rundll32.exe', 'regsvr32.exe', 'msiexec.exe', 'dllhost.exe'
+}
+PARENT_CHECK_EXEMPT = {'conhost.exe', 'firefox.exe', 'msedge.exe'}
+BASE64_RUN = r'([A-Za-z0-9+/=]{20,})'
+
+# (heuristic column, reason) in the order check_processes reports them
+PROCESS_REASONS = [
+    ('random_name', "Random-looking name"),
+    ('non_standard_path', "Non-standard path"),
+    ('new_process', "Recently started process"),
+    ('suspicious_parent', "Suspicious parent process"),
+    ('suspicious_parent_child', "Suspicious parent-child pattern"),
+    ('base64_command_line', "Base64 command line"),
+    ('high_entropy_command', "High entropy command (likely obfuscated)"),
+]
+
+def _as_str(values):
+    """
+    str() of every value; missing values become 'nan' as str(row.get(...)) gives.
+    Kept as object dtype: the .str methods then use Python's Unicode-aware
+    str and re like the per-row functions, where pandas' Arrow-backed str
+    dtype has ASCII-only \\W and its own lower().
+    """
+    return values.astype(object).fillna('nan').astype(str).astype(object)
+
+def _column(df, name, default=''):
+    """``df[name]`` as str, like str(row.get(name, default)) for every row."""
+    if name in df.columns:
+        return _as_str(df[name])
+    return pd.Series(str(default), index=df.index, dtype=object)
+
+# Code points held in one fixed-width block (16 MB); rows are grouped by
+# length so one long command line does not widen every other row
+CODE_POINT_BUDGET = 4 * 1024 * 1024
+
+def _sorted_code_points(strings, chunk_size):
+    """
+    Yield (rows, codes, first) per chunk: the row positions, one zero-padded
+    row of sorted code points per string, and a mask marking the first
+    occurrence of each distinct character. Strings are taken shortest first
+    and each chunk is only as wide as its longest string.
+    """
+    strings = np.asarray(strings, dtype=object)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    order = np.argsort(lengths, kind='stable')
+    start = 0
+    while start < len(order):
+        end = min(start + chunk_size, len(order))
+        width = int(lengths[order[end - 1]])
+        end = min(end, start + max(1, CODE_POINT_BUDGET // max(width, 1)))
+        rows = order[start:end]
+        start = end
+        width = int(lengths[rows[-1]])
+        if width == 0:
+            continue
+        chunk = np.array(strings[rows].tolist(), dtype=f'<U{width}')
+        codes = np.sort(chunk.view(np.uint32).reshape(len(chunk), width), axis=1)
+        first = codes != 0
+        first[:, 1:] &= codes[:, 1:] != codes[:, :-1]
+        yield rows, codes, first
+
+def distinct_char_counts(strings, chunk_size=4096):
+    """Number of distinct characters in each string, computed with NumPy in chunks."""
+    counts = np.zeros(len(strings), dtype=np.int64)
+    for rows, codes, first in _sorted_code_points(strings, chunk_size):
+        counts[rows] = first.sum(axis=1)
+    return counts
+
+def shannon_entropy(strings, chunk_size=4096):
+    """Shannon entropy (bits per character) of each string, linear in total length."""
+    entropy = np.zeros(len(strings), dtype=np.float64)
+    for chunk_rows, codes, first in _sorted_code_points(strings, chunk_size):
+        rows, width = codes.shape
+        lengths = (codes != 0).sum(axis=1)
+        # Each distinct character is a run in its sorted row; the run ends where
+        # the next one starts or at the end of the row
+        starts = np.flatnonzero(first)
+        row_of = starts // width
+        ends = np.append(starts[1:], rows * width)
+        ends = np.where(np.append(row_of[1:], rows) == row_of, ends, (row_of + 1) * width)
+        p = (ends - starts) / lengths[row_of]
+        entropy[chunk_rows] = np.bincount(row_of, weights=-p * np.log2(p), minlength=rows)
+    return entropy
+
+def random_name_mask(names):
+    """Vectorized is_random_name over a Series of names."""
+    names = _as_str(names).str.lower().str.replace('.exe', '', regex=False)
+    # Names repeat heavily in a process list; evaluate each distinct one once
+    codes, uniques = pd.factorize(names)
+    uniques = pd.Series(uniques, dtype=object)
+    lengths = uniques.str.len().to_numpy()
+    distinct = distinct_char_counts(uniques.to_numpy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = distinct / lengths
+    has_vowels = uniques.str.contains('[aeiou]', regex=True).to_numpy()
+    has_numbers = uniques.map(lambda name: any(c.isdigit() for c in name)).to_numpy(dtype=bool)
+    result = (
+        ~uniques.isin(get_rules().known_legit_names).to_numpy()
+        & (lengths >= 5)
+        & (entropy > 0.8)
+        & (~has_vowels | has_numbers)
+        & uniques.str.isalnum().to_numpy(dtype=bool)
+    )
+    return pd.Series(result[codes] if len(codes) else np.zeros(0, dtype=bool), index=names.index)
+
+def non_standard_path_mask(paths):
+    """Vectorized is_non_standard_path: one combined regex instead of one per pattern."""
+    paths = _as_str(paths).str.replace('\\', '/', regex=False)
+    return ~get_rules().standard_paths.match_series(paths).astype(bool)
+
+def new_process_mask(start_times, now=None):
+    """Vectorized is_new_process; unparsable times are not new."""
+    started = pd.to_datetime(_as_str(start_times), format='%m/%d/%Y %I:%M:%S %p', errors='coerce')
+    age = (now or datetime.now()) - started
+    return (age < pd.Timedelta(seconds=86400)).fillna(False).astype(bool)
+
+def base64_command_line_mask(command_lines):
+    """Vectorized has_base64_command_line."""
+    command_lines = _as_str(command_lines)
+    runs = command_lines.str.extractall(BASE64_RUN)[0]
+    # What base64.b64decode(validate=True) accepts for a run whose length is a
+    # multiple of 4: padding that completes the last quantum, or whole quanta of it
+    valid = (runs.str.len() % 4 == 0) & runs.str.fullmatch(r'[A-Za-z0-9+/]+(?:={1,2}|(?:====)*)')
+    hits = valid[valid].index.get_level_values(0).unique()
+    return pd.Series(command_lines.index.isin(hits), index=command_lines.index)
+
+def high_entropy_command_mask(command_lines):
+    """Vectorized is_high_entropy_command."""
+    cleaned = _as_str(command_lines).str.replace(r'\W', '', regex=True)
+    lengths = cleaned.str.len().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = distinct_char_counts(cleaned.to_numpy()) / lengths
+    return pd.Series((lengths >= 10) & (entropy > 0.85), index=command_lines.index)
+
+def process_name_set(df):
+    return set(_as_str(df['Name'].dropna()).str.lower()) if 'Name' in df.columns else set()
+
+def suspicious_parent_mask(df, tree_flags=None, process_names=None):
+    """
+    The parent is missing, unknown or random-looking. When a row carries a
+    parent id the process tree decides whether the parent is running;
+    otherwise any process with the parent's name counts, looked up in a name
+    set built once for the frame. ``tree_flags`` is ProcessTree.frame_flags
+    for ``df``; when ``df`` is a chunk, ``tree_flags`` and ``process_names``
+    must come from the whole snapshot.
+    """
+    parents = _column(df, 'ParentProcessName').str.strip().str.lower()
+    bare = parents.str.replace('.exe', '', regex=False)
+    names = process_names if process_names is not None else process_name_set(df)
+    missing = (parents == '') | (parents == 'n/a')
+    system = _column(df, 'UserName').str.lower().str.contains('system', regex=False)
+    trusted = bare.isin(get_rules().known_legit_names) & ~non_standard_path_mask(_column(df, 'Path', None))
+    if tree_flags is None:
+        tree_flags = ProcessTree.from_frame(df).frame_flags(df)
+    unknown = np.where(tree_flags['has_parent_info'], tree_flags['orphan'], ~parents.isin(names))
+    unknown = unknown | random_name_mask(bare)
+    return missing | (~system & ~trusted & unknown)
+
+def suspicious_parent_child_mask(df):
+    """Vectorized is_suspicious_parent_child."""
+    parents = _column(df, 'ParentProcessName').str.lower()
+    children = _column(df, 'Name').str.lower()
+    return children.isin(RISKY_CHILDREN) & (
+        parents.isin(SUSPICIOUS_PARENT_NAMES) | random_name_mask(parents.str.replace('.exe', '', regex=False))
+    )
+
+def process_heuristics(df, now=None, tree_flags=None, process_names=None):
+    """Every per-process heuristic as a boolean column (see PROCESS_REASONS)."""
+    command_lines = _column(df, 'CommandLine', None)
+    names = df['Name'] if 'Name' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    exempt = _as_str(names.fillna('')).str.lower().isin(PARENT_CHECK_EXEMPT)
+    return pd.DataFrame({
+        'random_name': random_name_mask(names),
+        'non_standard_path': non_standard_path_mask(_column(df, 'Path')),
+        'new_process': new_process_mask(_column(df, 'StartTime', None), now),
+        'suspicious_parent': suspicious_parent_mask(df, tree_flags, process_names) & ~exempt,
+        'suspicious_parent_child': suspicious_parent_child_mask(df),
+        'base64_command_line': base64_command_line_mask(command_lines),
+        'high_entropy_command': high_entropy_command_mask(command_lines),
+    }, index=df.index)
+
+def check_processes(df, api_keys=None, inspect_pe=True):
+    api_keys = api_keys or API_KEYS
+    results = []
+
+    if df.empty:
+        return results
+
+    # Indicator stage: read each distinct binary once, scan each distinct hash once
+    paths = _column(df, 'Path')
+    paths = paths[~paths.isin(['', '-'])]
+    file_hashes = get_file_hasher().hash_many(set(paths))
+    hashes = {h for h in file_hashes.values() if isinstance(h, str)}
+    logging.info(f"Scanning {len(hashes)} distinct hashes for {len(df)} processes")
+    hash_verdicts = resolve_hashes(hashes, api_keys)
+
+    # Per-path reasons: read errors first, then the file hash verdict
+    path_errors, malicious_hashes = {}, {}
+    for path, hash_value in file_hashes.items():
+        if isinstance(hash_value, FileNotFoundError):
+            path_errors[path] = "Path does not exist"
+        elif isinstance(hash_value, Exception):
+            path_errors[path] = f"File read error: {hash_value}"
+        else:
+            try:
+                is_malicious, message = _resolved(hash_verdicts[hash_value])
+            except Exception as e:
+                logging.warning(f"Hash check error: {e}")
+                continue
+            if is_malicious:
+                malicious_hashes[hash_value] = message
+
+    # PE header checks, parsed once per distinct binary (cached by hash)
+    pe_findings = {}
+    if inspect_pe:
+        readable = {p: h for p, h in file_hashes.items() if isinstance(h, str)}
+        rules = get_rules()
+        for path, metadata in get_pe_inspector().inspect_many(readable, readable).items():
+            findings = pe_reasons(metadata, rules)
+            if findings:
+                pe_findings[path] = findings
+
+    # Heuristic stage: every check as a column, with parent and lineage checks
+    # answered by one process-tree index; row chunks go to the CPU pool
+    tree_flags = ProcessTree.from_frame(df).frame_flags(df, get_rules().lineage_rules)
+    flags = get_executors().map_frame(
+        process_heuristics, df, now=datetime.now(), process_names=process_name_set(df),
+        aligned={'tree_flags': tree_flags[['has_parent_info', 'orphan']]}).loc[paths.index]
+    lineage = tree_flags['lineage'].loc[paths.index]
+    path_flags = paths.isin(path_errors.keys()).astype(int) + paths.map(
+        lambda p: file_hashes.get(p) in malicious_hashes).astype(int) + lineage.map(len) + paths.map(
+        lambda p: len(pe_findings.get(p, ())))
+    candidates = flags.index[flags.sum(axis=1) + path_flags >= 2]
+
+    for i in candidates:
+        row = df.loc[i]
+        path = paths[i]
+        hash_value = file_hashes.get(path)
+        hash_value = hash_value if isinstance(hash_value, str) else None
+        reasons = [path_errors[path]] if path in path_errors else []
+        reasons += [reason for column, reason in PROCESS_REASONS if flags.at[i, column]]
+        reasons += lineage[i]
+        reasons += pe_findings.get(path, [])
+        if hash_value in malicious_hashes:
+            reasons.append(f"Malicious file hash: {malicious_hashes[hash_value]}")
+        results.append({
             'Id': row['Id'],
             'Name': str(row.get('Name', '')),
             'Path': path,
@@ -346,34 +603,12 @@ def analyze_process(row, df):
             'ParentProcessName': row.get('ParentProcessName', ''),
             'ChildProcessName': row.get('ChildProcessName', ''),
             'Reasons': reasons
-        }
-    return None
+        })
 
-def check_processes(df):
-    results = []
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(analyze_process, row, df): i for i, row in df.iterrows()}
-        for future in as_completed(futures):
-            try:
-                res = future.result()
-                if res:
-                    results.append(res)
-            except Exception as e:
-                logging.warning(f"Analysis error: {e}")
-
-    with ThreadPoolExecutor() as executor:
-        hash_futures = {
-            executor.submit(scan_hash_and_decide, proc['Hash'], API_KEYS[i % len(API_KEYS)]): i
-            for i, proc in enumerate(results) if proc['Hash']
-        }
-        for future in as_completed(hash_futures):
-            try:
-                i = hash_futures[future]
-                is_malicious, message = future.result()
-                if is_malicious:
-                    results[i]['Reasons'].append(f"VirusTotal: {message}")
-            except Exception as e:
-                logging.warning(f"Hash check error: {e}")
+    # Join the already-resolved verdicts back onto the flagged processes
+    for proc in results:
+        if proc['Hash'] in malicious_hashes:
+            proc['Reasons'].append(f"VirusTotal: {malicious_hashes[proc['Hash']]}")
 
     return results
 
@@ -401,9 +636,9 @@ def check_unusual_processes(df_processes):
 
 ###########################################################
 
-def check_unauthorized_software(df_software, user_accounts, opening_hour, closing_hour):
+def check_unauthorized_software(df_software, user_accounts, opening_hour, closing_hour, evidence=None):
     # Load admin users
-
+    admin_users_df = (evidence or default_evidence).admin_users_df
     admin_users = set(admin_users_df['Name'].dropna()) if not admin_users_df.empty else set()
 
 
@@ -439,30 +674,52 @@ def check_unauthorized_software(df_software, user_accounts, opening_hour, closin
 #############################################################
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('startup_analysis.log'),
-        logging.StreamHandler()
-    ]
-)
-
 # Optimized function with multi-threading
 
-def check_suspicious_startup_entries(df, gemini_keys, max_workers=10):
+def check_suspicious_startup_entries(df, gemini_keys, max_workers=None, batch=True):
+    """
+    Flag startup entries Gemini considers suspicious.
+
+    With batch=True many entries share one prompt (see llmbatch); entries the
+    batch answer does not cover are retried one at a time.
+    """
     df_filtered = df[~df['Name'].str.startswith('PS') & df['Value'].notna()]
+    if batch:
+        entries = {
+            i: {'key': str(row['Key']), 'name': str(row.get('Name')), 'command': str(row.get('Value', ''))}
+            for i, row in df_filtered.iterrows()
+        }
+        verdicts = classify_batched(
+            entries,
+            check_Startup_batch,
+            lambda api_key, entry: check_Startup(api_key, entry['key'], entry['name'], entry['command']),
+            gemini_keys,
+            max_workers=max_workers,
+            cache_kind='startup',
+        )
+        suspicious = []
+        for i, entry in entries.items():
+            if verdicts.get(i) == 'suspicious':
+                suspicious.append({
+                    'Key': entry['key'],
+                    'Name': entry['name'],
+                    'Command': entry['command'],
+                    'Analysis': 'suspicious'
+                })
+                logging.info(f"Suspicious startup entry detected: {entry['name']} ({entry['key']})")
+        return suspicious
+
     suspicious = []
-    num_keys = len(gemini_keys)
+    scheduler = get_scheduler("gemini")
     lock = threading.Lock()
 
     def process_entry(index, row):
+        name = str(row.get('Name'))
         try:
             command = str(row.get('Value', ''))
             key = str(row['Key'])
-            name = str(row.get('Name'))
-            api_key = gemini_keys[index % num_keys]
-            analysis = check_Startup(api_key, key, name, command)
+            # The scheduler picks a key with quota left and re-queues on 429
+            analysis = scheduler.call(lambda api_key: check_Startup(api_key, key, name, command), gemini_keys)
             if analysis == 'suspicious':
                 with lock:
                     suspicious.append({
@@ -475,8 +732,8 @@ def check_suspicious_startup_entries(df, gemini_keys, max_workers=10):
         except Exception as e:
             logging.error(f"Error analyzing startup entry '{name}': {e}")
 
-    # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # Parallelism scales with the number of keys in the Gemini pool
+    with ThreadPoolExecutor(max_workers=max_workers or get_llm_pool().max_parallel(gemini_keys)) as executor:
         for i, row in df_filtered.iterrows():
             executor.submit(process_entry, i, row)
 
@@ -484,25 +741,17 @@ def check_suspicious_startup_entries(df, gemini_keys, max_workers=10):
 
 
 ################################################################
-# Setup logging format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('firewall_modifications.log'),
-        logging.StreamHandler()
-    ]
-)
 
 # Optimized function with multi-threading
 
-def check_firewall_modifications(df_firewall, gemini_keys, max_workers=10):
+def check_firewall_modifications(df_firewall, gemini_keys, max_workers=None, evidence=None, batch=True):
     if df_firewall.empty or not {'TimeCreated', 'Id', 'SubjectUserName', 'IpAddress', 'Message'}.issubset(df_firewall.columns):
         logging.warning("Empty DataFrame or missing required columns.")
         return []
     
     # Load admin users
     try:
+        admin_users_df = (evidence or default_evidence).admin_users_df
         admin_users = set(admin_users_df['Name']) if not admin_users_df.empty else set()
     except FileNotFoundError:
         logging.error("AdminUsers.csv not found.")
@@ -511,10 +760,35 @@ def check_firewall_modifications(df_firewall, gemini_keys, max_workers=10):
     
     # Fill missing values
     df_firewall = df_firewall.fillna('')
-    num_keys = len(gemini_keys)
+    scheduler = get_scheduler("gemini")
     suspicious_entries = []
     lock = threading.Lock()
 
+    if batch:
+        messages = {i: {'message': str(row['Message'])} for i, row in df_firewall.iterrows() if str(row['Message'])}
+        verdicts = classify_batched(
+            messages,
+            check_messages_batch,
+            lambda api_key, item: (check_message(api_key, item['message']) or '').strip().lower(),
+            gemini_keys,
+            max_workers=max_workers,
+            cache_kind='firewall',
+        )
+        for i, row in df_firewall.iterrows():
+            username = str(row['SubjectUserName'])
+            content_result = verdicts.get(i, '')
+            if content_result == 'suspicious' or username not in admin_users:
+                suspicious_entries.append({
+                    'Time': str(row['TimeCreated']),
+                    'Event ID': str(row['Id']),
+                    'User': username,
+                    'IP Address': str(row['IpAddress']),
+                    'Message': str(row['Message']),
+                    'Reason': 'Suspicious content' if content_result == 'suspicious' else 'Non-admin change'
+                })
+                logging.info(f"Suspicious firewall modification detected: {row['Message']}")
+        return suspicious_entries
+
     def process_row(index, row):
         try:
             message = str(row['Message'])
@@ -522,8 +796,7 @@ def check_firewall_modifications(df_firewall, gemini_keys, max_workers=10):
             event_id = str(row['Id'])
             ip_address = str(row['IpAddress'])
             time_created = str(row['TimeCreated'])
-            api_key = gemini_keys[index % num_keys]
-            content_result = check_message(api_key, message).strip().lower()
+            content_result = scheduler.call(lambda api_key: check_message(api_key, message), gemini_keys).strip().lower()
             is_non_admin = username not in admin_users
             if content_result == 'suspicious' or is_non_admin:
                 reason = 'Suspicious content' if content_result == 'suspicious' else 'Non-admin change'
@@ -540,8 +813,8 @@ def check_firewall_modifications(df_firewall, gemini_keys, max_workers=10):
         except Exception as e:
             logging.error(f"Error processing row {index}: {e}")
 
-    # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # Parallelism scales with the number of keys in the Gemini pool
+    with ThreadPoolExecutor(max_workers=max_workers or get_llm_pool().max_parallel(gemini_keys)) as executor:
         for i, row in df_firewall.iterrows():
             executor.submit(process_row, i, row)
 
@@ -549,39 +822,54 @@ def check_firewall_modifications(df_firewall, gemini_keys, max_workers=10):
 
 ####################################################################################################
 
-def csv_to_json():
+def iter_suspicious_files(evidence=None):
+    """SuspiciousFiles.csv rows as dicts, read a chunk at a time."""
+    for chunk in (evidence or default_evidence).iter_chunks(
+            'suspiciousFiles', columns=['FullName', 'LastWriteTime', 'SHA256Hash']):
+        for column in ('FullName', 'LastWriteTime', 'SHA256Hash'):
+            if column not in chunk.columns:
+                raise KeyError(column)
+        columns = [chunk[column].astype(object).fillna('').astype(str).str.strip()
+                   for column in ('FullName', 'LastWriteTime', 'SHA256Hash')]
+        for full_name, last_write, sha256 in zip(*columns):
+            yield {'FullName': full_name, 'LastWriteTime': last_write, 'SHA256Hash': sha256}
+
+def csv_to_json(evidence=None):
+    evidence = evidence or default_evidence
     try:
-        df = pd.read_csv(os.path.join(INPUT_DIR, "SuspiciousFiles.csv"))
-        return {
-            'files': [
-                {
-                    'FullName': str(row['FullName']).strip() if pd.notna(row['FullName']) else '',
-                    'LastWriteTime': str(row['LastWriteTime']).strip() if pd.notna(row['LastWriteTime']) else '',
-                    'SHA256Hash': str(row['SHA256Hash']).strip() if pd.notna(row['SHA256Hash']) else ''
-                }
-                for _, row in df.iterrows()
-            ]
-        }
+        path = evidence.path(ARTIFACTS['suspiciousFiles'])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No such file: {path}")
+        return {'files': list(iter_suspicious_files(evidence))}
     except Exception as e:
         return {'error': str(e)}
 
 ####################################################################
 def analyze_recent_file_changes(df):
+    """Risky file changes; ``df`` is a frame or an iterable of chunks (see EvidenceSet.iter_chunks)."""
     suspicious_changes = []
-    risky_extensions = {'.bat', '.vbs', '.ps1', '.exe', '.js', '.cmd'}
-    risky_dirs = ["appdata", "temp", "programdata", "windows\\system32"]
+    for chunk in iter_frames(df):
+        suspicious_changes += get_executors().map_frame(_recent_file_change_rows, chunk)
+    return suspicious_changes
+
+def _recent_file_change_rows(df):
+    suspicious_changes = []
+    rules = get_rules()
+    if 'FullName' not in df.columns:
+        return suspicious_changes
 
     for _, row in df.iterrows():
-        path = row.get("FullName", "").strip().lower()
-        extension = os.path.splitext(path)[-1].lower()
+        full_name = row["FullName"]
         # Skip if path is empty
-        if not path:
+        if not isinstance(full_name, str) or not full_name.strip():
             continue
+        path = full_name.strip().lower()
+        extension = os.path.splitext(path)[-1].lower()
         
         # Check for risky extensions or directories
-        if extension in risky_extensions or any(dir in path for dir in risky_dirs):
+        if extension in rules.risky_extensions or rules.risky_dirs.search(path):
             suspicious_changes.append({
-                "Path": row.get("FullName", ""),
+                "Path": full_name,
                 "ChangeType": "Modified",
                 "Timestamp": row.get("LastWriteTime", ""),
                 "Owner": row.get("Owner", "")
@@ -592,142 +880,70 @@ def analyze_recent_file_changes(df):
 ####################################################################################################################
 
 
-def analyze_event_ids_from_file( gemini_keys, max_workers=10):
-
-    # Flat list of known Windows event IDs
-    known_ids = [
-        4625, 4624, 4740, 4698, 4702, 7045,
-        4672, 4688, 4690, 4689, 4728, 4776,
-        4798, 4756, 5140, 4769, 4104, 5145,
-        5156, 1102, 4719, 1100
-    ]
-
-    # 1) Extract & filter
-    event_ids = (
-        securityLogs['Id']
-        .dropna()
-        .astype(int)
-        .tolist()
-    )
-    matched_ids = [eid for eid in event_ids if eid in known_ids]
-    print(f"Analyzing {len(matched_ids)} matched Event IDs...")
-    print(matched_ids)
-    if not matched_ids:
+def _analyze_event_log(log, frame, ids, fields, check, gemini_keys, key_index, detections=None,
+                       mode=None, max_workers=None):
+    """
+    Have the model assess one event log: in "summary" mode one prompt of
+    per-ID aggregates, in "mapreduce" mode the event stream in chunks
+    across the key pool (see eventmapreduce).
+    """
+    mode = (mode or DEFAULT_LOG_ANALYSIS).lower()
+    if mode not in LOG_ANALYSIS_MODES:
+        raise ValueError(f"log analysis mode must be one of {', '.join(LOG_ANALYSIS_MODES)}, not {mode!r}")
+    index = EventIndex.from_frame(frame, fields)
+    matched = index.select(ids)
+    logging.info(f"Analyzing {len(matched)} of {len(index)} {log} events ({mode})")
+    if not len(matched):
         return []
-
     try:
-        # 2) Send single request: a JSON list
-        api_key = gemini_keys[0]
-        raw     = check_content(api_key, matched_ids)
-
-        return raw
-    
-
+        if mode == "mapreduce":
+            report = map_reduce_log(matched, log, fields, gemini_keys, detections or (), max_workers=max_workers)
+            if report is not None:
+                return report
+            logging.info(f"{log} log too large for map-reduce, sending the summary instead")
+        summary = index.summary(ids, fields)
+        if detections:
+            # Local correlation results go first so the model weighs them over raw counts
+            summary = dict(detections=detections[:MAX_PROMPT_DETECTIONS], **summary)
+        return parse_report(check(gemini_keys[key_index], summary))
     except Exception as e:
-        print(f"Error analyzing Event IDs: {e}")
+        logging.error(f"Error analyzing {log} events: {e}")
         return [{"Error": str(e)}]
 
+def analyze_logon_correlation(securityLogs, admin_users_df=None):
+    """Brute-force, spraying, new-admin and SMB lateral-movement detections from the Security log."""
+    admins = admin_users_df['Name'].dropna() if admin_users_df is not None and 'Name' in admin_users_df.columns else ()
+    return correlate_events(securityLogs, admins)
 
-#######################################################################
-def analyze_application_logs( gemini_keys, max_workers=10):
+def analyze_event_ids_from_file( gemini_keys, max_workers=None, evidence=None, detections=None, mode=None):
+    evidence = evidence or default_evidence
+    securityLogs = evidence.securityLogs
+    if detections is None:
+        detections = analyze_logon_correlation(securityLogs, evidence.admin_users_df)
+    return _analyze_event_log("security", securityLogs, SECURITY_EVENT_IDS, SECURITY_FIELDS,
+                              check_content, gemini_keys, 0, detections, mode, max_workers)
 
-    # Flat list of known Windows event IDs
-    known_ids = [
-    1000, 1001, 1026, 1033, 4096, 4097, 6000, 8193, 8194, 
-    1002, 5011, 4624, 4625, 7031, 7034, 1014, 11707, 11724, 
-    104, 4098, 1005, 1502, 1503, 2001, 1003
-    ]
 
-    # 1) Extract & filter
-    event_ids = (
-        applicationLogs['Id']
-        .dropna()
-        .astype(int)
-        .tolist()
-    )
-    matched_ids = [eid for eid in event_ids if eid in known_ids]
-    print(f"Analyzing {len(matched_ids)} matched Event IDs...")
-    print(matched_ids)
-    if not matched_ids:
-        return []
-
-    try:
-        # 2) Send single request: a JSON list
-        api_key = gemini_keys[1]
-        raw     = check_content2(api_key, matched_ids)
-
-
-        return raw
-
-    except Exception as e:
-        print(f"Error analyzing Event IDs: {e}")
-        return [{"Error": str(e)}]
+#######################################################################
+def analyze_application_logs( gemini_keys, max_workers=None, evidence=None, mode=None):
+    applicationLogs = (evidence or default_evidence).applicationLogs
+    return _analyze_event_log("application", applicationLogs, APPLICATION_EVENT_IDS, APPLICATION_FIELDS,
+                              check_content2, gemini_keys, 1, mode=mode, max_workers=max_workers)
 ###############################################################################33
 
-def analyze_system_logs( gemini_keys, max_workers=10):
-
-    # Flat list of known Windows event IDs
-    known_ids = [
-    4624, 4625, 4634, 4648, 4662, 4672, 4673, 4674, 4688, 4689, 
-    4690, 4698, 4699, 4700, 4701, 4702, 4719, 4720, 4722, 4723, 
-    4724, 4725, 4726, 4738, 4740, 4741, 4742, 4743, 4744, 4745, 
-    4746, 4747, 4748, 4749, 4750, 4751, 4752, 4753, 4754, 4755, 
-    4756, 4757, 4758, 4759, 4760, 4761, 4762, 4763, 4764, 4765, 
-    4766, 4767, 4768, 4769, 4770, 4771, 4772, 4773, 4774, 4775, 
-    4776, 4777, 4778, 4779, 4780, 4781, 4782, 4783, 4784, 4785, 
-    4786, 4787, 4788, 4789, 4790, 4791, 4792, 4793, 4794, 4795, 
-    4796, 4797, 4798, 4799, 4800, 4801, 4802, 4803, 4804, 4805, 
-    4806, 4807, 4808, 4809, 4810, 4811, 4812, 4813, 4814, 4815, 
-    4816, 4817, 4818, 4819, 4820, 4821, 4822, 4823, 4824, 4825, 
-    4826, 4827, 4828, 4829, 4830, 4831, 4832, 4833, 4834, 4835, 
-    4836, 4837, 4838, 4839, 4840, 4841, 4842, 4843, 4844, 4845, 
-    4846, 4847, 4848, 4849, 4850, 4851, 4852, 4853, 4854, 4855, 
-    4856, 4857, 4858, 4859, 4860, 4861, 4862, 4863, 4864, 4865, 
-    4866, 4867, 4868, 4869, 4870, 4871, 4872, 4873, 4874, 4875, 
-    4876, 4877, 4878, 4879, 4880, 4881, 4882, 4883, 4884, 4885, 
-    4886, 4887, 4888, 4889, 4890, 4891, 4892, 4893, 4894, 4895, 
-    4896, 4897, 4898, 4899, 4900, 4901, 4902, 4903, 4904, 4905, 
-    4906, 4907, 4908, 4909, 4910, 4911, 4912, 4913, 4914, 4915, 
-    4916, 4917, 4918, 4919, 4920, 4921, 4922, 4923, 4924, 4925, 
-    4926, 4927, 4928, 4929, 4930, 4931, 4932, 4933, 4934, 4935, 
-    4936, 4937, 4938, 4939, 4940, 4941, 4942, 4943, 4944, 4945, 
-    4946, 4947, 4948, 4949, 4950, 4951, 4952, 4953, 4954, 4955, 
-    4956, 4957, 4958, 4959, 4960, 4961, 4962, 4963, 4964, 4965, 
-    4966, 4967, 4968, 4969, 4970, 4971, 4972, 4973, 4974, 4975, 
-    4976, 4977, 4978, 4979, 4980, 4981, 4982, 4983, 4984, 4985, 
-    4986, 4987, 4988, 4989, 4990, 4991, 4992, 4993, 4994, 4995, 
-    4996, 4997, 4998, 4999
-]
-
-
-    # 1) Extract & filter
-    event_ids = (
-        applicationLogs['Id']
-        .dropna()
-        .astype(int)
-        .tolist()
-    )
-    matched_ids = [eid for eid in event_ids if eid in known_ids]
-    print(f"Analyzing {len(matched_ids)} matched Event IDs...")
-    print(matched_ids)
-    if not matched_ids:
-        return []
-
-    try:
-        # 2) Send single request: a JSON list
-        api_key = gemini_keys[2]
-        raw     = check_content3(api_key, matched_ids)
-
-
-        return raw
-
-    except Exception as e:
-        print(f"Error analyzing Event IDs: {e}")
-        return [{"Error": str(e)}]
+def analyze_system_logs( gemini_keys, max_workers=None, evidence=None, mode=None):
+    systemLogs = (evidence or default_evidence).systemLogs
+    return _analyze_event_log("system", systemLogs, SYSTEM_EVENT_IDS, SYSTEM_FIELDS,
+                              check_content3, gemini_keys, 2, mode=mode, max_workers=max_workers)
 ################################################################################
 
 def analyze_scheduled_tasks(df):
+    return get_executors().map_frame(_scheduled_task_rows, df)
+
+def _scheduled_task_rows(df):
     suspicious_tasks = []
+    risky_commands = keyword_matcher(['powershell', 'cmd.exe', '.ps1', 'wget', 'curl', 'certutil', 'rundll32', 'mshta'],
+                                     ignore_case=True)
     for _, row in df.iterrows():
         task_name = str(row.get("TaskName", ""))
         task_path = str(row.get("TaskPath", ""))
@@ -735,7 +951,7 @@ def analyze_scheduled_tasks(df):
         description = str(row.get("Description", ""))
         
         # Check for potentially malicious indicators
-        if re.search(r'powershell|cmd\.exe|\.ps1|wget|curl|certutil|rundll32|mshta', description, re.IGNORECASE):
+        if risky_commands.search(description):
             suspicious_tasks.append({
                 "TaskName": task_name,
                 "TaskPath": task_path,
@@ -790,11 +1006,12 @@ def analyze_arp_table(df_arp):
     return suspicious
 
 #####################################################################################
-import math
-import pandas as pd
 
 def analyze_dns_cache(df_dns):
     """Check DNS cache for suspicious domain names with enhanced heuristics."""
+    return get_executors().map_frame(_dns_cache_rows, df_dns)
+
+def _dns_cache_rows(df_dns):
     suspicious = []
     # Define common suspicious TLDs and keywords
     suspicious_tlds = {'cn', 'ru', 'tk', 'top', 'xyz', 'pw', 'info', 'buzz', 'zip', 'icu', 'click'}
@@ -805,48 +1022,40 @@ def analyze_dns_cache(df_dns):
         'prize', 'alert', 'warning', 'error', 'virus', 'trojan', 'ransomware', 
         'spyware', 'adware', 'botnet', 'exploit', 'hack', 'scam', 'fraud', 'fake']
 
-    for _, row in df_dns.iterrows():
-        name = str(row['Name']).lower()
-        data = row['Data']
-        reason = []
-
-        # Length Check
-        if len(name) > 50:
-            reason.append('Domain too long')
-        
-        # Keyword Check
-        if any(kw in name for kw in suspicious_keywords):
-            reason.append('Contains known malicious keyword')
-        
-        # TLD Check
-        domain_parts = name.split('.')
-        if len(domain_parts) > 1 and domain_parts[-1] in suspicious_tlds:
-            reason.append('Suspicious TLD')
-        
-        # Entropy Check
-        entropy = -sum((name.count(c) / len(name)) * math.log2(name.count(c) / len(name)) for c in set(name))
-        if entropy > 4.0:
-            reason.append('High entropy domain (potential DGA)')
-        
-        # Numeric Domain Check
-        if sum(c.isdigit() for c in name) > 10:
-            reason.append('Excessive numeric characters')
-        
-        # Punycode Check
-        if name.startswith('xn--'):
-            reason.append('Punycode domain (possible homograph attack)')
-        
-        # Unusual Character Check
-        if re.search(r'[^a-z0-9.-]', name):
-            reason.append('Contains unusual characters')
-        
-        # If any reason matched, add to suspicious list
-        if reason:
-            suspicious.append({
-                'Domain': name,
-                'Data': data,
-                'Reason': ', '.join(reason)
-            })
+    if df_dns.empty:
+        return suspicious
+
+    # Every check runs as a column operation over all names at once; object
+    # dtype keeps str.lower(), so 'İ' still becomes 'i̇' and is flagged below
+    names = _as_str(df_dns['Name']).str.lower()
+    tld = names.str.extract(r'\.([^.]*)$', expand=False)
+
+    digits = names.str.count(r'[0-9]')
+    # str.isdigit() also counts non-ASCII digits; only those names need the slow path
+    non_ascii = names.str.contains(r'[^\x00-\x7f]', regex=True)
+    if non_ascii.any():
+        digits[non_ascii] = names[non_ascii].map(lambda name: sum(c.isdigit() for c in name))
+
+    checks = [
+        (names.str.len() > 50, 'Domain too long'),
+        (keyword_matcher(suspicious_keywords).search_series(names), 'Contains known malicious keyword'),
+        (tld.isin(suspicious_tlds), 'Suspicious TLD'),
+        (pd.Series(shannon_entropy(names.to_numpy()) > 4.0, index=names.index), 'High entropy domain (potential DGA)'),
+        (digits > 10, 'Excessive numeric characters'),
+        (names.str.startswith('xn--'), 'Punycode domain (possible homograph attack)'),
+        (names.str.contains(r'[^a-z0-9.-]', regex=True), 'Contains unusual characters'),
+    ]
+    reasons = pd.Series('', index=names.index, dtype=object)
+    for mask, text in checks:
+        reasons = reasons.where(~mask.astype(bool), reasons + text + ', ')
+
+    flagged = reasons != ''
+    for name, data, reason in zip(names[flagged], df_dns['Data'][flagged], reasons[flagged]):
+        suspicious.append({
+            'Domain': name,
+            'Data': data,
+            'Reason': reason[:-2]
+        })
 
     return suspicious
 
@@ -855,6 +1064,9 @@ def analyze_dns_cache(df_dns):
 ##################################################################################33
 def analyze_environment_variables(df_env):
     """Check for suspicious environment variables with enhanced heuristics."""
+    return get_executors().map_frame(_environment_variable_rows, df_env)
+
+def _environment_variable_rows(df_env):
     suspicious = []
     standard_vars = {
         'PATH', 'WINDIR', 'SYSTEMROOT', 'COMSPEC', 'PATHEXT', 'TEMP', 'TMP', 
@@ -867,6 +1079,9 @@ def analyze_environment_variables(df_env):
     
     # Potentially dangerous extensions
     dangerous_extensions = ['.exe', '.bat', '.cmd', '.vbs', '.vbe', '.js', '.jse', '.wsf', '.wsh', '.msc', '.cpl', '.ps1', '.psm1', '.dll', '.scr', '.hta']
+
+    malicious_keywords = keyword_matcher(malicious_keywords)
+    dangerous_extensions = keyword_matcher(dangerous_extensions)
     
     for _, row in df_env.iterrows():
         name = str(row['Name']).upper().strip()
@@ -874,11 +1089,11 @@ def analyze_environment_variables(df_env):
         reasons = []
         
         # Non-standard variable pointing to executables
-        if name not in standard_vars and any(ext in value for ext in dangerous_extensions):
+        if name not in standard_vars and dangerous_extensions.search(value):
             reasons.append("Non-standard variable pointing to executable")
         
         # Malicious keyword detection
-        if any(keyword in value for keyword in malicious_keywords):
+        if malicious_keywords.search(value):
             reasons.append("Contains known malicious keyword")
         
         # Hidden directories check
@@ -922,6 +1137,10 @@ def analyze_open_shares(df_shares):
     
     # Known default and administrative shares
     default_shares = {'admin$', 'c$', 'd$', 'e$', 'ipc$', 'print$', 'sysvol', 'netlogon'}
+
+    risky_paths = pattern_matcher(risky_paths)
+    public_names = keyword_matcher(['public', 'everyone', 'guest'])
+    sensitive_descriptions = keyword_matcher(['remote', 'admin'])
     
     # Check each share for potential issues
     for _, row in df_shares.iterrows():
@@ -936,11 +1155,11 @@ def analyze_open_shares(df_shares):
             reasons.append("Default or administrative share")
         
         # Check for risky paths
-        if any(re.match(pattern, path) for pattern in risky_paths):
+        if risky_paths.match(path):
             reasons.append("Exposes potentially sensitive directory")
         
         # Check for public or temporary shares
-        if 'public' in name or 'everyone' in name or 'guest' in name:
+        if public_names.search(name):
             reasons.append("Potentially insecure share (public access)")
         
         # Check for anonymous access
@@ -948,7 +1167,7 @@ def analyze_open_shares(df_shares):
             reasons.append("Anonymous access (potential security risk)")
         
         # Check for potentially dangerous descriptions
-        if 'remote' in description or 'admin' in description:
+        if sensitive_descriptions.search(description):
             reasons.append("Exposes potentially sensitive service")
         
         # Add to suspicious if any reason matched
@@ -970,31 +1189,32 @@ def analyze_smb_sessions(df_sessions):
     """Check SMB sessions for unusual clients, users, and connection patterns."""
     suspicious = []
     
-    # Define private IP ranges for local networks
-    private_ip_ranges = [
-        r'^192\.168\.', r'^10\.', r'^172\.(1[6-9]|2[0-9]|3[0-1])\.', r'^127\.0\.0\.1'
-    ]
-    
     # Define common guest and suspicious usernames
     suspicious_usernames = ['guest', 'anonymous', 'admin', 'administrator', 'root', 'support', 'test', 'backup']
     malicious_patterns = ['test', 'backup', 'scanner', 'bot', 'spider', 'crawler', 'attack', 'exploit', 'pwn', 'hacker']
+
+    suspicious_usernames = keyword_matcher(suspicious_usernames)
+    malicious_patterns = keyword_matcher(malicious_patterns)
     
+    # Internal clients (private, loopback, link-local), classified for the whole column
+    internal = classify_ips(df_sessions['ClientComputerName'].astype(object).fillna('nan').astype(str).str.strip())['internal']
+
     # Process each session
-    for _, row in df_sessions.iterrows():
+    for i, row in df_sessions.iterrows():
         client_ip = str(row['ClientComputerName']).strip()
         user = str(row['ClientUserName']).lower().strip()
         reason = []
         
         # Check for external IP addresses
-        if not any(re.match(pattern, client_ip) for pattern in private_ip_ranges):
+        if not internal[i]:
             reason.append("External IP address")
         
         # Check for guest or suspicious usernames
-        if any(keyword in user for keyword in suspicious_usernames):
+        if suspicious_usernames.search(user):
             reason.append("Guest or suspicious username")
         
         # Check for known malicious patterns in usernames
-        if any(keyword in user for keyword in malicious_patterns):
+        if malicious_patterns.search(user):
             reason.append("Known malicious username pattern")
         
         # Check for unusually long or random-looking usernames (possible automated attack)
@@ -1012,28 +1232,54 @@ def analyze_smb_sessions(df_sessions):
     return suspicious
 #####################################################3333
 #################################################################################
-def analyze_loaded_dlls(df_dlls):
-    """Check for DLLs loaded from unusual locations."""
+def analyze_loaded_dlls(df_dlls, inspect_pe=True):
+    """
+    Check for DLLs loaded from unusual locations (and, if inspect_pe, with suspicious PE headers).
+
+    ``df_dlls`` is a frame or an iterable of chunks (see EvidenceSet.iter_chunks).
+    """
     suspicious = []
-    standard_paths = ['c:/windows/system32', 'c:/program files','c:/program files \(x86\)']
+    standard_paths = keyword_matcher(['c:/windows/system32', 'c:/program files','c:/program files \(x86\)'])
+    for chunk in iter_frames(df_dlls):
+        suspicious += _loaded_dll_rows(chunk, standard_paths, inspect_pe)
+    return suspicious
+
+def _loaded_dll_rows(df_dlls, standard_paths, inspect_pe):
+    suspicious = []
+    pe_findings = {}
+    if inspect_pe and not df_dlls.empty:
+        rules = get_rules()
+        dll_paths = set(df_dlls['DLLPath'].dropna().astype(str))
+        for dll_path, metadata in get_pe_inspector().inspect_many(dll_paths).items():
+            findings = pe_reasons(metadata, rules)
+            if findings:
+                pe_findings[dll_path] = findings
     for _, row in df_dlls.iterrows():
         path = str(row['DLLPath']).lower().replace('\\', '/')
-        if not any(p in path for p in standard_paths):
+        reasons = [] if standard_paths.search(path) else ['Loaded from non-standard path']
+        reasons += pe_findings.get(str(row['DLLPath']), [])
+        if reasons:
             suspicious.append({
                 'ProcessName': row['ProcessName'],
                 'DLLName': row['DLLName'],
                 'DLLPath': path,
-                'Reason': 'Loaded from non-standard path'
+                'Reason': ', '.join(reasons)
             })
     return suspicious
 ###############################################################################
+def _format_bytes(size):
+    """Byte count as in the reports: 1073741824 -> '1GB', 104857600 -> '100MB'."""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if abs(size) < 1024 or unit == 'TB':
+            return f"{round(size, 1):g}{unit}"
+        size /= 1024
+
 def analyze_disk_info(df_disk):
     """Check for unusual disk configurations and potential issues."""
     suspicious = []
     
-    # Define thresholds for unusually small or large disks (adjust as needed)
-    small_disk_threshold = 1024 * 1024 * 1024  # 1 GB
-    large_disk_threshold = 10 * 1024 * 1024 * 1024 * 1024  # 10 TB
+    # Thresholds and keywords come from rules.json (disk section)
+    rules = get_rules()
     
     for _, row in df_disk.iterrows():
         style = str(row['PartitionStyle']).strip().upper()
@@ -1046,13 +1292,13 @@ def analyze_disk_info(df_disk):
             reasons.append("RAW partition style (unformatted)")
         
         # Check for unusually small or large disks
-        if size < small_disk_threshold:
-            reasons.append("Unusually small disk size (< 1GB)")
-        elif size > large_disk_threshold:
-            reasons.append("Unusually large disk size (> 10TB)")
+        if size < rules.disk_small_bytes:
+            reasons.append(f"Unusually small disk size (< {_format_bytes(rules.disk_small_bytes)})")
+        elif size > rules.disk_large_bytes:
+            reasons.append(f"Unusually large disk size (> {_format_bytes(rules.disk_large_bytes)})")
         
         # Check for removable or suspicious disk names
-        if any(keyword in name.lower() for keyword in ['usb', 'jmicron', 'sd', 'external', 'backup', 'virtual', 'vhd']):
+        if rules.removable_disk_names.search(name.lower()):
             reasons.append("Potentially removable or external drive")
         
         # Add to suspicious if any reason matched
@@ -1071,13 +1317,8 @@ def analyze_volume_info(df_volume):
     """Check for volumes without drive letters or unusual configurations."""
     suspicious = []
     
-    # Define thresholds for unusually small or large volumes (adjust as needed)
-    small_volume_threshold = 100 * 1024 * 1024  # 100 MB
-    large_volume_threshold = 10 * 1024 * 1024 * 1024 * 1024  # 10 TB
-    low_free_space_ratio = 0.1  # Less than 10% free space
-    
-    # Common temporary or suspicious volume labels
-    suspicious_labels = ['recovery', 'system', 'temp', 'backup', 'cache', 'reserved', 'unknown', 'new volume', 'windows']
+    # Thresholds and labels come from rules.json (volume section)
+    rules = get_rules()
     
     for _, row in df_volume.iterrows():
         drive = str(row['DriveLetter']).strip() if pd.notna(row['DriveLetter']) else ''
@@ -1092,18 +1333,18 @@ def analyze_volume_info(df_volume):
             reasons.append("No drive letter assigned")
         
         # Check for suspicious or temporary volume labels
-        if any(keyword in label for keyword in suspicious_labels):
+        if rules.suspicious_volume_labels.search(label):
             reasons.append("Suspicious or temporary volume label")
         
         # Check for unusually small or large volumes
-        if size < small_volume_threshold:
-            reasons.append("Unusually small volume size (< 100MB)")
-        elif size > large_volume_threshold:
-            reasons.append("Unusually large volume size (> 10TB)")
+        if size < rules.volume_small_bytes:
+            reasons.append(f"Unusually small volume size (< {_format_bytes(rules.volume_small_bytes)})")
+        elif size > rules.volume_large_bytes:
+            reasons.append(f"Unusually large volume size (> {_format_bytes(rules.volume_large_bytes)})")
         
         # Check for low free space
-        if size > 0 and (size_remaining / size) < low_free_space_ratio:
-            reasons.append("Low free space (< 10%)")
+        if size > 0 and (size_remaining / size) < rules.volume_low_free_ratio:
+            reasons.append(f"Low free space (< {rules.volume_low_free_ratio * 100:g}%)")
         
         # Add to suspicious if any reason matched
         if reasons:
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import json
 import pandas as pd
@@ -7,58 +7,21 @@ import subprocess
 import os
 import logging
 from AnalyzeData import (
-    check_processes,
-    check_unusual_processes,
-    check_unauthorized_software,
-    check_firewall_modifications,
-    analyze_event_ids_from_file,
-    analyze_application_logs,
-    analyze_system_logs,
-    analyze_scheduled_tasks,
-    analyze_recent_file_changes,
-    csv_to_json,
-    process_connection,
-    check_suspicious_startup_entries,
-    systemInfo,
-    hardwareInfo,
-    runningProcesses,
-    installedSoftware,
-    userAccounts,
-    USB,
-    merged,
     API_KEYS,
     Gemini_Key,
-    firewallModificationEvents,
-    powershellLogs,
-    startupEntries,
-    recentFileChanges,
-    applicationLogs,
-    systemLogs,
-    scheduledTasks,
-    arp_table,
-    dns_cache,
-    env_vars,
-    open_shares,
-    loaded_dlls,
-    disk_info,
-    volume_info,
-    smb,
-    analyze_arp_table,
-    analyze_dns_cache,
-    analyze_environment_variables,
-    analyze_open_shares,
-    analyze_loaded_dlls,
-    analyze_disk_info,
-    analyze_volume_info,
-    analyze_smb_sessions
+    INPUT_DIR,
+    configure_logging,
+    open_evidence,
 )
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from analysisdag import get_analysis_scheduler, DICT, JSON
+from eventpipeline import parse_report
 
 class CybersecurityAnalyzerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("ForensieghtCybersecurity Analyzer")
         self.root.geometry("1600x1000")
+        self.evidence = open_evidence(INPUT_DIR)
 
         # Notebook for tabs
         self.notebook = ttk.Notebook(self.root)
@@ -68,6 +31,10 @@ class CybersecurityAnalyzerApp:
         # Add PowerShell button
         self.run_ps_button = ttk.Button(self.root, text="Run PowerShell as Admin", command=self.run_powershell_as_admin)
         self.run_ps_button.pack(pady=10)
+
+        # Evidence directory selection
+        self.evidence_dir_var = tk.StringVar(value=self.evidence.input_dir)
+        self.add_evidence_input()
         
         # Add input fields for business hours
         self.opening_hour_var = tk.IntVar(value=1)
@@ -84,7 +51,7 @@ class CybersecurityAnalyzerApp:
             "Suspicious Processes", "Unusual Processes", "Unauthorized Software",
             "USB Devices", "Suspicious Files", "Startup Entries",
             "Firewall Modifications", "Recent File Changes", 
-            "Security Logs", "Application Logs", "System Logs", "Scheduled Tasks",
+            "Security Logs", "Logon Correlation", "Application Logs", "System Logs", "Scheduled Tasks",
             "ARP Table", "DNS Cache", "Environment Variables", "Open Shares", "Loaded DLLs",
             "Disk Info", "Volume Info", "SMB Sessions"
         ]
@@ -117,6 +84,25 @@ class CybersecurityAnalyzerApp:
         ttk.Label(frame, text="Closing Hour:").grid(row=0, column=2, padx=5)
         ttk.Entry(frame, textvariable=self.closing_hour_var, width=5).grid(row=0, column=3, padx=5)
         
+    def add_evidence_input(self):
+        frame = ttk.Frame(self.root)
+        frame.pack(pady=5)
+        ttk.Label(frame, text="Evidence Folder:").grid(row=0, column=0, padx=5)
+        ttk.Entry(frame, textvariable=self.evidence_dir_var, width=60).grid(row=0, column=1, padx=5)
+        ttk.Button(frame, text="Browse", command=self.select_evidence_dir).grid(row=0, column=2, padx=5)
+
+    def select_evidence_dir(self):
+        directory = filedialog.askdirectory(initialdir=self.evidence_dir_var.get())
+        if directory:
+            self.evidence_dir_var.set(directory)
+
+    def current_evidence(self):
+        # Reopen only when the folder changed so cached artifacts survive re-runs
+        directory = self.evidence_dir_var.get().strip()
+        if directory and directory != self.evidence.input_dir:
+            self.evidence = open_evidence(directory)
+        return self.evidence
+
     def run_powershell_as_admin(self):
         try:
             script_path = os.path.abspath("CollectData.ps1")
@@ -133,83 +119,45 @@ class CybersecurityAnalyzerApp:
 
 
     def analyze_all(self,opening_hour, closing_hour):
+        # Independent analyzers run concurrently; each tab is filled as soon as
+        # its analyzer finishes. Widgets are only touched from the Tk thread.
         try:
-            
-            # System and Hardware Info as tables
-            self.display_dict_as_table("System Info", systemInfo.iloc[0].to_dict() if not systemInfo.empty else {})
-            self.display_dict_as_table("Hardware Info", hardwareInfo.iloc[0].to_dict() if not hardwareInfo.empty else {})
-            
-            # Network Connections as threaded analysis
-            connections_list = merged.to_dict(orient='records')
-            networkresults = []
-            with ThreadPoolExecutor(max_workers=len(API_KEYS)) as executor:
-                futures = {
-                    executor.submit(process_connection, conn, API_KEYS[i % len(API_KEYS)]): conn
-                    for i, conn in enumerate(connections_list)
-                }
-                for future in as_completed(futures):
-                    try:
-                        result = future.result()
-                        if result:
-                            networkresults.append(result)
-                    except Exception as e:
-                        logging.warning(f"Connection analysis error: {e}")
-            self.display_list_of_dicts_as_table("Network Connections", networkresults)
-            self.display_list_of_dicts_as_table("Suspicious Processes", check_processes(runningProcesses))
-            self.display_list_of_dicts_as_table("Unusual Processes", check_unusual_processes(runningProcesses))
-            self.display_list_of_dicts_as_table("Unauthorized Software", check_unauthorized_software(installedSoftware, userAccounts, opening_hour, closing_hour))
-            self.display_list_of_dicts_as_table("USB Devices", [USB.iloc[i].to_dict() for i in range(len(USB))])
-            self.display_list_of_dicts_as_table("Suspicious Files", csv_to_json().get('files', []))
-            self.display_list_of_dicts_as_table("Startup Entries", check_suspicious_startup_entries(startupEntries, Gemini_Key, max_workers=10))
-            self.display_list_of_dicts_as_table("Recent File Changes", analyze_recent_file_changes(recentFileChanges))
-            self.display_list_of_dicts_as_table("Firewall Modifications", check_firewall_modifications(firewallModificationEvents, Gemini_Key, max_workers=10)) 
-            self.display_list_of_dicts_as_table("ARP Table", analyze_arp_table(arp_table))
-            self.display_list_of_dicts_as_table("DNS Cache", analyze_dns_cache(dns_cache))
-            self.display_list_of_dicts_as_table("Environment Variables", analyze_environment_variables(env_vars))
-            self.display_list_of_dicts_as_table("Open Shares", analyze_open_shares(open_shares))
-            self.display_list_of_dicts_as_table("Loaded DLLs", analyze_loaded_dlls(loaded_dlls))
-            self.display_list_of_dicts_as_table("Disk Info", analyze_disk_info(disk_info))
-            self.display_list_of_dicts_as_table("Volume Info", analyze_volume_info(volume_info))
-            self.display_list_of_dicts_as_table("SMB Sessions", analyze_smb_sessions(smb))
-            self.display_security_logs()
-            self.display_application_logs()
-            self.display_system_logs()
-            self.display_list_of_dicts_as_table("Scheduled Tasks", analyze_scheduled_tasks(scheduledTasks))
-            messagebox.showinfo("Analysis", "Analysis completed successfully.")
+            evidence = self.current_evidence()
+            _, errors = get_analysis_scheduler().run(
+                evidence,
+                params={'api_keys': API_KEYS, 'gemini_keys': Gemini_Key,
+                        'opening_hour': opening_hour, 'closing_hour': closing_hour},
+                on_result=lambda analyzer, result, _: self.root.after(0, self.show_result, analyzer, result),
+                on_error=lambda analyzer, error: self.root.after(0, self.show_error, analyzer, error))
+            if errors:
+                summary = f"Analysis completed with {len(errors)} failed analyzer(s): {', '.join(errors)}"
+                self.root.after(0, messagebox.showwarning, "Analysis", summary)
+            else:
+                self.root.after(0, messagebox.showinfo, "Analysis", "Analysis completed successfully.")
         except Exception as e:
             logging.error(f"Error during analysis: {e}")
-            messagebox.showerror("Error", f"Error during analysis: {e}")
+            self.root.after(0, messagebox.showerror, "Error", f"Error during analysis: {e}")
 
-    def display_security_logs(self):
-        try:
-            security_logs = analyze_event_ids_from_file(Gemini_Key)
-            self.display_json_as_text("Security Logs", security_logs)
-        except Exception as e:
-            logging.error(f"Error processing security logs: {e}")
-            messagebox.showerror("Error", f"Error processing security logs: {e}")
+    def show_result(self, analyzer, result):
+        if analyzer.display == DICT:
+            self.display_dict_as_table(analyzer.name, result)
+        elif analyzer.display == JSON:
+            self.display_json_as_text(analyzer.name, result)
+        else:
+            self.display_list_of_dicts_as_table(analyzer.name, result)
 
-    def display_application_logs(self):
-        try:
-            app_logs = analyze_application_logs(Gemini_Key)
-            self.display_json_as_text("Application Logs", app_logs)
-        except Exception as e:
-            logging.error(f"Error processing application logs: {e}")
-            messagebox.showerror("Error", f"Error processing application logs: {e}")
-
-    def display_system_logs(self):
-        try:
-            sys_logs = analyze_system_logs(Gemini_Key)
-            self.display_json_as_text("System Logs", sys_logs)
-        except Exception as e:
-            logging.error(f"Error processing system logs: {e}")
-            messagebox.showerror("Error", f"Error processing system logs: {e}")
+    def show_error(self, analyzer, error):
+        self.display_dict_as_table(analyzer.name, {"Error": str(error)})
 
     def display_json_as_text(self, tab_name, data_list):
         text_widget = self.text_widgets.get(tab_name)
         if text_widget:
             text_widget.delete(1.0, tk.END)
-            formatted_json = json.dumps(data_list[8:], indent=4)
-            text_widget.insert(tk.END, f"\n{formatted_json}\n")
+            # Model answers arrive as text, often code-fenced JSON; errors as a list of dicts
+            report = parse_report(data_list)
+            if not isinstance(report, str):
+                report = json.dumps(report, indent=4, default=str)
+            text_widget.insert(tk.END, f"\n{report}\n")
     
 
     def display_dict_as_table(self, tab_name, data_dict):
@@ -338,6 +286,7 @@ class CybersecurityAnalyzerApp:
         table.heading(col, command=lambda: self.sort_table(table, col, sorted_list, not reverse))
 
 if __name__ == "__main__":
+    configure_logging()
     root = tk.Tk()
     app = CybersecurityAnalyzerApp(root)
     root.mainloop()
@@ -1,65 +1,28 @@
-import requests
+from httppool import run_sync
+from intelclient import get_intel_client
+
+# Thin synchronous wrappers over intelclient.IntelClient; the three sources
+# are queried concurrently over pooled keep-alive connections.
 
 def check_abuseipdb(ip):
-    url = f"https://api.abuseipdb.com/api/v2/check?ipAddress={ip}"
-    api_key = "API of abuseipdb"
-    headers = {"Key": api_key, "Accept": "application/json"}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        data = response.json()
-        score = data["data"]["abuseConfidenceScore"]
-        if score > 50:
-            return "malicious"
-        else:
-            return "safe"
-    except:
-        return "unknown"
+    return run_sync(get_intel_client().check_abuseipdb(ip))
 
 def check_virustotal(ip, api_key):
-    url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
-    headers = {"x-apikey": api_key}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        data = response.json()
-        positives = data["data"]["attributes"]["last_analysis_stats"]["malicious"]
-        if positives > 0:
-            return "malicious"
-        else:
-            return "safe"
-    except:
-        return "unknown"
+    return run_sync(get_intel_client().check_virustotal_ip(ip, api_key))
     
 def check_alienvault(ip):
-    url = f"https://otx.alienvault.com/api/v1/indicators/IPv4/{ip}/general"
-    try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        pulses = len(data.get("pulse_info", {}).get("pulses", []))
-        if pulses > 0:
-            return "malicious"
-        else:
-            return "safe"
-    except:
-        return "unknown"
+    return run_sync(get_intel_client().check_alienvault(ip))
     
 def check_ip_reputation(ip, api_key):
     """Return 'malicious', 'safe', or 'unknown' based on multiple sources."""
-    results = [
-        check_abuseipdb(ip),
-        check_virustotal(ip, api_key),
-        check_alienvault(ip)
-    ]
-    malicious_count = results.count("malicious")
-    safe_count = results.count("safe")
-    if malicious_count >= 2:
+    verdict = run_sync(get_intel_client().check_ip_reputation(ip, api_key))
+    if verdict == "malicious":
         print(ip,':malcious')
-        return "malicious"
-    elif safe_count >= 2:
+    elif verdict == "safe":
         print(ip,':safe')
-        return "safe"
     else:
         print(ip,':unknown')
-        return "unknown"
+    return verdict
     
     
     
@@ -0,0 +1,336 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from evidenceset import ARTIFACTS
+from AnalyzeData import (
+    check_processes,
+    check_unusual_processes,
+    check_unauthorized_software,
+    check_firewall_modifications,
+    analyze_event_ids_from_file,
+    analyze_logon_correlation,
+    analyze_application_logs,
+    analyze_system_logs,
+    analyze_scheduled_tasks,
+    analyze_recent_file_changes,
+    iter_suspicious_files,
+    analyze_connections,
+    check_suspicious_startup_entries,
+    analyze_arp_table,
+    analyze_dns_cache,
+    analyze_environment_variables,
+    analyze_open_shares,
+    analyze_loaded_dlls,
+    analyze_disk_info,
+    analyze_volume_info,
+    analyze_smb_sessions,
+    API_KEYS,
+    Gemini_Key,
+)
+
+# How a result is shown: one record as key/value lines, a list of records
+# as a table, or free-form JSON text
+DICT, TABLE, JSON = "dict", "table", "json"
+# What a result is: suspicious items, host inventory, or an LLM-written report
+FINDINGS, INFO, REPORT = "findings", "info", "report"
+
+# Derived artifacts and the artifacts they are built from
+ARTIFACT_DEPENDENCIES = {
+    'merged': ('runningProcesses', 'networkConnections'),
+}
+
+# Items handed to on_items at a time by streaming analyzers
+STREAM_BATCH = 1000
+
+# Analyzers mostly wait on network calls or hand CPU work to the executors
+# pool, so one thread each lets every independent analyzer run at once
+MAX_ANALYZER_THREADS = 32
+
+DEFAULT_PARAMS = {
+    'api_keys': API_KEYS,
+    'gemini_keys': Gemini_Key,
+    'opening_hour': 1,
+    'closing_hour': 24,
+    # "summary" or "mapreduce" (see eventmapreduce); None uses FORENSIEGHT_LOG_ANALYSIS
+    'log_analysis': None,
+}
+
+
+class Analyzer:
+    """
+    One analysis step.
+
+    ``func(evidence, params, upstream)`` returns the result; ``inputs`` are
+    the evidence artifacts it reads (loaded before it starts) and ``after``
+    the analyzers whose results it needs, passed in ``upstream`` by name.
+    ``kind`` says whether the result lists findings, inventory or a report.
+    A ``stream`` analyzer returns an iterator of items rather than a list
+    (see AnalysisScheduler.run).
+    """
+
+    def __init__(self, name, func, inputs=(), after=(), display=TABLE, kind=FINDINGS, stream=False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.after = tuple(after)
+        self.display = display
+        self.kind = kind
+        self.stream = stream
+
+    def __repr__(self):
+        return f"Analyzer({self.name!r})"
+
+
+class AnalysisError(Exception):
+    pass
+
+
+def _first_row(df):
+    return df.iloc[0].to_dict() if not df.empty else {}
+
+
+def default_analyzers():
+    """Every analyzer behind the GUI tabs, in tab order."""
+    return [
+        Analyzer("System Info", lambda ev, p, _: _first_row(ev.systemInfo), ['systemInfo'],
+                 display=DICT, kind=INFO),
+        Analyzer("Hardware Info", lambda ev, p, _: _first_row(ev.hardwareInfo), ['hardwareInfo'],
+                 display=DICT, kind=INFO),
+        Analyzer("Network Connections", lambda ev, p, _: analyze_connections(ev.merged, p['api_keys']), ['merged']),
+        Analyzer("Suspicious Processes", lambda ev, p, _: check_processes(ev.runningProcesses, p['api_keys']),
+                 ['runningProcesses']),
+        Analyzer("Unusual Processes", lambda ev, p, _: check_unusual_processes(ev.runningProcesses),
+                 ['runningProcesses']),
+        Analyzer("Unauthorized Software", lambda ev, p, _: check_unauthorized_software(
+            ev.installedSoftware, ev.userAccounts, p['opening_hour'], p['closing_hour'], evidence=ev),
+                 ['installedSoftware', 'userAccounts', 'admin_users_df']),
+        Analyzer("USB Devices", lambda ev, p, _: [ev.USB.iloc[i].to_dict() for i in range(len(ev.USB))], ['USB'],
+                 kind=INFO),
+        # Suspicious Files, Recent File Changes and Loaded DLLs declare no inputs:
+        # they stream their artifact with EvidenceSet.iter_chunks instead of loading it
+        Analyzer("Suspicious Files", lambda ev, p, _: iter_suspicious_files(ev), stream=True),
+        Analyzer("Startup Entries", lambda ev, p, _: check_suspicious_startup_entries(
+            ev.startupEntries, p['gemini_keys']), ['startupEntries']),
+        Analyzer("Recent File Changes", lambda ev, p, _: analyze_recent_file_changes(
+            ev.iter_chunks('recentFileChanges', columns=['FullName', 'LastWriteTime', 'Owner']))),
+        Analyzer("Firewall Modifications", lambda ev, p, _: check_firewall_modifications(
+            ev.firewallModificationEvents, p['gemini_keys'], evidence=ev), ['firewallModificationEvents']),
+        Analyzer("ARP Table", lambda ev, p, _: analyze_arp_table(ev.arp_table), ['arp_table']),
+        Analyzer("DNS Cache", lambda ev, p, _: analyze_dns_cache(ev.dns_cache), ['dns_cache']),
+        Analyzer("Environment Variables", lambda ev, p, _: analyze_environment_variables(ev.env_vars), ['env_vars']),
+        Analyzer("Open Shares", lambda ev, p, _: analyze_open_shares(ev.open_shares), ['open_shares']),
+        Analyzer("Loaded DLLs", lambda ev, p, _: analyze_loaded_dlls(ev.iter_chunks('loaded_dlls'))),
+        Analyzer("Disk Info", lambda ev, p, _: analyze_disk_info(ev.disk_info), ['disk_info']),
+        Analyzer("Volume Info", lambda ev, p, _: analyze_volume_info(ev.volume_info), ['volume_info']),
+        Analyzer("SMB Sessions", lambda ev, p, _: analyze_smb_sessions(ev.smb), ['smb']),
+        Analyzer("Logon Correlation", lambda ev, p, _: analyze_logon_correlation(ev.securityLogs, ev.admin_users_df),
+                 ['securityLogs', 'admin_users_df']),
+        # The model sees the correlation detections alongside the event summary
+        Analyzer("Security Logs", lambda ev, p, up: analyze_event_ids_from_file(
+            p['gemini_keys'], evidence=ev, detections=up["Logon Correlation"], mode=p['log_analysis']),
+                 ['securityLogs'], after=['Logon Correlation'], display=JSON, kind=REPORT),
+        Analyzer("Application Logs", lambda ev, p, _: analyze_application_logs(
+            p['gemini_keys'], evidence=ev, mode=p['log_analysis']),
+                 ['applicationLogs'], display=JSON, kind=REPORT),
+        Analyzer("System Logs", lambda ev, p, _: analyze_system_logs(
+            p['gemini_keys'], evidence=ev, mode=p['log_analysis']),
+                 ['systemLogs'], display=JSON, kind=REPORT),
+        Analyzer("Scheduled Tasks", lambda ev, p, _: analyze_scheduled_tasks(ev.scheduledTasks), ['scheduledTasks']),
+    ]
+
+
+class AnalysisScheduler:
+    """
+    Runs analyzers as a dependency graph.
+
+    Artifact loads and analyzers are the graph's nodes: every artifact is
+    read once, however many analyzers need it, and each analyzer starts as
+    soon as its inputs and upstream analyzers are done. Independent nodes run
+    concurrently, so wall time follows the slowest chain rather than the sum
+    of all analyzers. Results are reported through callbacks as each one
+    finishes; a failing analyzer is reported and skips only its dependents.
+    """
+
+    def __init__(self, analyzers=None, max_workers=MAX_ANALYZER_THREADS):
+        self.analyzers = {a.name: a for a in (analyzers if analyzers is not None else default_analyzers())}
+        self.max_workers = max_workers
+        for analyzer in self.analyzers.values():
+            for name in analyzer.after:
+                if name not in self.analyzers:
+                    raise AnalysisError(f"{analyzer.name}: unknown upstream analyzer {name!r}")
+                if self.analyzers[name].stream:
+                    raise AnalysisError(f"{analyzer.name}: cannot depend on streaming analyzer {name!r}")
+            for name in analyzer.inputs:
+                if name not in ARTIFACTS and name not in ARTIFACT_DEPENDENCIES:
+                    raise AnalysisError(f"{analyzer.name}: unknown artifact {name!r}")
+        self.order(self.analyzers)
+
+    def select(self, names=None):
+        """The named analyzers plus everything upstream of them, in declaration order."""
+        if names is None:
+            return list(self.analyzers.values())
+        unknown = [name for name in names if name not in self.analyzers]
+        if unknown:
+            raise AnalysisError(f"Unknown analyzer(s): {', '.join(unknown)}")
+        wanted, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(self.analyzers[name].after)
+        return [a for a in self.analyzers.values() if a.name in wanted]
+
+    def order(self, analyzers):
+        """Topological order of ``analyzers`` (names or Analyzer objects); raises on cycles."""
+        names = [a if isinstance(a, str) else a.name for a in analyzers]
+        state, ordered = {}, []
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise AnalysisError(f"Analyzer dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for upstream in self.analyzers[name].after:
+                visit(upstream, path + [name])
+            state[name] = "done"
+            ordered.append(name)
+
+        for name in names:
+            visit(name, [])
+        return ordered
+
+    def _graph(self, analyzers):
+        """{node: set of nodes it waits for}; nodes are ('artifact', name) or ('analyzer', name)."""
+        graph = {}
+
+        def add_artifact(name):
+            node = ('artifact', name)
+            if node not in graph:
+                graph[node] = {('artifact', dep) for dep in ARTIFACT_DEPENDENCIES.get(name, ())}
+                for dep in ARTIFACT_DEPENDENCIES.get(name, ()):
+                    add_artifact(dep)
+
+        for analyzer in analyzers:
+            for name in analyzer.inputs:
+                add_artifact(name)
+            graph[('analyzer', analyzer.name)] = {('artifact', name) for name in analyzer.inputs} | \
+                {('analyzer', name) for name in analyzer.after}
+        return graph
+
+    def run(self, evidence, params=None, names=None, on_result=None, on_error=None, on_items=None):
+        """
+        Run the selected analyzers (all by default) against ``evidence``.
+
+        ``on_result(analyzer, result, seconds)`` and ``on_error(analyzer,
+        exception)`` are called from the thread calling run() as each
+        analyzer finishes. Returns ({name: result}, {name: exception}).
+
+        Streaming analyzers' items are collected into a list, unless
+        ``on_items(analyzer, items)`` is given: it is then called from the
+        analyzer's thread with up to STREAM_BATCH items at a time, so the
+        items are never all in memory, and the result is their count.
+        """
+        params = dict(DEFAULT_PARAMS, **(params or {}))
+        analyzers = self.select(names)
+        graph = self._graph(analyzers)
+        waiting = {node: set(deps) for node, deps in graph.items()}
+        dependents = {}
+        for node, deps in graph.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(node)
+
+        results, errors, started = {}, {}, {}
+        done_nodes = set()
+        run_start = time.monotonic()
+
+        def execute(node):
+            kind, name = node
+            if kind == 'artifact':
+                return evidence.load(name)
+            analyzer = self.analyzers[name]
+            upstream = {dep: results[dep] for dep in analyzer.after}
+            result = analyzer.func(evidence, params, upstream)
+            if not analyzer.stream:
+                return result
+            if on_items is None:
+                return list(result)
+            count, batch = 0, []
+            for item in result:
+                batch.append(item)
+                if len(batch) == STREAM_BATCH:
+                    on_items(analyzer, batch)
+                    count, batch = count + len(batch), []
+            if batch:
+                on_items(analyzer, batch)
+            return count + len(batch)
+
+        def fail(node, error):
+            """Record a failure and fail everything downstream of it."""
+            stack = [(node, error)]
+            while stack:
+                node, error = stack.pop()
+                if node in done_nodes:
+                    continue
+                done_nodes.add(node)
+                waiting.pop(node, None)
+                kind, name = node
+                if kind == 'analyzer':
+                    errors[name] = error
+                    logging.error(f"Analyzer {name} failed: {error}")
+                    if on_error:
+                        on_error(self.analyzers[name], error)
+                else:
+                    logging.error(f"Could not load {name}: {error}")
+                for dependent in dependents.get(node, ()):
+                    stack.append((dependent, AnalysisError(f"{name} failed: {error}")))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analyzer") as executor:
+            running = {}
+
+            def submit_ready():
+                for node in [n for n, deps in waiting.items() if not deps and n not in started]:
+                    started[node] = time.monotonic()
+                    running[executor.submit(execute, node)] = node
+
+            submit_ready()
+            while running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    kind, name = node
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        fail(node, e)
+                        continue
+                    done_nodes.add(node)
+                    waiting.pop(node, None)
+                    for dependent in dependents.get(node, ()):
+                        if dependent in waiting:
+                            waiting[dependent].discard(node)
+                    if kind == 'analyzer':
+                        results[name] = result
+                        elapsed = time.monotonic() - started[node]
+                        logging.info(f"Analyzer {name} finished in {elapsed:.2f}s")
+                        if on_result:
+                            on_result(self.analyzers[name], result, elapsed)
+                submit_ready()
+
+        logging.info(f"Analysis finished in {time.monotonic() - run_start:.2f}s "
+                     f"({len(results)} analyzers, {len(errors)} failed)")
+        return results, errors
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_analysis_scheduler():
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = AnalysisScheduler()
+    return _default_scheduler
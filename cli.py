@@ -0,0 +1,251 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Exit codes
+EXIT_CLEAN = 0
+EXIT_FINDINGS = 1
+EXIT_USAGE = 2
+EXIT_ANALYZER_ERRORS = 3
+
+
+def slug(name):
+    """Command-line name of an analyzer: "Suspicious Processes" -> "suspicious-processes"."""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _jsonable(value):
+    """Plain JSON types for a finding; NaN becomes null and unknown objects their str()."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if value is pd.NaT:
+        return None
+    return str(value)
+
+
+def result_records(host, analyzer, result):
+    """One output record per finding (or one for an info/report result)."""
+    base = {'host': host, 'analyzer': analyzer.name, 'kind': analyzer.kind}
+    items = result if isinstance(result, list) else [result]
+    return [dict(base, data=_jsonable(item)) for item in items]
+
+
+def count_findings(analyzer, result):
+    return len(result) if analyzer.kind == "findings" and isinstance(result, list) else 0
+
+
+class JsonlWriter:
+    """Appends records to a JSONL stream as they arrive; safe to share between hosts."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = sys.stdout if path in (None, '-') else open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, records):
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter:
+    """Collects records and writes one Parquet file at the end; ``data`` is stored as JSON text."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self._records = []
+        self._lock = threading.Lock()
+
+    def write(self, records):
+        with self._lock:
+            self._records.extend(records)
+
+    def close(self):
+        rows = [dict(record, data=json.dumps(record.get('data'), ensure_ascii=False)) for record in self._records]
+        pd.DataFrame(rows, columns=['host', 'analyzer', 'kind', 'data', 'error']).to_parquet(self.path, index=False)
+
+
+def open_writer(path, fmt):
+    fmt = fmt or ('parquet' if path and path.lower().endswith('.parquet') else 'jsonl')
+    if fmt == 'parquet':
+        if not path or path == '-':
+            raise ValueError("Parquet output needs a file path (--out findings.parquet)")
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def resolve_analyzers(scheduler, spec):
+    """Analyzer names for a comma-separated list of names or slugs (None = all)."""
+    if not spec:
+        return None
+    by_slug = {slug(name): name for name in scheduler.analyzers}
+    names = []
+    for item in (part.strip() for part in spec.split(',')):
+        if not item:
+            continue
+        name = item if item in scheduler.analyzers else by_slug.get(slug(item))
+        if name is None:
+            raise ValueError(f"unknown analyzer {item!r} (see --list)")
+        names.append(name)
+    return names
+
+
+def analyze_host(scheduler, evidence_dir, names, params, writer, ingest=False):
+    """Run the analyzers on one evidence directory; returns (findings, errors, seconds)."""
+    from AnalyzeData import open_evidence
+    host = os.path.basename(os.path.normpath(evidence_dir)) or evidence_dir
+    evidence = open_evidence(evidence_dir, store=True if ingest else None)
+    findings = 0
+    start = time.monotonic()
+    if ingest:
+        evidence.ingest()
+
+    def on_result(analyzer, result, _):
+        nonlocal findings
+        if analyzer.stream:
+            # Already written batch by batch in on_items; result is the item count
+            findings += result if analyzer.kind == "findings" else 0
+            return
+        findings += count_findings(analyzer, result)
+        writer.write(result_records(host, analyzer, result))
+
+    def on_items(analyzer, items):
+        writer.write(result_records(host, analyzer, items))
+
+    def on_error(analyzer, error):
+        writer.write([{'host': host, 'analyzer': analyzer.name, 'kind': 'error', 'error': str(error)}])
+
+    _, errors = scheduler.run(evidence, params=params, names=names, on_result=on_result, on_error=on_error,
+                              on_items=on_items)
+    return findings, errors, time.monotonic() - start
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Analyze collected evidence without the GUI and write findings as JSONL or Parquet.",
+        epilog=f"Exit status: {EXIT_CLEAN} no findings, {EXIT_FINDINGS} findings, "
+               f"{EXIT_USAGE} bad arguments, {EXIT_ANALYZER_ERRORS} an analyzer failed.")
+    parser.add_argument("evidence", nargs="*", help="evidence directories written by CollectData.ps1")
+    parser.add_argument("--evidence-list", metavar="FILE",
+                        help="file with one evidence directory per line (added to the positional ones)")
+    parser.add_argument("--analyzers", metavar="LIST",
+                        help="comma-separated analyzers to run, e.g. suspicious-processes,dns-cache (default: all)")
+    parser.add_argument("--list", action="store_true", help="list the available analyzers and exit")
+    parser.add_argument("--out", metavar="PATH", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "parquet"),
+                        help="output format (default: from the --out extension, else jsonl)")
+    parser.add_argument("--ingest", action="store_true",
+                        help="copy every artifact into the columnar evidence store first and read it from there "
+                             "(needs pyarrow; the store is otherwise only used with FORENSIEGHT_EVIDENCE_STORE=on)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="evidence directories analyzed at once")
+    parser.add_argument("--api-key", action="append", dest="api_keys", metavar="KEY",
+                        help="threat-intel API key (repeatable)")
+    parser.add_argument("--gemini-key", action="append", dest="gemini_keys", metavar="KEY",
+                        help="Gemini API key (repeatable)")
+    parser.add_argument("--log-analysis", choices=("summary", "mapreduce"),
+                        help="how event logs go to Gemini: one aggregate summary, or the event stream in "
+                             "chunks merged afterwards (default: FORENSIEGHT_LOG_ANALYSIS or summary)")
+    parser.add_argument("--opening-hour", type=int, default=1)
+    parser.add_argument("--closing-hour", type=int, default=24)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Progress and warnings go to stderr only; batch hosts get no log files in the working directory
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    # Imported here so --help works without loading the analyzers
+    from analysisdag import get_analysis_scheduler
+    scheduler = get_analysis_scheduler()
+
+    if args.list:
+        for name, analyzer in scheduler.analyzers.items():
+            print(f"{slug(name):<26} {name} ({analyzer.kind})")
+        return EXIT_CLEAN
+
+    directories = list(args.evidence)
+    try:
+        if args.evidence_list:
+            with open(args.evidence_list, encoding="utf-8") as f:
+                directories += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if not directories:
+            raise ValueError("no evidence directories given")
+        missing = [d for d in directories if not os.path.isdir(d)]
+        if missing:
+            raise ValueError(f"not a directory: {', '.join(missing)}")
+        if args.jobs < 1:
+            raise ValueError("--jobs must be at least 1")
+        names = resolve_analyzers(scheduler, args.analyzers)
+        writer = open_writer(args.out, args.format)
+    except (OSError, ValueError) as e:
+        parser.print_usage(sys.stderr)
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    params = {
+        'opening_hour': args.opening_hour,
+        'closing_hour': args.closing_hour,
+    }
+    if args.api_keys:
+        params['api_keys'] = args.api_keys
+    if args.gemini_keys:
+        params['gemini_keys'] = args.gemini_keys
+    if args.log_analysis:
+        params['log_analysis'] = args.log_analysis
+
+    total_findings, failed = 0, 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(analyze_host, scheduler, d, names, params, writer, args.ingest): d for d in directories}
+            for future, directory in futures.items():
+                try:
+                    findings, errors, seconds = future.result()
+                except Exception as e:
+                    logging.error(f"{directory}: analysis failed: {e}")
+                    print(f"{directory}: failed: {e}", file=sys.stderr)
+                    failed += 1
+                    continue
+                total_findings += findings
+                failed += bool(errors)
+                status = f", failed: {', '.join(errors)}" if errors else ""
+                print(f"{directory}: {findings} findings in {seconds:.1f}s{status}", file=sys.stderr)
+    finally:
+        writer.close()
+
+    if failed:
+        return EXIT_ANALYZER_ERRORS
+    return EXIT_FINDINGS if total_findings else EXIT_CLEAN
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+import fnmatch
+from collections import deque, Counter, defaultdict
+import numpy as np
+import pandas as pd
+from ruleengine import get_rules
+from eventpipeline import EventIndex
+
+# Security log events the correlator reads
+LOGON_SUCCESS, LOGON_FAILURE, LOCKOUT, SPECIAL_PRIVILEGES, PROCESS_CREATED, SHARE_ACCESS, SHARE_OBJECT_ACCESS = \
+    4624, 4625, 4740, 4672, 4688, 5140, 5145
+CORRELATED_EVENT_IDS = frozenset({LOGON_SUCCESS, LOGON_FAILURE, LOCKOUT, SPECIAL_PRIVILEGES,
+                                  PROCESS_CREATED, SHARE_ACCESS, SHARE_OBJECT_ACCESS})
+CORRELATED_FIELDS = ('TargetUserName', 'SubjectUserName', 'IpAddress', 'LogonType', 'Message')
+# Source addresses that mean the logon came from this host
+LOCAL_ADDRESSES = frozenset({'', '-', '::1', '127.0.0.1', '0.0.0.0', '::'})
+SEVERITIES = ("Low", "Medium", "High", "Critical")
+# Service-account pattern results remembered before the memo is reset
+MAX_ACCOUNT_CACHE = 65536
+
+
+def _clean(values):
+    """Lower-cased, stripped strings; missing values and Windows' '-' become ''."""
+    values = values.astype(object).fillna('').astype(str).str.strip().str.lower()
+    return values.where(values != '-', '')
+
+
+def _share_names(messages):
+    """Share name from 5140/5145 message text ("Share Name: \\\\*\\ADMIN$" -> "ADMIN$")."""
+    names = messages.astype(object).fillna('').astype(str).str.extract(r'Share Name:\s*(\S+)', expand=False)
+    return names.fillna('').str.rsplit('\\', n=1).str[-1].str.upper()
+
+
+class _Incident:
+    __slots__ = ('detection', 'severity', 'user', 'ip', 'first', 'last', 'events', 'users', 'shares',
+                 'details')
+
+    def __init__(self, detection, severity, user, ip, first, last, events=1):
+        self.detection = detection
+        self.severity = severity
+        self.user = user
+        self.ip = ip
+        self.first = first
+        self.last = last
+        self.events = events
+        self.users = set()
+        self.shares = set()
+        self.details = []
+
+    def raise_to(self, severity):
+        if SEVERITIES.index(severity) > SEVERITIES.index(self.severity):
+            self.severity = severity
+
+    def as_dict(self):
+        details = list(self.details)
+        if self.users:
+            details.insert(0, f"{len(self.users)} accounts: {', '.join(sorted(self.users)[:10])}"
+                              + (" ..." if len(self.users) > 10 else ""))
+        if self.shares:
+            details.insert(0, f"shares {', '.join(sorted(self.shares))}")
+        return {
+            'Detection': self.detection,
+            'Severity': self.severity,
+            'User': self.user or '',
+            'Source IP': self.ip or '',
+            'First Seen': pd.Timestamp(self.first, unit='s').isoformat(),
+            'Last Seen': pd.Timestamp(self.last, unit='s').isoformat(),
+            'Events': self.events,
+            'Details': '; '.join(details),
+        }
+
+
+class LogonCorrelator:
+    """
+    Sliding-window correlation over Security log events.
+
+    feed() takes events in time order and keeps, per (user, source IP) and
+    per source IP, only the events inside the current window; state for
+    keys that have left every window is dropped as time advances, so the
+    whole log is one pass with memory bounded by the activity within a
+    window plus the detections raised. Detections:
+
+    * Brute force - failed logons (4625) for one user from one source,
+      raised to Critical when a successful logon (4624) follows; lockouts
+      (4740) are counted against it.
+    * Password spraying - failures against many distinct users from one source.
+    * New admin logon - special privileges (4672) assigned to an account that
+      is not a local administrator (or, without an administrator list, to
+      any account that just logged on remotely).
+    * Lateral movement (SMB) - a network logon followed by admin-share access
+      (5140/5145) from the same user and source, raised to Critical when the
+      user then starts processes (4688).
+
+    Thresholds come from the ``correlation`` section of rules.json. Results
+    depend only on the events, so runs are repeatable and need no network.
+    """
+
+    def __init__(self, rules=None, admins=()):
+        rules = rules or get_rules()
+        self.rules = rules
+        # AdminUsers.csv names are DOMAIN\\user; event fields carry the bare user name
+        self.admins = frozenset(str(a).strip().lower().rsplit('\\', 1)[-1] for a in admins if str(a).strip())
+        self._incidents = []
+        self._failures = defaultdict(deque)
+        self._brute_force = {}
+        self._brute_force_by_user = {}
+        self._spray_events = defaultdict(deque)
+        self._spray_users = defaultdict(Counter)
+        self._spraying = {}
+        self._lockouts = {}
+        self._remote_logons = {}
+        self._remote_by_user = {}
+        self._lateral = {}
+        self._lateral_by_user = {}
+        self._privileged = {}
+        self._service_account = {}
+        self._next_prune = None
+
+    def _new(self, *args, **kwargs):
+        incident = _Incident(*args, **kwargs)
+        self._incidents.append(incident)
+        return incident
+
+    def is_service_account(self, user):
+        known = self._service_account.get(user)
+        if known is None:
+            known = self._service_account[user] = any(
+                fnmatch.fnmatchcase(user, pattern) for pattern in self.rules.service_accounts)
+        return known
+
+    def feed(self, t, event_id, target, subject, ip, logon_type, share):
+        """One event; ``t`` in epoch seconds, names lower-cased, '' when absent."""
+        if self._next_prune is None or t >= self._next_prune:
+            self._prune(t)
+        if event_id == LOGON_FAILURE:
+            self._failure(t, target, ip)
+        elif event_id == LOGON_SUCCESS:
+            self._success(t, target, ip, logon_type)
+        elif event_id == LOCKOUT:
+            self._lockout(t, target)
+        elif event_id == SPECIAL_PRIVILEGES:
+            self._privileges(t, subject)
+        elif event_id in (SHARE_ACCESS, SHARE_OBJECT_ACCESS):
+            self._share(t, subject, ip, share)
+        elif event_id == PROCESS_CREATED:
+            self._process(t, subject)
+
+    def _prune(self, now):
+        """
+        Forget per-key state no later event can use: its newest timestamp
+        is outside the window it is checked against. Runs once per longest
+        window, so the cost is amortized over the events in between.
+        """
+        rules = self.rules
+        expired = lambda last, window: now - last > window
+
+        for key in [k for k, failures in self._failures.items()
+                    if not failures or failures[-1] <= now - rules.brute_force_window]:
+            del self._failures[key]
+        for ip in [ip for ip, events in self._spray_events.items()
+                   if not events or events[-1][0] <= now - rules.spraying_window]:
+            del self._spray_events[ip]
+            self._spray_users.pop(ip, None)
+        for incidents, window in ((self._brute_force, rules.brute_force_window),
+                                  (self._brute_force_by_user, rules.brute_force_window),
+                                  (self._lockouts, rules.brute_force_window),
+                                  (self._spraying, rules.spraying_window),
+                                  (self._lateral, rules.lateral_window),
+                                  (self._lateral_by_user, rules.lateral_window)):
+            for key in [k for k, incident in incidents.items() if expired(incident.last, window)]:
+                del incidents[key]
+        for key in [k for k, t in self._remote_logons.items() if expired(t, rules.lateral_window)]:
+            del self._remote_logons[key]
+        for user in [u for u, (t, _) in self._remote_by_user.items() if expired(t, rules.lateral_window)]:
+            del self._remote_by_user[user]
+        if len(self._service_account) > MAX_ACCOUNT_CACHE:
+            self._service_account.clear()
+        self._next_prune = now + max(rules.brute_force_window, rules.spraying_window, rules.lateral_window)
+
+    def _failure(self, t, user, ip):
+        window, key = self.rules.brute_force_window, (user, ip)
+        failures = self._failures[key]
+        failures.append(t)
+        while failures[0] <= t - window:
+            failures.popleft()
+        incident = self._brute_force.get(key)
+        if incident is not None and t - incident.last <= window:
+            incident.last = t
+            incident.events += 1
+        elif len(failures) >= self.rules.brute_force_failures:
+            incident = self._new("Brute force", "High", user, ip, failures[0], t, len(failures))
+            self._brute_force[key] = self._brute_force_by_user[user] = incident
+
+        window = self.rules.spraying_window
+        events, users = self._spray_events[ip], self._spray_users[ip]
+        events.append((t, user))
+        users[user] += 1
+        while events[0][0] <= t - window:
+            _, old = events.popleft()
+            users[old] -= 1
+            if not users[old]:
+                del users[old]
+        incident = self._spraying.get(ip)
+        if incident is not None and t - incident.last <= window:
+            incident.last = t
+            incident.events += 1
+            incident.users.add(user)
+        elif len(users) >= self.rules.spraying_users:
+            incident = self._new("Password spraying", "High", '', ip, events[0][0], t, len(events))
+            incident.users.update(users)
+            self._spraying[ip] = incident
+
+    def _success(self, t, user, ip, logon_type):
+        incident = self._brute_force.get((user, ip))
+        if incident is not None and t - incident.last <= self.rules.brute_force_window:
+            incident.raise_to("Critical")
+            incident.details.append(f"followed by a successful logon at {pd.Timestamp(t, unit='s'):%H:%M:%S}")
+        incident = self._spraying.get(ip)
+        if incident is not None and user in incident.users and t - incident.last <= self.rules.spraying_window:
+            incident.raise_to("Critical")
+            incident.details.append(f"{user} logged on successfully")
+        if logon_type in self.rules.remote_logon_types and ip not in LOCAL_ADDRESSES:
+            self._remote_logons[(user, ip)] = t
+            self._remote_by_user[user] = (t, ip)
+
+    def _lockout(self, t, user):
+        incident = self._brute_force_by_user.get(user)
+        if incident is not None and t - incident.last <= self.rules.brute_force_window:
+            incident.details.append("account locked out")
+            return
+        incident = self._lockouts.get(user)
+        if incident is not None and t - incident.last <= self.rules.brute_force_window:
+            incident.last = t
+            incident.events += 1
+        else:
+            self._lockouts[user] = self._new("Account lockout", "Medium", user, '', t, t)
+
+    def _privileges(self, t, user):
+        if not user or user in self.admins or self.is_service_account(user):
+            return
+        remote = self._remote_by_user.get(user)
+        remote_ip = remote[1] if remote is not None and t - remote[0] <= self.rules.lateral_window else ''
+        if not self.admins and not remote_ip:
+            return
+        incident = self._privileged.get(user)
+        if incident is None:
+            detection = "New admin logon" if self.admins else "Remote privileged logon"
+            incident = self._privileged[user] = self._new(detection, "High", user, remote_ip, t, t)
+            if self.admins:
+                incident.details.append("account is not a local administrator")
+        else:
+            incident.last = t
+            incident.events += 1
+        if remote_ip and not incident.ip:
+            incident.ip = remote_ip
+        if remote_ip:
+            incident.raise_to("Critical" if self.admins else "High")
+
+    def _share(self, t, user, ip, share):
+        if share not in self.rules.admin_shares or ip in LOCAL_ADDRESSES:
+            return
+        window, key = self.rules.lateral_window, (user, ip)
+        incident = self._lateral.get(key)
+        if incident is not None and t - incident.last <= window:
+            incident.last = t
+            incident.events += 1
+        else:
+            logon = self._remote_logons.get(key)
+            if logon is not None and t - logon <= window:
+                incident = self._new("Lateral movement (SMB)", "High", user, ip, logon, t)
+                incident.details.append("network logon followed by admin share access")
+            else:
+                incident = self._new("Admin share access", "Medium", user, ip, t, t)
+            self._lateral[key] = self._lateral_by_user[user] = incident
+        incident.shares.add(share)
+
+    def _process(self, t, user):
+        incident = self._lateral_by_user.get(user)
+        if incident is not None and t - incident.last <= self.rules.lateral_window:
+            if not any(d.startswith("then started") for d in incident.details):
+                incident.details.append("then started processes")
+            incident.raise_to("Critical")
+            incident.last = t
+            incident.events += 1
+
+    def run(self, df):
+        """Feed every correlated event of a SecurityLogs frame, in time order."""
+        index = EventIndex.from_frame(df, CORRELATED_FIELDS).select(CORRELATED_EVENT_IDS)
+        frame = index.frame
+        dated = frame['TimeCreated'].notna().to_numpy()
+        if not dated.any():
+            return self
+        frame = frame[dated]
+        times = (index.times[dated].astype('datetime64[s]').astype(np.int64)).tolist()
+        column = lambda name: _clean(frame[name]) if name in frame.columns else pd.Series('', index=frame.index)
+        logon_types = pd.to_numeric(frame['LogonType'], errors='coerce') if 'LogonType' in frame.columns \
+            else pd.Series(np.nan, index=frame.index)
+        shares = pd.Series('', index=frame.index)
+        if 'Message' in frame.columns:
+            share_rows = frame['Id'].isin((SHARE_ACCESS, SHARE_OBJECT_ACCESS))
+            shares[share_rows] = _share_names(frame['Message'][share_rows])
+        for event in zip(times, frame['Id'].tolist(), column('TargetUserName').tolist(),
+                         column('SubjectUserName').tolist(), column('IpAddress').tolist(),
+                         logon_types.fillna(-1).astype(int).tolist(), shares.tolist()):
+            self.feed(*event)
+        return self
+
+    def findings(self):
+        """Detections as table rows, most severe first, then by first seen."""
+        incidents = sorted(self._incidents, key=lambda i: (-SEVERITIES.index(i.severity), i.first))
+        return [incident.as_dict() for incident in incidents]
+
+
+def correlate_events(df, admins=(), rules=None):
+    """LogonCorrelator findings for one SecurityLogs frame."""
+    return LogonCorrelator(rules, admins).run(df).findings()
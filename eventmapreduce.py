@@ -0,0 +1,168 @@
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from keyscheduler import get_scheduler
+from llmpool import generate, get_llm_pool
+from llmcache import memoized
+from llmbatch import estimate_tokens
+from eventpipeline import parse_report
+
+# "summary" sends one prompt of per-ID aggregates; "mapreduce" sends the
+# event stream itself in chunks and merges the per-chunk verdicts
+LOG_ANALYSIS_MODES = ("summary", "mapreduce")
+DEFAULT_LOG_ANALYSIS = os.environ.get("FORENSIEGHT_LOG_ANALYSIS", "summary").lower()
+# Prompt tokens of events per chunk (the instructions come on top)
+CHUNK_TOKEN_BUDGET = 6000
+# Chunks (Gemini requests) one log may take; with the free tier's 15
+# requests a minute per key, more would hold the key pool for minutes
+MAX_CHUNKS = 20
+# Time buckets tried in turn when the collapsed event stream needs more
+# than MAX_CHUNKS chunks (None: consecutive repeats only)
+RUN_BUCKETS = (None, '5min', '1h', '1D')
+# Fewest tokens an entry can take ({"t": ..., "id": ..., "n": ...}), to rule
+# out a bucket size from the entry count alone
+MIN_RUN_TOKENS = 10
+THREAT_LEVELS = ("Low", "Medium", "High", "Critical")
+
+
+_ENTRY_DESCRIPTION = {
+    False: "Each entry is a run of consecutive identical events:",
+    True: "Each entry groups the events with one Event ID and the same field values within a {bucket} window:",
+}
+
+
+def chunk_runs(runs, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Yield consecutive slices of ``runs`` (EventIndex.runs() output) that
+    fit ``token_budget``; a run larger than the budget gets a chunk of its own.
+    """
+    chunk, used = [], 0
+    for run in runs:
+        cost = estimate_tokens(json.dumps(run))
+        if chunk and used + cost > token_budget:
+            yield chunk
+            chunk, used = [], 0
+        chunk.append(run)
+        used += cost
+    if chunk:
+        yield chunk
+
+
+def _overlapping(detections, start, end):
+    """Correlation detections whose First/Last Seen overlaps [start, end] (ISO strings)."""
+    return [d for d in detections
+            if d.get('First Seen', '') <= (end or '') and d.get('Last Seen', '') >= (start or '')]
+
+
+def check_event_chunk(api_key, log, chunk):
+    """Gemini verdict (answer text) for one chunk of a log's event stream."""
+    prompt = f'''
+You are a senior cybersecurity analyst. Below is part {chunk['part']} of {chunk['parts']} of a Windows {log} event log, from {chunk['start']} to {chunk['end']}, oldest first. {_ENTRY_DESCRIPTION[chunk.get('bucket') is not None].format(**chunk)} "t" is the time of the first event, "until" the time of the last, "id" the Event ID, "n" how many, followed by the users, IP addresses, logon types or providers involved. Any "detections" were raised by local correlation rules and should weigh most in your assessment:
+{json.dumps({k: v for k, v in chunk.items() if k in ('events', 'detections')}, indent=1)}
+
+Judge only this part of the log and respond with a single valid JSON object only that contains the following keys:
+
+• is_attack: true if these events form a coherent multi-stage attack, false otherwise
+• threat_level: one of "Low", "Medium", "High", or "Critical"
+• attack_type: a concise label for the likely attack (e.g. "Brute-Force Login", "Privilege Escalation", "Lateral Movement")
+• behaviour: a brief narrative that ties together what these events reveal about the attacker’s behavior
+• evidence_events: an object mapping each relevant Event ID (as a string) to a one-sentence description of what that event signifies
+'''
+    return memoized(f'{log}_events_chunk', chunk, lambda: generate(api_key, prompt, model="gemini-1.5-flash"))
+
+
+def _threat_rank(verdict):
+    level = str(verdict.get('threat_level', '')).strip().capitalize()
+    return THREAT_LEVELS.index(level) if level in THREAT_LEVELS else 0
+
+
+def merge_verdicts(verdicts):
+    """
+    Reduce per-chunk verdicts (dicts, in chunk order) to one: is_attack if
+    any chunk saw an attack, the highest threat level, the attack types and
+    behaviour of the chunks that drove the verdict, and the union of their
+    evidence events (the earliest description of an ID wins).
+    """
+    if not verdicts:
+        return None
+    attacks = [v for v in verdicts if v.get('is_attack') is True]
+    top = max(_threat_rank(v) for v in verdicts)
+    # Narrate the attack chunks, or failing that the most alarming ones
+    leading = attacks or [v for v in verdicts if _threat_rank(v) == top]
+    attack_types = list(dict.fromkeys(str(v['attack_type']) for v in leading if v.get('attack_type')))
+    evidence = {}
+    for verdict in leading:
+        events = verdict.get('evidence_events')
+        if isinstance(events, dict):
+            for event_id, description in events.items():
+                evidence.setdefault(str(event_id), description)
+    return {
+        'is_attack': bool(attacks),
+        'threat_level': THREAT_LEVELS[top],
+        'attack_type': ', '.join(attack_types),
+        'behaviour': ' '.join(
+            f"[{v['_range']}] {v['behaviour']}" if v.get('_range') else str(v['behaviour'])
+            for v in leading if v.get('behaviour')),
+        'evidence_events': evidence,
+    }
+
+
+def map_reduce_log(index, log, fields, gemini_keys, detections=(), token_budget=CHUNK_TOKEN_BUDGET,
+                   max_workers=None, max_chunks=MAX_CHUNKS):
+    """
+    Analyze an EventIndex chunk by chunk and merge the verdicts.
+
+    The event stream (consecutive repeats collapsed) is cut into chunks of
+    about ``token_budget`` tokens; each chunk carries the correlation
+    ``detections`` that overlap its time range. If that takes more than
+    ``max_chunks`` chunks, events are merged per RUN_BUCKETS time bucket
+    instead, coarser until they fit; None is returned when even daily
+    buckets do not, and the caller should use the summary. Chunks are sent
+    in parallel across the Gemini key pool, so latency follows the number
+    of chunks divided by the concurrency rather than the size of the log.
+    Chunks whose answer cannot be used are counted in 'failed_chunks'.
+    """
+    for bucket in RUN_BUCKETS:
+        if index.run_count(fields, bucket) * MIN_RUN_TOKENS > token_budget * max_chunks:
+            continue
+        chunks = list(chunk_runs(index.runs(fields, bucket), token_budget))
+        if len(chunks) <= max_chunks:
+            break
+    else:
+        logging.info(f"{len(index)} {log} events need more than {max_chunks} chunks even per {bucket}")
+        return None
+    for part, chunk in enumerate(chunks, start=1):
+        start, end = chunk[0]['t'], chunk[-1].get('until', chunk[-1]['t'])
+        chunks[part - 1] = {'part': part, 'parts': len(chunks), 'start': start, 'end': end, 'events': chunk}
+        if bucket is not None:
+            chunks[part - 1]['bucket'] = bucket
+        overlapping = _overlapping(detections, start, end)
+        if overlapping:
+            chunks[part - 1]['detections'] = overlapping
+    logging.info(f"Analyzing {len(index)} {log} events in {len(chunks)} chunks"
+                 + (f" (grouped per {bucket})" if bucket else ""))
+    scheduler = get_scheduler("gemini")
+
+    def analyze(chunk):
+        try:
+            verdict = parse_report(scheduler.call(lambda api_key: check_event_chunk(api_key, log, chunk), gemini_keys))
+        except Exception as e:
+            logging.warning(f"{log} chunk {chunk['part']}/{chunk['parts']} failed: {e}")
+            return None
+        if not isinstance(verdict, dict):
+            logging.warning(f"{log} chunk {chunk['part']}/{chunk['parts']}: answer is not a JSON object")
+            return None
+        return dict(verdict, _range=f"{chunk['start']} - {chunk['end']}")
+
+    workers = max_workers or get_llm_pool().max_parallel(gemini_keys)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks) or 1))) as executor:
+        verdicts = list(executor.map(analyze, chunks))
+    answered = [v for v in verdicts if v is not None]
+    if not answered:
+        raise RuntimeError(f"no usable answer for any of {len(chunks)} {log} chunks")
+    merged = merge_verdicts(answered)
+    merged.update(chunks=len(chunks), failed_chunks=len(chunks) - len(answered))
+    if bucket is not None:
+        merged['grouped_per'] = bucket
+    return merged
@@ -0,0 +1,259 @@
+import re
+import json
+import numpy as np
+import pandas as pd
+
+# Event IDs worth reporting, per log
+SECURITY_EVENT_IDS = frozenset({
+    4625, 4624, 4740, 4698, 4702, 7045,
+    4672, 4688, 4690, 4689, 4728, 4776,
+    4798, 4756, 5140, 4769, 4104, 5145,
+    5156, 1102, 4719, 1100,
+})
+APPLICATION_EVENT_IDS = frozenset({
+    1000, 1001, 1026, 1033, 4096, 4097, 6000, 8193, 8194,
+    1002, 5011, 4624, 4625, 7031, 7034, 1014, 11707, 11724,
+    104, 4098, 1005, 1502, 1503, 2001, 1003,
+})
+SYSTEM_EVENT_IDS = frozenset(
+    {4624, 4625, 4634, 4648, 4662, 4672, 4673, 4674} | set(range(4688, 5000)) |
+    # Service installs and crashes, start-type changes, log clearing, unexpected shutdowns
+    {41, 104, 1074, 6005, 6006, 6008, 7030, 7031, 7034, 7040, 7045}
+)
+
+# EventData fields grouped per event ID; CollectData.ps1 extracts these from the event XML
+SECURITY_FIELDS = ('TargetUserName', 'SubjectUserName', 'IpAddress', 'LogonType')
+APPLICATION_FIELDS = ('ProviderName', 'LevelDisplayName')
+SYSTEM_FIELDS = ('ProviderName', 'LevelDisplayName')
+
+# Export-Csv writes TimeCreated in this form
+TIME_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+# Width of the buckets in which the busiest period of each ID is measured
+BUCKET = '1h'
+# Most common values listed per field, and event IDs listed per summary,
+# so a summary stays the same size however many events there are
+TOP_VALUES = 5
+MAX_SUMMARY_IDS = 40
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def parse_times(values):
+    """
+    TimeCreated values as datetime64; unparseable ones become NaT. Each
+    distinct string is parsed once, since events logged in the same second
+    share a timestamp and strptime dominates the cost.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.to_datetime(uniques, format=TIME_FORMAT, errors='coerce')
+    retry = parsed.isna() & uniques.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(uniques[retry], format='mixed', errors='coerce')
+    times = parsed.to_numpy(dtype='datetime64[ns]')
+    return pd.Series(np.where(codes >= 0, times[codes], np.datetime64('NaT')), index=values.index,
+                     dtype='datetime64[ns]')
+
+
+def _integral(values):
+    """Whole-number float columns (LogonType read with blanks) as nullable ints, so 3.0 prints as 3."""
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        return values.astype('Int64')
+    return values
+
+
+def _field_values(values):
+    """Present values of one EventData column; '-' is how Windows writes an empty field."""
+    values = _integral(values).dropna()
+    return values[~values.astype(str).str.strip().isin(['', '-'])]
+
+
+def _iso(value):
+    return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+class EventIndex:
+    """
+    One event log indexed by event ID and time.
+
+    Rows are sorted by TimeCreated once (undated events last) and the IDs
+    and times kept as numpy arrays: selecting a set of IDs is one vectorized
+    membership pass, a time window is two binary searches, and aggregates
+    are grouped in pandas rather than scanned per event.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.ids = self.frame['Id'].to_numpy(dtype=np.int64)
+        self.times = self.frame['TimeCreated'].to_numpy(dtype='datetime64[ns]')
+        self._dated = int(self.frame['TimeCreated'].notna().sum())
+
+    @classmethod
+    def from_frame(cls, df, fields=()):
+        """Index ``df`` (a log CSV) keeping Id, TimeCreated and the given EventData ``fields``."""
+        if df is None or df.empty or 'Id' not in df.columns:
+            return cls(pd.DataFrame({'Id': pd.Series(dtype=np.int64),
+                                     'TimeCreated': pd.Series(dtype='datetime64[ns]')}))
+        ids = pd.to_numeric(df['Id'], errors='coerce')
+        keep = ids.notna().to_numpy()
+        frame = pd.DataFrame({'Id': ids[keep].astype(np.int64)})
+        if 'TimeCreated' in df.columns:
+            frame['TimeCreated'] = parse_times(df['TimeCreated'][keep]).astype('datetime64[ns]')
+        else:
+            frame['TimeCreated'] = pd.Series(pd.NaT, index=frame.index, dtype='datetime64[ns]')
+        for field in fields:
+            if field in df.columns:
+                frame[field] = df[field][keep]
+        return cls(frame.sort_values('TimeCreated', kind='stable', na_position='last'))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, ids):
+        """Events whose ID is in ``ids``."""
+        wanted = np.fromiter(ids, dtype=np.int64)
+        return EventIndex(self.frame[np.isin(self.ids, wanted)])
+
+    def window(self, start=None, end=None):
+        """Dated events with ``start`` <= TimeCreated < ``end`` (either bound optional)."""
+        times = self.times[:self._dated]
+        lo = 0 if start is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(start)), 'left'))
+        hi = self._dated if end is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(end)), 'left'))
+        return EventIndex(self.frame.iloc[lo:max(lo, hi)])
+
+    def first_seen(self):
+        return self.times[0] if self._dated else None
+
+    def last_seen(self):
+        return self.times[self._dated - 1] if self._dated else None
+
+    def counts(self):
+        """Events per ID, most frequent first."""
+        return self.frame['Id'].value_counts()
+
+    def aggregate(self, fields=(), top_n=TOP_VALUES, bucket=BUCKET):
+        """
+        One dict per event ID, most frequent first: count, first/last seen,
+        the most events in any ``bucket``, and the ``top_n`` most common
+        values of each EventData field.
+        """
+        frame = self.frame
+        if frame.empty:
+            return []
+        grouped = frame.groupby('Id')
+        stats = pd.DataFrame({
+            'count': grouped.size(),
+            'first_seen': grouped['TimeCreated'].min(),
+            'last_seen': grouped['TimeCreated'].max(),
+        })
+        dated = frame[frame['TimeCreated'].notna()]
+        peaks = dated.groupby(['Id', dated['TimeCreated'].dt.floor(bucket)]).size().groupby(level=0).max()
+        stats['peak'] = peaks.reindex(stats.index).fillna(0).astype(int)
+
+        top = {}
+        for field in fields:
+            if field not in frame.columns:
+                continue
+            values = _field_values(frame[field])
+            if values.empty:
+                continue
+            values = pd.DataFrame({'Id': frame['Id'][values.index], 'value': values})
+            common = values.groupby('Id')['value'].value_counts().groupby(level=0).head(top_n)
+            for (event_id, value), count in common.items():
+                top.setdefault(event_id, {}).setdefault(field, {})[str(value)] = int(count)
+
+        rows = []
+        for event_id, row in stats.sort_values('count', ascending=False, kind='stable').iterrows():
+            entry = {
+                'id': int(event_id),
+                'count': int(row['count']),
+                'first_seen': _iso(row['first_seen']),
+                'last_seen': _iso(row['last_seen']),
+                f'peak_per_{bucket}': int(row['peak']),
+            }
+            if event_id in top:
+                entry['top'] = top[event_id]
+            rows.append(entry)
+        return rows
+
+    def _run_groups(self, fields, bucket):
+        """(present fields, key strings per event, run number per event) for runs()."""
+        frame = self.frame
+        fields = [f for f in fields if f in frame.columns]
+        keys = pd.DataFrame({name: _integral(frame[name]) for name in ['Id'] + fields})
+        keys = keys.astype(object).fillna('').astype(str)
+        if bucket is None:
+            groups = np.cumsum((keys != keys.shift()).any(axis=1).to_numpy())
+        else:
+            buckets = frame['TimeCreated'].dt.floor(bucket).astype(str)
+            groups = pd.concat([keys, buckets.rename('_bucket')], axis=1) \
+                .groupby(['Id', *fields, '_bucket'], sort=False).ngroup().to_numpy()
+        return fields, keys, groups
+
+    def run_count(self, fields=(), bucket=None):
+        """len(runs(fields, bucket)) without building the runs."""
+        if self.frame.empty:
+            return 0
+        return len(np.unique(self._run_groups(fields, bucket)[2]))
+
+    def runs(self, fields=(), bucket=None):
+        """
+        The events in time order with consecutive repeats collapsed: one
+        dict per run of events sharing an ID and ``fields`` values, with
+        't' (first time), 'until' (last time, for runs longer than one),
+        'id', 'n' and the field values that are present. With ``bucket``
+        (e.g. '15min'), all events sharing an ID and field values within
+        one bucket form a single entry, consecutive or not.
+        """
+        frame = self.frame
+        if frame.empty:
+            return []
+        fields, keys, groups = self._run_groups(fields, bucket)
+        heads = keys.groupby(groups).first()
+        grouped = frame['TimeCreated'].groupby(groups)
+        firsts, lasts, sizes = grouped.min(), grouped.max(), grouped.size()
+        order = firsts.sort_values(kind='stable', na_position='last').index
+        runs = []
+        for row, first, last, size in zip(heads.loc[order].itertuples(index=False), firsts[order],
+                                          lasts[order], sizes[order]):
+            run = {'t': _iso(first), 'id': int(row[0]), 'n': int(size)}
+            if size > 1 and last != first:
+                run['until'] = _iso(last)
+            for field, value in zip(fields, row[1:]):
+                if value.strip() not in ('', '-'):
+                    run[field] = value
+            runs.append(run)
+        return runs
+
+    def summary(self, ids, fields=(), top_n=TOP_VALUES, max_ids=MAX_SUMMARY_IDS, bucket=BUCKET):
+        """
+        Compact description of the events whose ID is in ``ids``: totals,
+        time range and aggregate() of at most ``max_ids`` IDs. Its size
+        depends on the number of distinct IDs, not on the number of events.
+        """
+        matched = self.select(ids)
+        aggregates = matched.aggregate(fields, top_n, bucket)
+        return {
+            'total_events': len(self),
+            'matched_events': len(matched),
+            'first_seen': _iso(matched.first_seen()),
+            'last_seen': _iso(matched.last_seen()),
+            'event_ids': aggregates[:max_ids],
+            'omitted_ids': max(0, len(aggregates) - max_ids),
+        }
+
+
+def summarize_log(df, ids, fields=()):
+    """EventIndex summary of a log frame in one call."""
+    return EventIndex.from_frame(df, fields).summary(ids, fields)
+
+
+def parse_report(answer):
+    """A model answer as parsed JSON when it is JSON (code fences allowed), else the text itself."""
+    if not isinstance(answer, str):
+        return answer
+    text = _FENCE.sub('', answer).strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
@@ -0,0 +1,253 @@
+import os
+import logging
+import threading
+import pandas as pd
+
+DEFAULT_INPUT_DIR = "C:\\InvestigationData"
+
+# Attribute name -> CSV written by CollectData.ps1
+ARTIFACTS = {
+    'systemInfo': "SystemInfo.csv",
+    'hardwareInfo': "HardwareInfo.csv",
+    'installedSoftware': "InstalledSoftware.csv",
+    'userAccounts': "UserAccounts.csv",
+    'runningProcesses': "RunningProcesses.csv",
+    'networkConnections': "NetworkConnections.csv",
+    'firewallStatus': "FirewallStatus.csv",
+    'recentFileChanges': "RecentFileChanges.csv",
+    'securityLogs': "SecurityLogs.csv",
+    'powershellLogs': "PowerShellLogs.csv",
+    'startupEntries': "StartupEntries.csv",
+    'applicationLogs': "ApplicationLogs.csv",
+    'systemLogs': "SystemLogs.csv",
+    'firewallModificationEvents': "FirewallModificationEvents.csv",
+    'scheduledTasks': "ScheduledTasks.csv",
+    'USB': "USBDeviceHistory.csv",
+    'admin_users_df': "AdminUsers.csv",
+    'arp_table': "ARP_Table.csv",
+    'dns_cache': "DNS_Cache.csv",
+    'env_vars': "EnvironmentVariables.csv",
+    'open_shares': "OpenShares.csv",
+    'loaded_dlls': "LoadedDLLs.csv",
+    'disk_info': "DiskInfo.csv",
+    'volume_info': "VolumeInfo.csv",
+    'smb': "SmbSessions.csv",
+    'suspiciousFiles': "SuspiciousFiles.csv",
+}
+
+# Declared column types per artifact. Names and paths that repeat across
+# rows (the same DLL in every process, the same owner on every file) are
+# categoricals, stored once per distinct value; PIDs and ports are nullable
+# integers so a blank cell does not turn the column into floats. Columns
+# not listed keep pandas' inferred type.
+ARTIFACT_SCHEMAS = {
+    'recentFileChanges': {'Owner': 'category'},
+    'loaded_dlls': {
+        'ProcessID': 'Int64',
+        'ProcessName': 'category',
+        'DLLName': 'category',
+        'DLLPath': 'category',
+        'SHA256': 'category',
+    },
+    'networkConnections': {
+        'PID': 'Int64',
+        'LocalPort': 'Int64',
+        'RemotePort': 'Int64',
+        'State': 'category',
+        'ProcessName': 'category',
+        'ProcessPath': 'category',
+    },
+}
+
+# Rows per chunk for iter_chunks(); overridden by FORENSIEGHT_CSV_CHUNK_ROWS
+DEFAULT_CHUNK_ROWS = 50000
+
+
+def chunk_rows():
+    value = os.environ.get("FORENSIEGHT_CSV_CHUNK_ROWS")
+    try:
+        return max(1, int(value)) if value else DEFAULT_CHUNK_ROWS
+    except ValueError:
+        logging.warning(f"Ignoring FORENSIEGHT_CSV_CHUNK_ROWS={value!r}: not an integer")
+        return DEFAULT_CHUNK_ROWS
+
+
+def apply_schema(df, schema):
+    """Cast the columns of ``df`` named in ``schema``; unparseable integers become <NA>."""
+    for column, dtype in (schema or {}).items():
+        if column not in df.columns:
+            continue
+        if dtype == 'Int64':
+            numbers = pd.to_numeric(df[column], errors='coerce')
+            df[column] = numbers.where(numbers % 1 == 0).astype('Int64')
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def iter_frames(data):
+    """Frames in ``data``: a DataFrame on its own, or each chunk of an iterable of them."""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+
+class EvidenceSet:
+    """
+    One collected evidence directory whose artifacts are read on first use.
+
+    Each artifact is exposed as an attribute named as in ARTIFACTS
+    (e.g. ``evidence.runningProcesses``) and cached after the first read, so
+    opening an evidence set costs nothing until a tab actually needs data.
+    Several evidence sets can be open in the same process.
+
+    With ``store=True`` (or FORENSIEGHT_EVIDENCE_STORE=on) and pyarrow
+    installed, artifacts are read through an EvidenceStore (see
+    evidencestore.py): the first read converts a CSV to a memory-mapped
+    Arrow table, later runs read that table instead. ``store=False``
+    always parses the CSVs; an EvidenceStore may also be passed.
+    """
+
+    def __init__(self, input_dir=DEFAULT_INPUT_DIR, store=None):
+        self.input_dir = input_dir
+        if store is None or store is True:
+            from evidencestore import open_store
+            store = open_store(input_dir, force=store is True)
+        self.store = store or None
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def __repr__(self):
+        return f"EvidenceSet({self.input_dir!r})"
+
+    def __getattr__(self, name):
+        if name in ARTIFACTS:
+            return self.load(name)
+        if name == 'merged':
+            return self.load('merged')
+        raise AttributeError(f"{type(self).__name__} has no artifact '{name}'")
+
+    def path(self, file):
+        return os.path.join(self.input_dir, file)
+
+    def read_csv(self, file, schema=None):
+        """Safely read a CSV file, returning an empty DataFrame if it fails."""
+        file_path = self.path(file)
+        try:
+            return apply_schema(pd.read_csv(file_path), schema) if os.path.exists(file_path) else pd.DataFrame()
+        except (pd.errors.EmptyDataError, Exception) as e:
+            print(f"Error reading {file}: {e}")
+            return pd.DataFrame()
+
+    def read_artifact(self, name, columns=None):
+        """Artifact ``name`` read afresh (not cached), from the store when there is one."""
+        file = ARTIFACTS[name]
+        schema = ARTIFACT_SCHEMAS.get(name)
+        if self.store is not None:
+            try:
+                frame = self.store.read(name, file, schema, columns)
+                return frame if frame is not None else pd.DataFrame()
+            except Exception as e:
+                logging.warning(f"Evidence store read of {file} failed, parsing the CSV: {e}")
+        frame = self.read_csv(file, schema)
+        if columns is not None:
+            frame = frame[[c for c in columns if c in frame.columns]]
+        return frame
+
+    def iter_chunks(self, name, chunksize=None, columns=None):
+        """
+        Yield artifact ``name`` as frames of at most ``chunksize`` rows.
+
+        The file is streamed, so memory holds one chunk at a time however
+        large it is; each chunk gets the artifact's ARTIFACT_SCHEMAS types
+        (categories are per chunk). ``columns`` limits the columns read;
+        ones missing from the file are ignored. An artifact that is already
+        loaded is sliced from memory, and one already in the evidence store
+        is streamed from its Arrow table. A missing file yields nothing; a
+        read error is reported and ends the stream.
+        """
+        chunksize = chunksize or chunk_rows()
+        frame = self._frames.get(name)
+        if frame is not None:
+            if columns is not None:
+                frame = frame[[c for c in columns if c in frame.columns]]
+            for start in range(0, len(frame), chunksize):
+                yield frame.iloc[start:start + chunksize]
+            return
+        file = ARTIFACTS[name]
+        file_path = self.path(file)
+        if not os.path.exists(file_path):
+            return
+        schema = ARTIFACT_SCHEMAS.get(name)
+        if self.store is not None:
+            try:
+                fresh = self.store.is_fresh(name, file, schema)
+            except OSError as e:
+                logging.warning(f"Evidence store check of {file} failed: {e}")
+                fresh = False
+            if fresh:
+                yield from self.store.iter_chunks(name, file, schema, chunksize, columns)
+                return
+        try:
+            if columns is not None:
+                header = pd.read_csv(file_path, nrows=0).columns
+                columns = [c for c in columns if c in header]
+            with pd.read_csv(file_path, chunksize=chunksize, usecols=columns) as reader:
+                for chunk in reader:
+                    yield apply_schema(chunk, schema)
+        except pd.errors.EmptyDataError:
+            return
+        except (OSError, ValueError, pd.errors.ParserError) as e:
+            print(f"Error reading {file}: {e}")
+
+    def load(self, name):
+        """Return the cached frame for ``name``, reading it on first access."""
+        frame = self._frames.get(name)
+        if frame is not None:
+            return frame
+        # One lock per artifact so two tabs needing different files read in parallel
+        with self._lock:
+            lock = self._loading.setdefault(name, threading.Lock())
+        with lock:
+            frame = self._frames.get(name)
+            if frame is None:
+                frame = self._build_merged() if name == 'merged' else self.read_artifact(name)
+                self._frames[name] = frame
+        return frame
+
+    def ingest(self):
+        """Convert every artifact to the evidence store now; {name: status}, or {} without a store."""
+        return self.store.ingest(ARTIFACTS, ARTIFACT_SCHEMAS) if self.store is not None else {}
+
+    def is_loaded(self, name):
+        return name in self._frames
+
+    def unload(self, name=None):
+        """Drop one cached artifact (or all of them) to release memory."""
+        with self._lock:
+            if name is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(name, None)
+
+    def _build_merged(self):
+        runningProcesses = self.load('runningProcesses')
+        if runningProcesses.empty:
+            logging.error("RunningProcesses.csv is empty or not loaded correctly.")
+            return pd.DataFrame()
+        missing_columns = {'Id', 'Path'} - set(runningProcesses.columns)
+        if missing_columns:
+            logging.error(f"Missing columns in RunningProcesses.csv: {missing_columns}")
+            return pd.DataFrame()
+        networkConnections = self.load('networkConnections')
+        if networkConnections.empty or 'PID' not in networkConnections.columns:
+            return pd.DataFrame()
+        return pd.merge(
+            networkConnections,
+            runningProcesses[['Id', 'Path']],
+            how='left',
+            left_on='PID',
+            right_on='Id'
+        ).drop(columns=['Id']).rename(columns={'Path': 'CorrectedProcessPath'})
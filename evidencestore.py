@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+import pandas as pd
+from filehasher import sha256_stream
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+# Bump when the stored layout changes so older stores are re-converted
+STORE_VERSION = 1
+DEFAULT_STORE_ROOT = os.environ.get(
+    "FORENSIEGHT_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".forensieght", "evidence")
+)
+MANIFEST = "manifest.json"
+TABLE_SUFFIX = ".arrow"
+
+
+def store_enabled():
+    """
+    True when FORENSIEGHT_EVIDENCE_STORE is 1/on/true/yes and pyarrow is
+    installed. The store copies evidence out of its folder, so it is off
+    unless asked for.
+    """
+    setting = os.environ.get("FORENSIEGHT_EVIDENCE_STORE", "").strip().lower()
+    return pa is not None and setting in ("1", "on", "true", "yes")
+
+
+def store_dir_for(input_dir, root=None):
+    """Store directory for an evidence directory: <root>/<name>-<hash of its absolute path>."""
+    input_dir = os.path.abspath(input_dir)
+    key = hashlib.sha1(os.path.normcase(input_dir).encode('utf-8')).hexdigest()[:12]
+    name = os.path.basename(input_dir.rstrip('\\/')) or 'evidence'
+    return os.path.join(root or DEFAULT_STORE_ROOT, f"{name}-{key}")
+
+
+def _schema_key(schema):
+    return json.dumps(schema or {}, sort_keys=True)
+
+
+class EvidenceStore:
+    """
+    Columnar copy of one evidence directory.
+
+    Each CSV is converted once into an uncompressed Arrow IPC file, typed as
+    EvidenceSet.read_csv would type it (ARTIFACT_SCHEMAS categoricals are
+    stored dictionary-encoded). Later reads memory-map the file and decode
+    only the requested columns. manifest.json records each source CSV's
+    size, mtime and sha256: a CSV whose size or mtime changed is re-hashed,
+    and re-converted only if its content actually differs. The store lives
+    outside the evidence directory so the collected files are never
+    modified.
+    """
+
+    def __init__(self, input_dir, store_dir=None):
+        if pa is None:
+            raise RuntimeError("The evidence store needs pyarrow (pip install pyarrow)")
+        self.input_dir = input_dir
+        self.store_dir = store_dir or store_dir_for(input_dir)
+        self._manifest = None
+        self._lock = threading.Lock()
+        self._converting = {}
+
+    def __repr__(self):
+        return f"EvidenceStore({self.input_dir!r}, {self.store_dir!r})"
+
+    def source_path(self, file):
+        return os.path.join(self.input_dir, file)
+
+    def table_path(self, name):
+        return os.path.join(self.store_dir, name + TABLE_SUFFIX)
+
+    def manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                try:
+                    with open(os.path.join(self.store_dir, MANIFEST), encoding='utf-8') as f:
+                        manifest = json.load(f)
+                    if manifest.get('version') != STORE_VERSION:
+                        manifest = None
+                except (OSError, ValueError):
+                    manifest = None
+                self._manifest = manifest or {'version': STORE_VERSION, 'artifacts': {}}
+            return self._manifest
+
+    def _save_entry(self, name, entry):
+        manifest = self.manifest()
+        with self._lock:
+            if entry is None:
+                manifest['artifacts'].pop(name, None)
+            else:
+                manifest['artifacts'][name] = entry
+            path = os.path.join(self.store_dir, MANIFEST)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+
+    def is_fresh(self, name, file, schema=None):
+        """True when the stored table matches the current CSV and schema."""
+        entry = self.manifest()['artifacts'].get(name)
+        source = self.source_path(file)
+        if not entry or entry.get('schema') != _schema_key(schema) or not os.path.exists(self.table_path(name)):
+            return False
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        # Touched but possibly unchanged (copied, re-extracted): compare content
+        if entry['size'] != stat.st_size or sha256_stream(source) != entry['sha256']:
+            return False
+        self._save_entry(name, dict(entry, mtime_ns=stat.st_mtime_ns))
+        return True
+
+    def convert(self, name, file, schema=None):
+        """
+        Parse the CSV and write its table; returns the parsed frame (None if
+        the CSV does not exist). The frame is returned even if writing the
+        table fails, so a read-only or full store only costs the speed-up.
+        """
+        from evidenceset import apply_schema
+        source = self.source_path(file)
+        if not os.path.exists(source):
+            return None
+        stat = os.stat(source)
+        digest = sha256_stream(source)
+        try:
+            frame = apply_schema(pd.read_csv(source), schema)
+        except pd.errors.EmptyDataError:
+            frame = pd.DataFrame()
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            path = self.table_path(name)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            feather.write_feather(table, tmp, compression='uncompressed')
+            os.replace(tmp, path)
+            self._save_entry(name, {
+                'source': file,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': digest,
+                'schema': _schema_key(schema),
+                'rows': len(frame),
+                'columns': list(map(str, frame.columns)),
+            })
+            logging.info(f"Converted {file} to {path} ({len(frame)} rows)")
+        except (OSError, pa.ArrowException) as e:
+            logging.warning(f"Could not store {file} as Arrow, using the CSV: {e}")
+        return frame
+
+    def _table(self, name, columns=None):
+        """Memory-mapped table for ``name``, limited to the ``columns`` it has."""
+        path = self.table_path(name)
+        if columns is not None:
+            stored = self.manifest()['artifacts'].get(name, {}).get('columns', [])
+            columns = [c for c in columns if c in stored]
+        return feather.read_table(path, columns=columns, memory_map=True)
+
+    def read(self, name, file, schema=None, columns=None):
+        """
+        The artifact as a frame, converting it first if the store is stale;
+        None if the CSV does not exist. ``columns`` limits what is decoded.
+        """
+        with self._lock:
+            lock = self._converting.setdefault(name, threading.Lock())
+        with lock:
+            if not self.is_fresh(name, file, schema):
+                frame = self.convert(name, file, schema)
+                if frame is None or columns is None:
+                    return frame
+                return frame[[c for c in columns if c in frame.columns]]
+        return self._table(name, columns).to_pandas()
+
+    def iter_chunks(self, name, file, schema=None, chunksize=50000, columns=None):
+        """
+        Yield the stored artifact in frames of at most ``chunksize`` rows;
+        pages are mapped in as batches are decoded. Only call this when
+        is_fresh() holds; unlike read() it never converts, since that would
+        load the whole CSV.
+        """
+        for batch in self._table(name, columns).to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+
+    def ingest(self, artifacts, schemas=None):
+        """
+        Convert every stale artifact in ``artifacts`` ({name: csv file}).
+        Returns {name: 'fresh' | 'converted' | 'missing' | error message}.
+        """
+        schemas = schemas or {}
+        status = {}
+        for name, file in artifacts.items():
+            schema = schemas.get(name)
+            try:
+                if not os.path.exists(self.source_path(file)):
+                    status[name] = 'missing'
+                elif self.is_fresh(name, file, schema):
+                    status[name] = 'fresh'
+                else:
+                    self.convert(name, file, schema)
+                    status[name] = 'converted' if self.is_fresh(name, file, schema) else 'not stored'
+            except Exception as e:
+                status[name] = f"error: {e}"
+        return status
+
+
+def open_store(input_dir, root=None, force=False):
+    """
+    EvidenceStore for ``input_dir``, or None when the store is not enabled
+    (see store_enabled) or pyarrow is missing. ``force`` opens it whatever
+    the environment says, as cli.py --ingest does.
+    """
+    if force and pa is None:
+        logging.warning("The evidence store needs pyarrow (pip install pyarrow); parsing the CSVs")
+        return None
+    if not (force or store_enabled()):
+        return None
+    return EvidenceStore(input_dir, store_dir_for(input_dir, root))
+
+
+def main(argv=None):
+    """Convert evidence directories ahead of analysis: python evidencestore.py DIR [DIR ...]"""
+    from evidenceset import ARTIFACTS, ARTIFACT_SCHEMAS
+    directories = sys.argv[1:] if argv is None else argv
+    if not directories:
+        print("usage: evidencestore.py EVIDENCE_DIR [EVIDENCE_DIR ...]", file=sys.stderr)
+        return 2
+    if pa is None:
+        print("evidencestore.py: pyarrow is not installed (pip install pyarrow)", file=sys.stderr)
+        return 2
+    failed = 0
+    for directory in directories:
+        store = EvidenceStore(directory)
+        status = store.ingest(ARTIFACTS, ARTIFACT_SCHEMAS)
+        converted = [name for name, s in status.items() if s == 'converted']
+        errors = {name: s for name, s in status.items() if s not in ('fresh', 'converted', 'missing')}
+        failed += bool(errors)
+        print(f"{directory}: {len(converted)} converted, "
+              f"{sum(s == 'fresh' for s in status.values())} up to date -> {store.store_dir}")
+        for name, message in errors.items():
+            print(f"  {ARTIFACTS[name]}: {message}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import os
+import math
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from ruleengine import RuleEngine, get_rule_engine, set_rule_engine
+
+# "process" runs CPU-bound analyzers in worker processes, "thread" in a
+# thread pool (for hosts where worker processes cannot be started), and
+# "serial" in the calling thread
+MODES = ("process", "thread", "serial")
+DEFAULT_MODE = "process"
+# Frames smaller than this are analyzed in the calling process; pickling
+# them to workers would cost more than it saves
+DEFAULT_MIN_PARALLEL_ROWS = 10000
+# Smallest chunk handed to a worker when the chunk size is chosen automatically
+MIN_CHUNK_ROWS = 2000
+# Chunks per worker when sizing automatically, so uneven chunks still balance
+CHUNKS_PER_WORKER = 2
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"Ignoring {name}={value!r}: not an integer")
+        return default
+
+
+def _rule_engine_config():
+    """What a worker process needs to build the same RuleEngine as this process."""
+    engine = get_rule_engine()
+    return engine.override_path, engine.defaults_path, engine.reload_interval
+
+
+def _init_worker(override_path, defaults_path, reload_interval):
+    set_rule_engine(RuleEngine(override_path, defaults_path, reload_interval))
+
+
+def _combine(results):
+    """Join per-chunk results: frames/series are concatenated, lists chained."""
+    if not results:
+        return []
+    if isinstance(results[0], (pd.DataFrame, pd.Series)):
+        return pd.concat(results)
+    if isinstance(results[0], list):
+        return [item for result in results for item in result]
+    return results
+
+
+class Executors:
+    """
+    Where analyzers run.
+
+    CPU-bound work (regexes, entropy, base64 decoding over row batches)
+    goes through map_frame(), which splits a frame into contiguous chunks
+    and runs a module-level function on each in a shared process pool, so
+    the work scales with cores instead of sharing one GIL. Worker processes
+    load their rules with the same RuleEngine settings as this process
+    (including one installed with set_rule_engine); the pool is restarted
+    if those settings change. Network-bound work stays on threads: the
+    threat-intel and Gemini clients keep their own asyncio loop.
+
+    Settings come from the arguments or the FORENSIEGHT_EXECUTOR,
+    FORENSIEGHT_CPU_WORKERS, FORENSIEGHT_CHUNK_ROWS and
+    FORENSIEGHT_MIN_PARALLEL_ROWS environment variables. A chunk size of
+    0 picks one from the frame size.
+    """
+
+    def __init__(self, mode=None, cpu_workers=None, chunk_rows=None, min_parallel_rows=None):
+        mode = (mode or os.environ.get("FORENSIEGHT_EXECUTOR") or DEFAULT_MODE).lower()
+        if mode not in MODES:
+            raise ValueError(f"executor mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self.mode = mode
+        self.cpu_workers = max(1, cpu_workers or _env_int("FORENSIEGHT_CPU_WORKERS", os.cpu_count() or 1))
+        self.chunk_rows = chunk_rows if chunk_rows is not None else _env_int("FORENSIEGHT_CHUNK_ROWS", 0)
+        self.min_parallel_rows = min_parallel_rows if min_parallel_rows is not None else \
+            _env_int("FORENSIEGHT_MIN_PARALLEL_ROWS", DEFAULT_MIN_PARALLEL_ROWS)
+        self._cpu_pool = None
+        self._pool_rules = None
+        self._lock = threading.Lock()
+
+    def cpu_pool(self):
+        """The shared pool for CPU-bound chunks (None in serial mode)."""
+        rules = _rule_engine_config() if self.mode == "process" else None
+        with self._lock:
+            if self._cpu_pool is not None and rules != self._pool_rules:
+                # Workers were started with another rule engine
+                self._cpu_pool.shutdown(wait=False)
+                self._cpu_pool = None
+            if self._cpu_pool is None and self.mode != "serial":
+                if self.mode == "process":
+                    self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                         initializer=_init_worker, initargs=rules)
+                else:
+                    self._cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_workers,
+                                                        thread_name_prefix="analyzer")
+                self._pool_rules = rules
+            return self._cpu_pool
+
+    def chunk_bounds(self, rows):
+        """[(start, stop), ...] row ranges covering ``rows`` rows."""
+        size = self.chunk_rows or max(MIN_CHUNK_ROWS, math.ceil(rows / (self.cpu_workers * CHUNKS_PER_WORKER)))
+        return [(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+    def map_frame(self, func, df, *args, aligned=None, **kwargs):
+        """
+        ``func(chunk, *args, **kwargs)`` over row chunks of ``df``, results
+        combined in row order (frames concatenated, lists chained).
+
+        ``func`` must be a module-level function and its arguments picklable.
+        ``aligned`` maps keyword names to frames/series indexed like ``df``;
+        each call gets the matching slice of them. Small frames, serial mode
+        and single-worker setups call ``func`` once on the whole frame.
+        """
+        aligned = aligned or {}
+        rows = len(df)
+        bounds = self.chunk_bounds(rows)
+        if self.mode == "serial" or self.cpu_workers == 1 or rows < self.min_parallel_rows or len(bounds) < 2:
+            return func(df, *args, **kwargs, **aligned)
+
+        def call_args(start, stop):
+            sliced = {name: values.iloc[start:stop] for name, values in aligned.items()}
+            return df.iloc[start:stop], dict(kwargs, **sliced)
+
+        try:
+            pool = self.cpu_pool()
+            futures = []
+            for start, stop in bounds:
+                chunk, chunk_kwargs = call_args(start, stop)
+                futures.append(pool.submit(func, chunk, *args, **chunk_kwargs))
+            return _combine([future.result() for future in futures])
+        except BrokenProcessPool as e:
+            logging.warning(f"Analyzer process pool failed ({e}); running {getattr(func, '__name__', func)} serially")
+            with self._lock:
+                self._cpu_pool = None
+            return func(df, *args, **kwargs, **aligned)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._cpu_pool = self._cpu_pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+_default_executors = None
+_default_lock = threading.Lock()
+
+
+def get_executors():
+    global _default_executors
+    if _default_executors is None:
+        with _default_lock:
+            if _default_executors is None:
+                _default_executors = Executors()
+    return _default_executors
+
+
+def set_executors(executors):
+    global _default_executors
+    with _default_lock:
+        previous, _default_executors = _default_executors, executors
+    if previous is not None and previous is not executors:
+        previous.shutdown(wait=False)
@@ -1,5 +1,5 @@
-import requests
-import time
+from httppool import run_sync
+from intelclient import get_intel_client, decide_hash
 
 def check_virustotal(file_hash, api_key, retries=3):
     """
@@ -10,21 +10,7 @@ def check_virustotal(file_hash, api_key, retries=3):
     :param retries: Number of retry attempts for API calls.
     :return: 'malicious', 'safe', or 'unknown'.
     """
-    url = f"https://www.virustotal.com/api/v3/files/{file_hash}"
-    headers = {"x-apikey": api_key}
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            detections = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {}).get("malicious", 0)
-            return "malicious" if detections > 5 else "safe"
-        except requests.RequestException as e:
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-            print(f"VirusTotal error for {file_hash}: {e}")
-            return "unknown"
+    return run_sync(get_intel_client().check_file_hash(file_hash, api_key, retries))
 
 
 
@@ -38,13 +24,6 @@ def scan_hash_and_decide(file_hash, api_key_vt):
     :return: (True/False, message)
     """
     vt_result = check_virustotal(file_hash, api_key_vt)
-    if vt_result == "malicious":
-        decision = "malicious"
-    elif vt_result == "safe":
-        decision = "safe"
-    else:
-        decision = "unknown"
-
-    report_url = f"https://www.virustotal.com/gui/file/{file_hash}" if vt_result != "unknown" else ""
+    decision = vt_result if vt_result in ("malicious", "safe") else "unknown"
     print(f"{file_hash}: {decision}")
-    return (decision == "malicious", f"Decision: {decision}, Report: {report_url}")
+    return decide_hash(file_hash, vt_result)
@@ -0,0 +1,122 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from verdictcache import get_verdict_cache, DAY
+
+CHUNK_SIZE = 1024 * 1024
+# Digests kept in memory; older ones are still found in the on-disk cache
+MAX_MEMORY_ENTRIES = 4096
+# A (path, size, mtime) key changes when the file does, so entries can live long
+DISK_TTL = 30 * DAY
+CACHE_SOURCE = "sha256_file"
+
+
+def sha256_stream(path, chunk_size=CHUNK_SIZE):
+    """sha256 of a file read in fixed-size chunks, so memory use stays flat for large binaries."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class FileHasher:
+    """
+    Hashes each file at most once.
+
+    Digests are keyed on (path, size, mtime_ns): an in-memory LRU answers
+    repeat requests within a run, the verdict cache database answers them
+    across runs, and concurrent requests for a file that is already being
+    hashed wait for that result instead of reading the file again.
+    """
+
+    def __init__(self, cache=None, max_entries=MAX_MEMORY_ENTRIES, chunk_size=CHUNK_SIZE):
+        self._cache = cache
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self._memory = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_verdict_cache()
+
+    def _remember(self, key, digest):
+        with self._lock:
+            self._memory[key] = digest
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def hash(self, path):
+        """Return the sha256 hex digest of ``path``; raises OSError if it cannot be read."""
+        st = os.stat(path)
+        key = f"{os.path.normcase(os.path.abspath(path))}|{st.st_size}|{st.st_mtime_ns}"
+        with self._lock:
+            digest = self._memory.get(key)
+            if digest is not None:
+                self._memory.move_to_end(key)
+                return digest
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._in_flight[key] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            digest = self.cache.get(key, CACHE_SOURCE)
+            if digest is None:
+                digest = sha256_stream(path, self.chunk_size)
+                self.cache.put(key, CACHE_SOURCE, digest, ttl=DISK_TTL)
+            self._remember(key, digest)
+            pending.set_result(digest)
+            return digest
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def hash_many(self, paths, max_workers=None):
+        """Hash each distinct path; returns {path: hexdigest or the exception raised reading it}."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.hash, p): p for p in set(paths)}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    logging.debug(f"Could not hash {path}: {e}")
+                    results[path] = e
+        return results
+
+
+_default_hasher = None
+_default_lock = threading.Lock()
+
+
+def get_file_hasher():
+    global _default_hasher
+    if _default_hasher is None:
+        with _default_lock:
+            if _default_hasher is None:
+                _default_hasher = FileHasher()
+    return _default_hasher
+
+
+def set_file_hasher(hasher):
+    global _default_hasher
+    with _default_lock:
+        _default_hasher = hasher
@@ -1,23 +1,35 @@
-import google.generativeai as genai
 import os
-import threading
-
-gemini_lock = threading.Lock()
+from llmpool import generate
+from llmbatch import render_batch_prompt, parse_verdicts, TOKENS_PER_VERDICT
+from llmcache import memoized
 
 def check_message(api_key, message: str) -> str:
     if len(message) == 0:
         return None
     else:
-        with gemini_lock:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            prompt = f'''
+        prompt = f'''
 Analyze the following firewall modification event message and determine if it indicates a suspicious or potentially malicious change.
 Consider factors such as the type of change, the user who made it, and any unusual parameters.
 Respond with 'suspicious' if it seems concerning, or 'normal' if it appears to be a legitimate change.
 Event Message: {message}
 '''
-            response = model.generate_content(prompt)
-        return response.text
-    
+        # Quota errors surface as keyscheduler.RateLimited for the caller to re-queue
+        return memoized('firewall', {'message': message},
+                        lambda: generate(api_key, prompt, model="gemini-1.5-flash").strip().lower())
+
+
+def check_messages_batch(api_key, messages):
+    """
+    Classify many firewall modification messages in one call.
 
+    :param messages: {id: {'message': ...}}
+    :return: {id: 'suspicious' | 'normal'} for every message the model answered;
+             raises llmbatch.BatchParseError if the answer is not a JSON array.
+    """
+    prompt = render_batch_prompt(
+        "Analyze each firewall modification event message below and determine if it indicates a suspicious or potentially malicious change.\n"
+        "Consider factors such as the type of change, the user who made it, and any unusual parameters.",
+        messages, ('suspicious', 'normal'))
+    response = generate(api_key, prompt, model="gemini-1.5-flash",
+                        max_output_tokens=TOKENS_PER_VERDICT * len(messages) + 50)
+    return parse_verdicts(response, messages.keys(), ('suspicious', 'normal'))
@@ -1,38 +1,46 @@
-import google.generativeai as genai
 import os
-import time
-import threading
-
-gemini_lock = threading.Lock()
+from llmpool import generate
+from keyscheduler import RateLimited, is_quota_error, retry_after_from_error
+from llmbatch import render_batch_prompt, parse_verdicts, TOKENS_PER_VERDICT
+from llmcache import lookup, store
 
 def check_Startup(api_key, key, name, command: str) -> str:
     if not command or not isinstance(command, str):
         return 'normal'
+    payload = {'key': key, 'name': name, 'command': command}
+    cached = lookup('startup', payload)
+    if cached is not None:
+        return cached
     prompt = f"Is this Windows startup suspicious? Respond with 'suspicious' or 'normal'. key:{key}, name:{name} Command: {command}"
     try:
-        with gemini_lock:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=50,
-                    temperature=0.0
-                )
-            )
-        result = response.text.strip().lower()
-        if result == 'suspicious':
-            return 'suspicious'
-        elif result == 'normal':
-            return 'normal'
+        response = generate(api_key, prompt, model='gemini-1.5-flash', max_output_tokens=50, temperature=0.0)
+        result = response.strip().lower()
+        if result in ('suspicious', 'normal'):
+            store('startup', payload, result)
+            return result
         else:
             print(f"Unexpected Gemini API response for command '{command}': {result}")
             return 'normal'
+    except RateLimited:
+        raise
     except Exception as e:
-        error_msg = str(e).lower()
         print(f"Error calling Gemini API for command '{command}': {str(e)}")
-        if 'quota' in error_msg or 'limit' in error_msg or '429' in error_msg:
-            print("Quota or rate limit exceeded. Retrying after delay...")
-            time.sleep(60)
-            return 'normal'
-        return 'normal'
\ No newline at end of file
+        if is_quota_error(e):
+            # Let the key scheduler park this key and re-queue the entry
+            raise RateLimited(str(e), retry_after_from_error(e))
+        return 'normal'
+
+def check_Startup_batch(api_key, entries):
+    """
+    Classify many startup entries in one call.
+
+    :param entries: {id: {'key': ..., 'name': ..., 'command': ...}}
+    :return: {id: 'suspicious' | 'normal'} for every entry the model answered;
+             raises llmbatch.BatchParseError if the answer is not a JSON array.
+    """
+    prompt = render_batch_prompt(
+        "Decide for each Windows startup entry (registry Run/RunOnce value) below whether it is suspicious.",
+        entries, ('suspicious', 'normal'))
+    response = generate(api_key, prompt, model='gemini-1.5-flash',
+                        max_output_tokens=TOKENS_PER_VERDICT * len(entries) + 50, temperature=0.0)
+    return parse_verdicts(response, entries.keys(), ('suspicious', 'normal'))
\ No newline at end of file
@@ -1,23 +1,19 @@
-import google.generativeai as genai
 import os
-import threading
-
-gemini_lock = threading.Lock()
+import json
+from llmpool import generate
+from llmcache import memoized
 
 # Existing check_content function (included for reference, assumed from gemini.py)
 def check_content3(api_key, message):
     if len(message) == 0:
         return None
     else:
-        with gemini_lock:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            # Fix the prompt syntax from the original (remove nested f-string)
-            prompt = f'''
-You are a senior cybersecurity analyst. Here is a list of observed Windows system Event IDs from the newest to oldest:
-{message}
+        # Fix the prompt syntax from the original (remove nested f-string)
+        prompt = f'''
+You are a senior cybersecurity analyst. Here is a summary of observed Windows system events, grouped by Event ID. For each ID it gives the number of events, when it was first and last seen, the most events in any one hour, and the most common users, IP addresses, logon types or providers:
+{json.dumps(message, indent=1)}
 
-Your task is to analyze these IDs and respond with a single, response with valid JSON object only that contains the following keys:
+Your task is to analyze these events and respond with a single, response with valid JSON object only that contains the following keys:
 
 • is_attack: true if these events form a coherent multi-stage attack, false otherwise  
 • threat_level: one of "Low", "Medium", "High", or "Critical"  
@@ -25,5 +21,4 @@ Your task is to analyze these IDs and respond with a single, response with valid
 • behaviour: a brief narrative that ties together what these event IDs reveal about the attacker’s behavior  
 • evidence_events: an object mapping each Event ID (as a string) to a one-sentence description of what that event signifies
 '''
-            response = model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        return memoized('system_events', message, lambda: generate(api_key, prompt, model="gemini-1.5-flash"))
\ No newline at end of file
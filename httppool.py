@@ -0,0 +1,91 @@
+import atexit
+import asyncio
+import threading
+import aiohttp
+
+# Keep-alive pool shared by every async client in the process
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 10
+
+_loop = None
+_thread = None
+_session = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Event loop running on a daemon thread, started on first use."""
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _thread = threading.Thread(target=loop.run_forever, name="httppool", daemon=True)
+                _thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """
+    Run ``coro`` on the shared loop and block for its result.
+
+    This is how the synchronous wrappers reuse pooled connections from
+    ordinary threads (e.g. ThreadPoolExecutor workers).
+    """
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync() called from the httppool loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def get_session():
+    """
+    Pooled aiohttp session bound to the shared loop.
+
+    Must be called from a coroutine running on get_loop(); connections are
+    kept alive between requests so repeat lookups skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+    return _session
+
+
+async def _close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def close():
+    """Close pooled connections and stop the background loop."""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_close_session(), loop).result(5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        _loop = None
+        _thread = None
+
+
+atexit.register(close)
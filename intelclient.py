@@ -0,0 +1,243 @@
+import os
+import asyncio
+import logging
+import threading
+from httppool import get_session, run_sync
+from verdictcache import get_verdict_cache, FAILED
+from keyscheduler import get_scheduler, RateLimited, parse_retry_after
+
+ABUSEIPDB_KEY = "API of abuseipdb"
+
+PROVIDER_URLS = {
+    "abuseipdb": "https://api.abuseipdb.com",
+    "virustotal": "https://www.virustotal.com",
+    "alienvault": "https://otx.alienvault.com",
+}
+
+# Requests allowed in flight per provider
+PROVIDER_LIMITS = {
+    "abuseipdb": 10,
+    "virustotal": 4,
+    "alienvault": 10,
+}
+
+
+def combine_ip_verdicts(results):
+    """Majority vote over the per-source verdicts, as check_ip_reputation always did."""
+    if results.count("malicious") >= 2:
+        return "malicious"
+    if results.count("safe") >= 2:
+        return "safe"
+    return "unknown"
+
+
+def decide_hash(file_hash, vt_result):
+    """Turn a VirusTotal file verdict into scan_hash_and_decide's (bool, message)."""
+    decision = vt_result if vt_result in ("malicious", "safe") else "unknown"
+    report_url = f"https://www.virustotal.com/gui/file/{file_hash}" if vt_result != "unknown" else ""
+    return (decision == "malicious", f"Decision: {decision}, Report: {report_url}")
+
+
+def _as_keys(api_keys):
+    return [api_keys] if isinstance(api_keys, str) else list(api_keys)
+
+
+class IntelClient:
+    """
+    Async AbuseIPDB / VirusTotal / AlienVault OTX client.
+
+    Requests share the keep-alive pool from httppool, each provider has its
+    own concurrency limit, and verdicts go through the persistent verdict
+    cache. Keyed providers draw their keys from keyscheduler so per-key
+    quotas are respected and 429s are re-queued on another key. Set
+    FORENSIEGHT_INTEL_URL (or pass base_urls) to send every provider to a
+    local mock server such as mockintel.py.
+    """
+
+    def __init__(self, base_urls=None, limits=None, abuseipdb_key=ABUSEIPDB_KEY, cache=None, schedulers=None):
+        override = os.environ.get("FORENSIEGHT_INTEL_URL")
+        if override:
+            self.base_urls = {provider: override.rstrip('/') for provider in PROVIDER_URLS}
+        else:
+            self.base_urls = dict(PROVIDER_URLS)
+        self.base_urls.update(base_urls or {})
+        self.limits = dict(PROVIDER_LIMITS, **(limits or {}))
+        self.abuseipdb_key = abuseipdb_key
+        self._cache = cache
+        self._schedulers = dict(schedulers or {})
+        self._semaphores = {}
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_verdict_cache()
+
+    def _scheduler(self, provider):
+        return self._schedulers.get(provider) or get_scheduler(provider)
+
+    def _semaphore(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(self.limits[provider])
+        return semaphore
+
+    async def _get_json(self, provider, path, headers=None, raise_for_status=False):
+        async with self._semaphore(provider):
+            async with get_session().get(self.base_urls[provider] + path, headers=headers) as response:
+                if response.status == 429:
+                    raise RateLimited(f"{provider} returned 429",
+                                      parse_retry_after(response.headers.get("Retry-After")))
+                if raise_for_status:
+                    response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def _in_cache(self, method, *args):
+        """Run a blocking VerdictCache method (SQLite) off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: getattr(self.cache, method)(*args))
+
+    async def _cached(self, indicator, source, fetch):
+        cached = await self._in_cache("get", indicator, source)
+        if cached is not None:
+            return "unknown" if cached == FAILED else cached
+        try:
+            verdict = await fetch()
+        except RateLimited:
+            # Throttling says nothing about the indicator; leave it uncached
+            raise
+        except Exception as e:
+            logging.debug(f"{source} lookup failed for {indicator}: {e}")
+            await self._in_cache("put_failure", indicator, source)
+            return "unknown"
+        await self._in_cache("put", indicator, source, verdict)
+        return verdict
+
+    async def check_abuseipdb(self, ip):
+        async def query(key):
+            headers = {"Key": key, "Accept": "application/json"}
+            data = await self._get_json("abuseipdb", f"/api/v2/check?ipAddress={ip}", headers)
+            return "malicious" if data["data"]["abuseConfidenceScore"] > 50 else "safe"
+
+        async def fetch():
+            return await self._scheduler("abuseipdb").call_async(query, [self.abuseipdb_key])
+        return await self._cached(ip, "abuseipdb", fetch)
+
+    async def check_virustotal_ip(self, ip, api_keys):
+        async def query(key):
+            data = await self._get_json("virustotal", f"/api/v3/ip_addresses/{ip}", {"x-apikey": key})
+            positives = data["data"]["attributes"]["last_analysis_stats"]["malicious"]
+            return "malicious" if positives > 0 else "safe"
+
+        async def fetch():
+            return await self._scheduler("virustotal").call_async(query, _as_keys(api_keys))
+        return await self._cached(ip, "virustotal_ip", fetch)
+
+    async def check_alienvault(self, ip):
+        async def fetch():
+            data = await self._get_json("alienvault", f"/api/v1/indicators/IPv4/{ip}/general")
+            pulses = len(data.get("pulse_info", {}).get("pulses", []))
+            return "malicious" if pulses > 0 else "safe"
+        return await self._cached(ip, "alienvault", fetch)
+
+    async def check_ip_reputation(self, ip, api_keys):
+        """
+        Query the three sources concurrently and combine their votes.
+
+        Raises RateLimited when a throttled source leaves the vote undecided.
+        """
+        results = await asyncio.gather(
+            self.check_abuseipdb(ip),
+            self.check_virustotal_ip(ip, api_keys),
+            self.check_alienvault(ip),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, RateLimited):
+                raise result
+        verdict = combine_ip_verdicts([r for r in results if isinstance(r, str)])
+        throttled = [r for r in results if isinstance(r, RateLimited)]
+        if throttled and verdict == "unknown":
+            raise throttled[0]
+        return verdict
+
+    async def check_file_hash(self, file_hash, api_keys, retries=3):
+        async def query(key):
+            data = await self._get_json("virustotal", f"/api/v3/files/{file_hash}",
+                                        {"x-apikey": key}, raise_for_status=True)
+            detections = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {}).get("malicious", 0)
+            return "malicious" if detections > 5 else "safe"
+
+        async def fetch():
+            for attempt in range(retries):
+                try:
+                    return await self._scheduler("virustotal").call_async(query, _as_keys(api_keys))
+                except RateLimited:
+                    raise  # already re-queued by the scheduler
+                except Exception as e:
+                    if attempt < retries - 1:
+                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                        continue
+                    print(f"VirusTotal error for {file_hash}: {e}")
+                    raise
+        return await self._cached(file_hash, "virustotal_file", fetch)
+
+    async def scan_hash(self, file_hash, api_keys):
+        return decide_hash(file_hash, await self.check_file_hash(file_hash, api_keys))
+
+    async def check_ips(self, ips, api_keys):
+        """
+        Reputation for many IPs at once; returns {ip: verdict}.
+
+        An IP whose lookup stayed throttled maps to the RateLimited error
+        rather than to "unknown"; any other failure is "unknown".
+        """
+        ips = sorted(ips)
+        results = await asyncio.gather(
+            *(self.check_ip_reputation(ip, api_keys) for ip in ips),
+            return_exceptions=True,
+        )
+        return {
+            ip: (r if isinstance(r, RateLimited) else "unknown" if isinstance(r, Exception) else r)
+            for ip, r in zip(ips, results)
+        }
+
+    async def scan_hashes(self, hashes, api_keys):
+        """
+        Scan many hashes at once; returns {hash: (is_malicious, message)}.
+
+        A scan that raised maps to its exception so callers can report it.
+        """
+        hashes = sorted(hashes)
+        results = await asyncio.gather(
+            *(self.scan_hash(h, api_keys) for h in hashes),
+            return_exceptions=True,
+        )
+        return dict(zip(hashes, results))
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_intel_client():
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = IntelClient()
+    return _default_client
+
+
+def set_intel_client(client):
+    global _default_client
+    with _default_lock:
+        _default_client = client
+
+
+def check_ips(ips, api_keys):
+    """Blocking batch IP lookup on the shared pool."""
+    return run_sync(get_intel_client().check_ips(ips, api_keys))
+
+
+def scan_hashes(hashes, api_keys):
+    """Blocking batch hash scan on the shared pool."""
+    return run_sync(get_intel_client().scan_hashes(hashes, api_keys))
@@ -0,0 +1,196 @@
+import bisect
+import ipaddress
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from ruleengine import get_rules
+
+# Address classes checked for every IP; IPv4-mapped IPv6 addresses are
+# classified by their IPv4 address
+CLASS_NETWORKS = {
+    "private": ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "fc00::/7"],
+    "loopback": ["127.0.0.0/8", "::1/128"],
+    "link_local": ["169.254.0.0/16", "fe80::/10"],
+    "unspecified": ["0.0.0.0/32", "::/128"],
+}
+# Classes that never need a reputation lookup
+LOCAL_CLASSES = ("private", "loopback", "link_local", "unspecified")
+
+_V4_OCTETS = r'^(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.' \
+             r'(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)$'
+
+
+class NetworkSet:
+    """
+    CIDR blocks merged into sorted disjoint [start, end] intervals.
+
+    IPv4 bounds are int64 NumPy arrays and IPv6 bounds are object arrays of
+    Python ints, so membership for a whole array of addresses is a single
+    searchsorted per family.
+    """
+
+    def __init__(self, networks=()):
+        intervals = {4: [], 6: []}
+        for network in networks:
+            network = ipaddress.ip_network(network, strict=False)
+            intervals[network.version].append((int(network.network_address), int(network.broadcast_address)))
+        self._starts, self._ends = {}, {}
+        for version, spans in intervals.items():
+            merged = []
+            for start, end in sorted(spans):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            dtype = np.int64 if version == 4 else object
+            self._starts[version] = np.array([s for s, _ in merged], dtype=dtype)
+            self._ends[version] = np.array([e for _, e in merged], dtype=dtype)
+        self._spans = {version: (self._starts[version].tolist(), self._ends[version].tolist())
+                       for version in intervals}
+
+    def contains(self, version, addresses):
+        """Boolean array: which of ``addresses`` (ints of one IP version) fall in the set."""
+        starts, ends = self._starts[version], self._ends[version]
+        if len(starts) == 0 or len(addresses) == 0:
+            return np.zeros(len(addresses), dtype=bool)
+        i = np.searchsorted(starts, addresses, side='right') - 1
+        inside = i >= 0
+        inside[inside] = addresses[inside] <= ends[i[inside]]
+        return inside
+
+    def contains_address(self, version, value):
+        starts, ends = self._spans[version]
+        i = bisect.bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+    def __contains__(self, ip):
+        address = _parse_one(ip)
+        return address is not None and self.contains_address(*address)
+
+
+def _parse_one(ip):
+    """(version, int) for an address string, or None if it is not an IP address."""
+    try:
+        address = ipaddress.ip_address(str(ip).strip())
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.version, int(address)
+
+
+def parse_ips(values):
+    """
+    Parse a column of address strings once.
+
+    Returns (codes, versions, v4, v6): ``codes`` maps each row to a distinct
+    value; for the distinct values ``versions`` is 4, 6 or 0 (not an IP),
+    ``v4`` holds IPv4 addresses as int64 and ``v6`` IPv6 addresses as Python
+    ints. Dotted-quad IPv4 is parsed with vectorized string ops; only the
+    remaining values go through the ipaddress module.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna('').astype(str).str.strip())
+    uniques = pd.Series(uniques, dtype=object)
+    versions = np.zeros(len(uniques), dtype=np.int8)
+    v4 = np.zeros(len(uniques), dtype=np.int64)
+    v6 = np.zeros(len(uniques), dtype=object)
+
+    octets = uniques.str.extract(_V4_OCTETS)
+    dotted = octets.notna().all(axis=1).to_numpy()
+    if dotted.any():
+        parts = octets[dotted].astype(np.int64).to_numpy()
+        v4[dotted] = (parts[:, 0] << 24) | (parts[:, 1] << 16) | (parts[:, 2] << 8) | parts[:, 3]
+        versions[dotted] = 4
+    for i in np.flatnonzero(~dotted & (uniques != '').to_numpy()):
+        address = _parse_one(uniques[i])
+        if address is not None:
+            versions[i] = address[0]
+            if address[0] == 4:
+                v4[i] = address[1]
+            else:
+                v6[i] = address[1]
+    return codes, versions, v4, v6
+
+
+def _membership(network_set, versions, v4, v6):
+    hits = np.zeros(len(versions), dtype=bool)
+    for version, addresses in ((4, v4), (6, v6)):
+        mask = versions == version
+        if mask.any():
+            hits[mask] = network_set.contains(version, addresses[mask])
+    return hits
+
+
+class IPClassifier:
+    """Private / loopback / link-local / unspecified / allowlist tests over whole columns."""
+
+    def __init__(self, allowlist=()):
+        self.classes = {name: NetworkSet(networks) for name, networks in CLASS_NETWORKS.items()}
+        self.allowlist = NetworkSet(allowlist)
+
+    def classify(self, values):
+        """
+        Frame with one row per value and boolean columns 'valid', 'private',
+        'loopback', 'link_local', 'unspecified', 'allowlisted', 'internal'
+        (private, loopback or link-local) and 'local' (any of the local
+        classes or allowlisted), plus the IP 'version'.
+        """
+        codes, versions, v4, v6 = parse_ips(values)
+        columns = {'version': versions, 'valid': versions > 0}
+        for name, network_set in self.classes.items():
+            columns[name] = _membership(network_set, versions, v4, v6)
+        columns['allowlisted'] = _membership(self.allowlist, versions, v4, v6)
+        columns['internal'] = columns['private'] | columns['loopback'] | columns['link_local']
+        columns['local'] = np.logical_or.reduce([columns[name] for name in LOCAL_CLASSES + ('allowlisted',)])
+        per_value = pd.DataFrame(columns)
+        index = values.index if isinstance(values, pd.Series) else None
+        result = per_value.iloc[codes].reset_index(drop=True)
+        if index is not None:
+            result.index = index
+        return result
+
+    def is_local(self, ip):
+        address = _parse_one(ip)
+        if address is None:
+            return False
+        return any(self.classes[name].contains_address(*address) for name in LOCAL_CLASSES) \
+            or self.allowlist.contains_address(*address)
+
+    def is_internal(self, ip):
+        """Private, loopback or link-local."""
+        address = _parse_one(ip)
+        return address is not None and any(
+            self.classes[name].contains_address(*address) for name in ("private", "loopback", "link_local"))
+
+
+_cached = (None, None)
+_cached_lock = threading.Lock()
+
+
+def get_ip_classifier():
+    """IPClassifier with the current ruleset's network allowlist, rebuilt on rule reloads."""
+    global _cached
+    rules = get_rules()
+    with _cached_lock:
+        if _cached[0] is not rules:
+            _cached = (rules, IPClassifier(rules.network_allowlist))
+            _is_local.cache_clear()
+        return _cached[1]
+
+
+@lru_cache(maxsize=65536)
+def _is_local(classifier, ip):
+    # Keyed on the classifier too, so a call racing a rule reload cannot
+    # cache the old allowlist's answer under the new one
+    return classifier.is_local(ip)
+
+
+def is_local_ip(ip):
+    """Scalar check for one address; results are memoized."""
+    return _is_local(get_ip_classifier(), str(ip))
+
+
+def classify_ips(values):
+    """Classify a column of addresses with the shared classifier (see IPClassifier.classify)."""
+    return get_ip_classifier().classify(values)
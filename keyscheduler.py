@@ -0,0 +1,224 @@
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+
+# Free-tier quotas: (requests per minute, requests per day)
+PROVIDER_RATES = {
+    "virustotal": (4, 500),
+    "abuseipdb": (60, 1000),
+    "gemini": (15, 1500),
+}
+DEFAULT_RETRY_AFTER = 60
+# A throttle longer than this (e.g. an exhausted daily quota) is not waited out
+MAX_REQUEUE_WAIT = 300
+MAX_REQUEUES = 5
+
+
+class RateLimited(Exception):
+    """Raised by a provider call that was throttled (HTTP 429 / quota exceeded)."""
+
+    def __init__(self, message="rate limited", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Cancelled(Exception):
+    """Raised by acquire()/call() when their ``cancel`` event is set while waiting."""
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header value, or None if it is missing or unparsable."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error):
+    """Best-effort retry delay from a provider error message ('retry in 23s', 'seconds: 23')."""
+    match = re.search(r'retry in ([\d.]+)\s*s|seconds:\s*(\d+)', str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+def is_quota_error(error):
+    message = str(error).lower()
+    return 'quota' in message or 'limit' in message or '429' in message
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain(self, now):
+        self._refill(now)
+        self.tokens = min(self.tokens, 0)
+
+
+class KeyScheduler:
+    """
+    Hands out API keys from a pool according to each key's remaining quota.
+
+    Every key has a per-minute and an optional per-day token bucket. acquire()
+    returns the key with the most headroom, waiting only when every key is
+    exhausted; throttle() parks a key for its Retry-After period after a 429.
+    The scheduler is thread-safe and has an asyncio variant of acquire().
+    """
+
+    def __init__(self, rate_per_minute, per_day=None, burst=None, keys=()):
+        self.rate_per_minute = rate_per_minute
+        self.per_day = per_day
+        self.burst = burst or max(1, int(rate_per_minute))
+        self._minute = {}
+        self._day = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+        self.add_keys(keys)
+
+    def add_keys(self, keys):
+        with self._lock:
+            for key in keys:
+                if key in self._minute:
+                    continue
+                self._minute[key] = TokenBucket(self.rate_per_minute / 60.0, self.burst)
+                if self.per_day:
+                    self._day[key] = TokenBucket(self.per_day / 86400.0, self.per_day)
+                self._blocked_until[key] = 0.0
+
+    def _wait_for(self, key, now):
+        wait = max(self._blocked_until[key] - now, self._minute[key].wait_time(now))
+        if key in self._day:
+            wait = max(wait, self._day[key].wait_time(now))
+        return wait
+
+    def try_acquire(self, keys=None):
+        """Return (key, 0) if a key is available now, else (None, seconds until one is)."""
+        keys = list(keys) if keys is not None else None
+        if keys:
+            self.add_keys(keys)
+        with self._lock:
+            candidates = keys or list(self._minute)
+            if not candidates:
+                raise ValueError("no API keys configured")
+            now = time.monotonic()
+            waits = {key: self._wait_for(key, now) for key in candidates}
+            ready = [key for key, wait in waits.items() if wait <= 0]
+            if not ready:
+                return None, min(waits.values())
+            # Most headroom first; random tie-break spreads load across equal keys
+            best = max(ready, key=lambda k: (self._minute[k].tokens, random.random()))
+            self._minute[best].take(now)
+            if best in self._day:
+                self._day[best].take(now)
+            return best, 0.0
+
+    def acquire(self, keys=None, timeout=None, cancel=None):
+        """Block until a key has headroom and return it; a set ``cancel`` event raises Cancelled."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            key, wait = self.try_acquire(keys)
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("no API key became available in time")
+            if cancel is not None:
+                cancel.wait(min(wait, 5.0))
+            else:
+                time.sleep(min(wait, 5.0))
+
+    async def acquire_async(self, keys=None, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            key, wait = self.try_acquire(keys)
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("no API key became available in time")
+            await asyncio.sleep(min(wait, 5.0))
+
+    def throttle(self, key, retry_after=None):
+        """Park ``key`` after a 429 until Retry-After (or DEFAULT_RETRY_AFTER) passes."""
+        delay = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), now + delay)
+            if key in self._minute:
+                self._minute[key].drain(now)
+        logging.info(f"API key ...{str(key)[-4:]} throttled for {delay:.0f}s")
+
+    def call(self, func, keys=None, max_requeues=MAX_REQUEUES, cancel=None):
+        """
+        Run ``func(key)`` with a scheduled key, re-queuing it on RateLimited.
+
+        The throttled key is parked and the call retried on whichever key has
+        headroom next, so throttled work is delayed rather than dropped. When
+        no key frees up within MAX_REQUEUE_WAIT the call raises RateLimited.
+        Setting the ``cancel`` event stops a call still waiting for a key.
+        """
+        for attempt in range(max_requeues + 1):
+            try:
+                key = self.acquire(keys, timeout=MAX_REQUEUE_WAIT, cancel=cancel)
+            except TimeoutError as e:
+                raise RateLimited(str(e)) from e
+            try:
+                return func(key)
+            except RateLimited as e:
+                self.throttle(key, e.retry_after)
+                if attempt == max_requeues or (e.retry_after or 0) > MAX_REQUEUE_WAIT:
+                    raise
+
+    async def call_async(self, func, keys=None, max_requeues=MAX_REQUEUES):
+        """Async version of call(); ``func(key)`` must return an awaitable."""
+        for attempt in range(max_requeues + 1):
+            try:
+                key = await self.acquire_async(keys, timeout=MAX_REQUEUE_WAIT)
+            except TimeoutError as e:
+                raise RateLimited(str(e)) from e
+            try:
+                return await func(key)
+            except RateLimited as e:
+                self.throttle(key, e.retry_after)
+                if attempt == max_requeues or (e.retry_after or 0) > MAX_REQUEUE_WAIT:
+                    raise
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider):
+    """Process-wide scheduler for ``provider`` using PROVIDER_RATES."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            per_minute, per_day = PROVIDER_RATES.get(provider, (60, None))
+            scheduler = _schedulers[provider] = KeyScheduler(per_minute, per_day)
+        return scheduler
+
+
+def set_scheduler(provider, scheduler):
+    with _schedulers_lock:
+        _schedulers[provider] = scheduler
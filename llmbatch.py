@@ -0,0 +1,171 @@
+import re
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from keyscheduler import get_scheduler, RateLimited, Cancelled
+from llmpool import get_llm_pool
+from llmcache import lookup, store, payload_key
+
+# Prompt tokens allowed per batch (excluding the instructions) and a hard item cap
+BATCH_TOKEN_BUDGET = 6000
+MAX_BATCH_ITEMS = 100
+# Output tokens reserved per verdict in a batch answer
+TOKENS_PER_VERDICT = 16
+
+
+class BatchParseError(ValueError):
+    pass
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used to size batches."""
+    return len(text) // 4 + 1
+
+
+def pack_batches(items, token_budget=BATCH_TOKEN_BUDGET, max_items=MAX_BATCH_ITEMS):
+    """
+    Split ``items`` ({id: payload dict}) into batches that fit the token budget.
+
+    Short items pack densely; an item larger than the budget gets a batch of
+    its own.
+    """
+    batches, current, used = [], {}, 0
+    for item_id, payload in items.items():
+        cost = estimate_tokens(json.dumps(payload))
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = {}, 0
+        current[item_id] = payload
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def render_batch_prompt(instructions, batch, verdicts):
+    """Structured prompt: instructions, answer format, then the items as a JSON array."""
+    items = [dict(payload, id=item_id) for item_id, payload in batch.items()]
+    allowed = " or ".join(f'"{v}"' for v in verdicts)
+    return (
+        f"{instructions}\n"
+        f"Respond with only a JSON array containing one object per item, in the form "
+        f'{{"id": <item id>, "verdict": {allowed}}}. Do not add any other text.\n'
+        f"Items:\n{json.dumps(items, ensure_ascii=False)}"
+    )
+
+
+def parse_verdicts(text, ids, verdicts):
+    """
+    Parse a batch answer into {id: verdict}.
+
+    Tolerates markdown code fences and surrounding prose; raises
+    BatchParseError when no JSON array can be recovered. Ids that are missing
+    or carry an unexpected verdict are left out so the caller can retry them
+    one by one.
+    """
+    text = re.sub(r"```(?:json)?", "", text or "")
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        raise BatchParseError("no JSON array in batch response")
+    try:
+        answers = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise BatchParseError(f"invalid JSON in batch response: {e}")
+    wanted = {str(i): i for i in ids}
+    result = {}
+    for answer in answers if isinstance(answers, list) else []:
+        if not isinstance(answer, dict):
+            continue
+        item_id = wanted.get(str(answer.get("id")))
+        verdict = str(answer.get("verdict", "")).strip().lower()
+        if item_id is not None and verdict in verdicts:
+            result[item_id] = verdict
+    return result
+
+
+def _classify(items, classify_batch, classify_one, gemini_keys, token_budget, max_workers, cache_kind):
+    scheduler = get_scheduler("gemini")
+    batches = pack_batches(items, token_budget)
+    logging.info(f"Classifying {len(items)} items in {len(batches)} LLM batches")
+
+    stop = threading.Event()
+
+    def run(batch):
+        # Only an unusable answer falls back to per-item calls; a throttled or
+        # failed request would fail the same way once per item, so it is raised
+        try:
+            verdicts = scheduler.call(lambda api_key: classify_batch(api_key, batch), gemini_keys, cancel=stop)
+        except BatchParseError as e:
+            logging.warning(f"Batch answer unusable, falling back to per-item calls: {e}")
+            verdicts = {}
+        if cache_kind:
+            for item_id, verdict in verdicts.items():
+                store(cache_kind, batch[item_id], verdict)
+        for item_id, payload in batch.items():
+            if item_id in verdicts:
+                continue
+            try:
+                verdicts[item_id] = scheduler.call(lambda api_key: classify_one(api_key, payload), gemini_keys,
+                                                   cancel=stop)
+            except (RateLimited, Cancelled):
+                raise
+            except Exception as e:
+                logging.error(f"Error classifying item {item_id}: {e}")
+        return verdicts
+
+    results = {}
+    workers = max_workers or get_llm_pool().max_parallel(gemini_keys)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches) or 1)))
+    try:
+        for future in as_completed([executor.submit(run, batch) for batch in batches]):
+            results.update(future.result())
+    except Exception:
+        # The key pool is exhausted or failing: cancel the batches not started
+        # and stop running ones that are still waiting for a parked key
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return results
+
+
+def classify_batched(items, classify_batch, classify_one, gemini_keys,
+                     token_budget=BATCH_TOKEN_BUDGET, max_workers=None, cache_kind=None):
+    """
+    Classify ``items`` ({id: payload}) with as few LLM round trips as possible.
+
+    ``classify_batch(api_key, batch)`` returns {id: verdict} for one batch and
+    ``classify_one(api_key, payload)`` classifies a single item; it is used for
+    whatever a batch answer failed to cover (an answer that cannot be parsed,
+    or ids missing from it). A batch request that still fails after the
+    scheduler's re-queues (RateLimited, network errors) is raised, and
+    batches not yet started are cancelled. Keys come from the Gemini
+    scheduler and batches run in parallel across the key pool.
+
+    With ``cache_kind`` (see llmcache.PROMPT_VERSIONS) cached verdicts are
+    reused, items whose normalized payloads are identical are sent once, and
+    verdicts from batch answers are written back to the cache (single-item
+    calls cache their own answers).
+    """
+    if not cache_kind:
+        return _classify(items, classify_batch, classify_one, gemini_keys, token_budget, max_workers, None)
+
+    results, duplicates, pending = {}, {}, {}
+    for item_id, payload in items.items():
+        cached = lookup(cache_kind, payload)
+        if cached is not None:
+            results[item_id] = cached
+            continue
+        key = payload_key(payload)
+        if key not in duplicates:
+            duplicates[key] = []
+            pending[item_id] = payload
+        duplicates[key].append(item_id)
+    logging.info(f"{len(results)} of {len(items)} items answered from the LLM cache")
+    if pending:
+        verdicts = _classify(pending, classify_batch, classify_one, gemini_keys, token_budget, max_workers, cache_kind)
+        for item_id, verdict in verdicts.items():
+            for duplicate in duplicates[payload_key(pending[item_id])]:
+                results[duplicate] = verdict
+    return results
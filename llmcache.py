@@ -0,0 +1,75 @@
+import re
+import json
+import hashlib
+import logging
+from verdictcache import get_verdict_cache, DAY
+from llmpool import DEFAULT_MODEL
+
+# Bump a version whenever its prompt changes so stale answers are not reused
+PROMPT_VERSIONS = {
+    "startup": 1,
+    "firewall": 1,
+    "security_events": 3,
+    "application_events": 2,
+    "system_events": 2,
+    "security_events_chunk": 2,
+    "application_events_chunk": 2,
+    "system_events_chunk": 2,
+}
+# Model answers do not go stale the way reputation data does
+LLM_TTL = 14 * DAY
+
+_USER_PATH = re.compile(r'([a-z]:\\(?:users|documents and settings)\\)[^\\/"\s]+', re.IGNORECASE)
+_SID = re.compile(r'S-1-5-21(?:-\d+){3,4}', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """
+    Canonical form of a prompt input: per-user profile paths and SIDs are
+    replaced with placeholders, case is folded and whitespace collapsed, so
+    the same OneDrive updater on two hosts hashes to the same key.
+    """
+    text = _USER_PATH.sub(r'\1<user>', str(text))
+    text = _SID.sub('<sid>', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def payload_key(payload):
+    """sha256 of the normalized payload (a string or a JSON-serialisable structure)."""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(normalize(payload).encode('utf-8')).hexdigest()
+
+
+def cache_source(kind, model=DEFAULT_MODEL):
+    return f"gemini:{model}:{kind}:v{PROMPT_VERSIONS.get(kind, 1)}"
+
+
+def lookup(kind, payload, model=DEFAULT_MODEL, cache=None):
+    """Cached model answer for ``payload``, or None."""
+    cache = cache or get_verdict_cache()
+    return cache.get(payload_key(payload), cache_source(kind, model))
+
+
+def store(kind, payload, answer, model=DEFAULT_MODEL, cache=None, ttl=LLM_TTL):
+    if answer is None:
+        return
+    cache = cache or get_verdict_cache()
+    cache.put(payload_key(payload), cache_source(kind, model), answer, ttl=ttl)
+
+
+def memoized(kind, payload, compute, model=DEFAULT_MODEL, cache=None):
+    """
+    Return the cached answer for ``payload`` or call ``compute()`` and cache it.
+
+    Exceptions from ``compute`` propagate and nothing is cached, so a failed
+    or throttled call is retried next time.
+    """
+    answer = lookup(kind, payload, model, cache)
+    if answer is not None:
+        logging.debug(f"LLM cache hit ({kind})")
+        return answer
+    answer = compute()
+    store(kind, payload, answer, model, cache)
+    return answer
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import asyncio
+import threading
+import aiohttp
+from httppool import get_session, run_sync
+from keyscheduler import RateLimited, parse_retry_after
+
+GEMINI_URL = "https://generativelanguage.googleapis.com"
+DEFAULT_MODEL = "gemini-1.5-flash"
+# Requests each key may have in flight at once
+PER_KEY_CONCURRENCY = 4
+REQUEST_TIMEOUT = 60
+
+
+class GeminiError(Exception):
+    pass
+
+
+def _error_detail(text):
+    """The error message from a Gemini error body, or the start of the raw body if it is not JSON."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text[:500]
+    error = data.get("error") if isinstance(data, dict) else None
+    if isinstance(error, dict) and error.get("message"):
+        return error["message"]
+    return text[:500]
+
+
+def _retry_delay(text):
+    """Gemini reports the delay as RetryInfo.retryDelay, e.g. "23s"; None if absent."""
+    match = re.search(r'"retryDelay":\s*"([\d.]+)s"', text)
+    return float(match.group(1)) if match else None
+
+
+class _KeyClient:
+    """One API key and the number of requests it may have in flight."""
+
+    def __init__(self, api_key, concurrency):
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created lazily so it binds to the httppool loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+
+class GeminiPool:
+    """
+    Per-key Gemini clients over the shared keep-alive connection pool.
+
+    Unlike genai.configure(), which sets one process-global key, every call
+    carries its own key, so requests on different keys (and up to
+    ``per_key_concurrency`` on the same key) run in parallel. generate() is
+    the blocking entry point for worker threads; generate_async() is the
+    coroutine behind it. FORENSIEGHT_GEMINI_URL points the pool at a fake
+    endpoint such as the one in mockintel.py.
+    """
+
+    def __init__(self, base_url=None, per_key_concurrency=PER_KEY_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+        self.base_url = (base_url or os.environ.get("FORENSIEGHT_GEMINI_URL") or GEMINI_URL).rstrip('/')
+        self.per_key_concurrency = per_key_concurrency
+        self.timeout = timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, api_key):
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = self._clients[api_key] = _KeyClient(api_key, self.per_key_concurrency)
+            return client
+
+    def max_parallel(self, api_keys):
+        """How many requests the pool can have in flight across ``api_keys``."""
+        return max(1, len(set(api_keys))) * self.per_key_concurrency
+
+    async def generate_async(self, api_key, prompt, model=DEFAULT_MODEL, max_output_tokens=None, temperature=None):
+        """Send one prompt and return the response text."""
+        generation_config = {}
+        if max_output_tokens is not None:
+            generation_config["maxOutputTokens"] = max_output_tokens
+        if temperature is not None:
+            generation_config["temperature"] = temperature
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            body["generationConfig"] = generation_config
+
+        client = self.client(api_key)
+        url = f"{self.base_url}/v1beta/models/{model}:generateContent"
+        async with client.semaphore:
+            async with get_session().post(
+                url,
+                params={"key": api_key},
+                json=body,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                # Error bodies (proxies, gateways) are not always JSON
+                text = await response.text()
+                if response.status == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is None:
+                        retry_after = _retry_delay(text)
+                    raise RateLimited(f"Gemini quota exceeded (429): {_error_detail(text)}", retry_after)
+                if response.status >= 400:
+                    raise GeminiError(f"Gemini API error {response.status}: {_error_detail(text)}")
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise GeminiError(f"Gemini returned invalid JSON: {text[:500]}")
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            raise GeminiError(f"Gemini returned no text: {data}")
+        return "".join(part.get("text", "") for part in parts)
+
+    def generate(self, api_key, prompt, **kwargs):
+        return run_sync(self.generate_async(api_key, prompt, **kwargs))
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_llm_pool():
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = GeminiPool()
+    return _default_pool
+
+
+def set_llm_pool(pool):
+    global _default_pool
+    with _default_lock:
+        _default_pool = pool
+
+
+def generate(api_key, prompt, **kwargs):
+    """Blocking Gemini call on the shared pool."""
+    return get_llm_pool().generate(api_key, prompt, **kwargs)
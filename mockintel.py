@@ -0,0 +1,152 @@
+"""
+Local stand-in for the AbuseIPDB, VirusTotal, AlienVault OTX and Gemini
+generateContent endpoints.
+
+Verdicts are derived from a hash of the indicator (or prompt) so runs are
+repeatable, and an optional per-request delay imitates network latency.
+Use it to benchmark the intel client and the Gemini pool offline:
+
+    python mockintel.py --bench 2000 --latency 0.05
+    python mockintel.py --bench-llm 200 --keys 4 --latency 0.5
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+def _score(indicator):
+    return int(hashlib.sha256(indicator.encode()).hexdigest()[:2], 16)
+
+
+class MockIntelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is measurable
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if url.path == "/api/v2/check":
+            ip = parse_qs(url.query).get("ipAddress", [""])[0]
+            body = {"data": {"ipAddress": ip, "abuseConfidenceScore": 100 if _score(ip) < 40 else 0}}
+        elif url.path.startswith("/api/v3/ip_addresses/"):
+            body = {"data": {"attributes": {"last_analysis_stats": {"malicious": 3 if _score(parts[-1]) < 40 else 0}}}}
+        elif url.path.startswith("/api/v3/files/"):
+            body = {"data": {"attributes": {"last_analysis_stats": {"malicious": 20 if _score(parts[-1]) < 20 else 0}}}}
+        elif url.path.startswith("/api/v1/indicators/IPv4/"):
+            ip = parts[-2]
+            body = {"pulse_info": {"pulses": [{"name": "mock"}] if _score(ip) < 40 else []}}
+        else:
+            self.send_error(404)
+            return
+        self._send_json(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not url.path.endswith(":generateContent"):
+            self.send_error(404)
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = "".join(part.get("text", "") for content in request.get("contents", [])
+                         for part in content.get("parts", []))
+        self._send_json({"candidates": [{"content": {"parts": [{"text": self.complete(prompt)}]}}]})
+
+    def complete(self, prompt):
+        """Canned model answer: a verdict word, or a JSON array of verdicts for a batch prompt."""
+        if "\nItems:\n" in prompt:
+            items = json.loads(prompt.split("\nItems:\n", 1)[1])
+            answers = [{"id": item["id"], "verdict": "suspicious" if _score(json.dumps(item)) < 40 else "normal"}
+                       for item in items]
+            return "```json\n" + json.dumps(answers) + "\n```"
+        return "suspicious" if _score(prompt) < 40 else "normal"
+
+    def _send_json(self, body):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0):
+    """Start the mock server on a daemon thread; returns (server, base_url)."""
+    handler = type("Handler", (MockIntelHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def bench(count, latency, limits=None):
+    from intelclient import IntelClient
+    from httppool import run_sync
+    from verdictcache import VerdictCache
+    from keyscheduler import KeyScheduler
+
+    server, base_url = start_mock_server(latency=latency)
+    client = IntelClient(base_urls={p: base_url for p in ("abuseipdb", "virustotal", "alienvault")},
+                         limits=limits, cache=VerdictCache(":memory:"),
+                         # measure the transport, not the free-tier quotas
+                         schedulers={p: KeyScheduler(10 ** 9) for p in ("abuseipdb", "virustotal")})
+    ips = {f"{random.randint(1, 223)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
+           for _ in range(count)}
+    start = time.perf_counter()
+    verdicts = run_sync(client.check_ips(ips, ["mock-key"]))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    malicious = sum(v == "malicious" for v in verdicts.values())
+    print(f"{len(ips)} IPs ({3 * len(ips)} requests) in {elapsed:.2f}s "
+          f"-> {len(ips) / elapsed:.0f} IPs/s, {malicious} malicious")
+
+
+def bench_llm(count, keys, latency):
+    from concurrent.futures import ThreadPoolExecutor
+    from llmpool import GeminiPool
+
+    server, base_url = start_mock_server(latency=latency)
+    pool = GeminiPool(base_url=base_url)
+    api_keys = [f"mock-key-{i}" for i in range(keys)]
+    prompts = [f"Is this Windows startup suspicious? Command: C:\\Tools\\app{i}.exe" for i in range(count)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool.max_parallel(api_keys)) as executor:
+        answers = list(executor.map(lambda item: pool.generate(api_keys[item[0] % keys], item[1]), enumerate(prompts)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    print(f"{count} prompts on {keys} keys in {elapsed:.2f}s -> {count / elapsed:.1f} prompts/s, "
+          f"{answers.count('suspicious')} suspicious")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock threat-intel server")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--bench", type=int, metavar="N", help="look up N random IPs against an in-process server and exit")
+    parser.add_argument("--bench-llm", type=int, metavar="N", help="send N prompts through the Gemini pool and exit")
+    parser.add_argument("--keys", type=int, default=4, help="number of fake Gemini keys for --bench-llm")
+    args = parser.parse_args()
+    if args.bench_llm:
+        bench_llm(args.bench_llm, args.keys, args.latency)
+    elif args.bench:
+        bench(args.bench, args.latency, limits={"abuseipdb": 50, "virustotal": 50, "alienvault": 50})
+    else:
+        server, base_url = start_mock_server(port=args.port, latency=args.latency)
+        print(f"Mock intel server on {base_url} "
+              f"(set FORENSIEGHT_INTEL_URL={base_url} and FORENSIEGHT_GEMINI_URL={base_url})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
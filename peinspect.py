@@ -0,0 +1,210 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pefile
+from verdictcache import get_verdict_cache, DAY
+from filehasher import get_file_hasher
+
+# Bump when inspect_pe() output changes so stale metadata is not reused
+CACHE_SOURCE = "pe_metadata:v1"
+# Keyed on the file's sha256, so the metadata never goes stale
+CACHE_TTL = 365 * DAY
+# Below this many files the pool's start-up cost outweighs parallel parsing
+MIN_POOL_FILES = 8
+# Upper bound on worker processes; each one imports pefile once
+MAX_POOL_WORKERS = 8
+
+_IMAGE_SCN_MEM_EXECUTE = 0x20000000
+_IMPORT_DIRECTORY = pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_IMPORT']
+_SECURITY_DIRECTORY = pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_SECURITY']
+
+
+def inspect_pe(path):
+    """
+    Header-level metadata for one PE file.
+
+    pefile maps the file and, with fast_load, parses only the headers; the
+    import directory is parsed on its own for the imphash. Returns a
+    JSON-serialisable dict; a file that is not a PE image gives
+    {'valid': False, 'error': ...}. Runs in pool workers, so it must stay a
+    module-level function.
+    """
+    try:
+        pe = pefile.PE(path, fast_load=True)
+    except pefile.PEFormatError as e:
+        return {'valid': False, 'error': str(e)}
+    try:
+        security = pe.OPTIONAL_HEADER.DATA_DIRECTORY[_SECURITY_DIRECTORY]
+        pe.parse_data_directories(directories=[_IMPORT_DIRECTORY])
+        sections = [{
+            'name': section.Name.rstrip(b'\x00').decode('ascii', 'replace'),
+            'entropy': round(section.get_entropy(), 3),
+            'raw_size': section.SizeOfRawData,
+            'executable': bool(section.Characteristics & _IMAGE_SCN_MEM_EXECUTE),
+        } for section in pe.sections]
+        return {
+            'valid': True,
+            'compile_time': pe.FILE_HEADER.TimeDateStamp,
+            'imphash': pe.get_imphash() or None,
+            'signed': bool(security.VirtualAddress and security.Size),
+            'is_dll': pe.is_dll(),
+            'sections': sections,
+        }
+    finally:
+        pe.close()
+
+
+def compile_datetime(metadata):
+    """Compile timestamp of inspect_pe() metadata as a naive UTC datetime, or None."""
+    if not metadata or not metadata.get('valid'):
+        return None
+    return datetime.fromtimestamp(metadata['compile_time'], timezone.utc).replace(tzinfo=None)
+
+
+def pe_reasons(metadata, rules, now=None):
+    """
+    Heuristic findings for one binary's metadata.
+
+    ``rules`` supplies pe_packed_entropy, pe_future_skew and
+    suspicious_imphashes. Timestamps are only judged for unsigned files:
+    signed Windows binaries use reproducible builds whose TimeDateStamp is
+    a hash, not a date.
+    """
+    if not isinstance(metadata, dict) or not metadata.get('valid'):
+        return []
+    reasons = []
+    if metadata.get('imphash') in rules.suspicious_imphashes:
+        reasons.append(f"Known-bad imphash {metadata['imphash']}")
+    if not metadata.get('signed'):
+        packed = [s for s in metadata.get('sections', [])
+                  if s['executable'] and s['raw_size'] and s['entropy'] >= rules.pe_packed_entropy]
+        if packed:
+            names = ', '.join(f"{s['name'] or '?'} ({s['entropy']:.2f})" for s in packed)
+            reasons.append(f"Unsigned binary with high-entropy code section: {names}")
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        compiled = compile_datetime(metadata)
+        if metadata.get('compile_time') == 0:
+            reasons.append("Unsigned binary with zeroed compile timestamp")
+        elif (compiled - now).total_seconds() > rules.pe_future_skew:
+            reasons.append(f"Unsigned binary compiled in the future ({compiled:%Y-%m-%d})")
+    return reasons
+
+
+class PEInspector:
+    """
+    Extracts PE metadata for many binaries at once.
+
+    Each path is hashed through the shared FileHasher and results are cached
+    by sha256, so a binary is parsed once however many processes or DLL
+    entries point at it, and never again on later runs. Uncached files are
+    parsed in a process pool, since pefile is pure Python and would hold the
+    GIL in threads.
+    """
+
+    def __init__(self, cache=None, hasher=None, max_workers=None, min_pool_files=MIN_POOL_FILES):
+        self._cache = cache
+        self._hasher = hasher
+        self.max_workers = max_workers or min(MAX_POOL_WORKERS, os.cpu_count() or 1)
+        self.min_pool_files = min_pool_files
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_verdict_cache()
+
+    @property
+    def hasher(self):
+        return self._hasher if self._hasher is not None else get_file_hasher()
+
+    def _parse(self, paths):
+        """inspect_pe for each path, in a process pool when there are enough of them."""
+        if len(paths) >= self.min_pool_files and self.max_workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    chunksize = max(1, len(paths) // (self.max_workers * 4))
+                    return list(executor.map(_inspect_or_error, paths, chunksize=chunksize))
+            except (BrokenProcessPool, OSError) as e:
+                logging.warning(f"PE inspection pool unavailable, parsing in-process: {e}")
+        return [_inspect_or_error(path) for path in paths]
+
+    def inspect_many(self, paths, digests=None):
+        """
+        {path: metadata dict, or the exception raised reading the file}.
+
+        ``digests`` ({path: sha256 or exception}, as FileHasher.hash_many
+        returns) skips re-hashing when the caller already has them.
+        """
+        paths = set(paths)
+        digests = dict(digests or {})
+        missing = [p for p in paths if p not in digests]
+        if missing:
+            digests.update(self.hasher.hash_many(missing))
+
+        results, by_digest = {}, {}
+        for path in paths:
+            digest = digests.get(path)
+            if isinstance(digest, str):
+                by_digest.setdefault(digest, []).append(path)
+            else:
+                results[path] = digest if isinstance(digest, Exception) else FileNotFoundError(path)
+
+        to_parse = {}
+        for digest, same in by_digest.items():
+            cached = self.cache.get(digest, CACHE_SOURCE)
+            if cached is not None:
+                try:
+                    metadata = json.loads(cached)
+                    results.update((p, metadata) for p in same)
+                    continue
+                except ValueError:
+                    pass
+            to_parse[digest] = same[0]
+
+        if to_parse:
+            logging.info(f"Inspecting {len(to_parse)} PE files ({len(by_digest) - len(to_parse)} cached)")
+            parsed = self._parse(list(to_parse.values()))
+            for (digest, path), metadata in zip(to_parse.items(), parsed):
+                if isinstance(metadata, Exception):
+                    results.update((p, metadata) for p in by_digest[digest])
+                    continue
+                self.cache.put(digest, CACHE_SOURCE, json.dumps(metadata), ttl=CACHE_TTL)
+                results.update((p, metadata) for p in by_digest[digest])
+        return results
+
+    def inspect(self, path):
+        """Metadata for one file; raises OSError if it cannot be read."""
+        result = self.inspect_many([path])[path]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _inspect_or_error(path):
+    # Exceptions are returned rather than raised so one unreadable file
+    # does not abort the rest of a pool batch
+    try:
+        return inspect_pe(path)
+    except Exception as e:
+        return e
+
+
+_default_inspector = None
+_default_lock = threading.Lock()
+
+
+def get_pe_inspector():
+    global _default_inspector
+    if _default_inspector is None:
+        with _default_lock:
+            if _default_inspector is None:
+                _default_inspector = PEInspector()
+    return _default_inspector
+
+
+def set_pe_inspector(inspector):
+    global _default_inspector
+    with _default_lock:
+        _default_inspector = inspector
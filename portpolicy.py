@@ -0,0 +1,128 @@
+import threading
+import numpy as np
+import pandas as pd
+from ruleengine import get_rules, PortSet
+
+PORT_COUNT = 65536
+# Allowlist key that applies to every process (and to the generic port rules)
+ANY_PROCESS = "*"
+
+
+def _port_bits(port_set):
+    """Boolean array over 0-65535 with the ports in ``port_set`` set."""
+    bits = np.zeros(PORT_COUNT, dtype=bool)
+    for low, high in port_set.intervals:
+        low, high = max(low, 0), min(high, PORT_COUNT - 1)
+        if low <= high:
+            bits[low:high + 1] = True
+    return bits
+
+
+class PortPolicy:
+    """
+    Immutable port-rule index built once from a RuleSet.
+
+    Each process with a safe-port rule gets a row in a (processes x 65536)
+    boolean matrix; a final all-False row stands for unknown processes, for
+    which every port is unusual. The uncommon-port list and the ephemeral
+    range are folded into one 65536-entry array. Lookups are array indexing,
+    and classify_frame() scores a whole connections frame at once.
+    with_allowlist() returns a new policy with extra site-specific safe ports.
+    """
+
+    def __init__(self, safe_ports, suspicious, ephemeral_min, allowlist=None):
+        # Base rules (kept so with_allowlist can rebuild) and the site allowlist
+        self._base_safe_ports = dict(safe_ports)
+        self._base_suspicious = suspicious
+        self._allowlist = {name.lower(): PortSet(spec) for name, spec in (allowlist or {}).items()}
+        self.ephemeral_min = ephemeral_min
+
+        names = sorted((set(safe_ports) | set(self._allowlist)) - {ANY_PROCESS})
+        matrix = np.zeros((len(names) + 1, PORT_COUNT), dtype=bool)
+        for row, name in enumerate(names):
+            if name in safe_ports:
+                matrix[row] = _port_bits(safe_ports[name])
+            if name in self._allowlist:
+                matrix[row] |= _port_bits(self._allowlist[name])
+        suspicious = suspicious.copy()
+        if ANY_PROCESS in self._allowlist:
+            common = _port_bits(self._allowlist[ANY_PROCESS])
+            matrix |= common
+            suspicious &= ~common
+
+        matrix.flags.writeable = False
+        suspicious.flags.writeable = False
+        self._rows = {name: row for row, name in enumerate(names)}
+        self._unknown_row = len(names)
+        self._safe = matrix
+        self._suspicious = suspicious
+
+    @classmethod
+    def from_rules(cls, rules, allowlist=None):
+        suspicious = _port_bits(rules.uncommon_ports)
+        suspicious[max(rules.ephemeral_min, 0):] = True
+        return cls(rules.process_safe_ports, suspicious, rules.ephemeral_min,
+                   allowlist if allowlist is not None else rules.site_port_allowlist)
+
+    def with_allowlist(self, allowlist):
+        """
+        A new policy with ``allowlist`` ({process name: ports or [low, high]
+        ranges}) added on top of this one's. The key "*" allows ports for
+        every process and exempts them from the uncommon-port rule.
+        """
+        merged = {name: list(spec.intervals) for name, spec in self._allowlist.items()}
+        for name, spec in allowlist.items():
+            merged.setdefault(name.lower(), []).extend(PortSet(spec).intervals)
+        return PortPolicy(self._base_safe_ports, self._base_suspicious, self.ephemeral_min, merged)
+
+    def is_suspicious_port(self, port):
+        if 0 <= port < PORT_COUNT:
+            return bool(self._suspicious[port])
+        return port >= self.ephemeral_min
+
+    def is_unusual_process_port(self, name, port):
+        if not 0 <= port < PORT_COUNT:
+            return True
+        return not self._safe[self._rows.get(name, self._unknown_row), port]
+
+    def classify_frame(self, df, name_column='ProcessName', port_column='RemotePort'):
+        """
+        Vectorized is_suspicious_port / is_unusual_process_port for every row.
+
+        Returns a frame with boolean 'suspicious_port' and 'unusual_process_port'
+        columns; rows whose port is not a number get False in both, as the
+        scalar functions do.
+        """
+        ports = pd.to_numeric(df[port_column], errors='coerce') if port_column in df.columns \
+            else pd.Series(0, index=df.index)
+        valid = ports.notna().to_numpy()
+        ports = ports.fillna(0).to_numpy().astype(np.int64)
+        in_range = (ports >= 0) & (ports < PORT_COUNT)
+        clipped = np.where(in_range, ports, 0)
+
+        if name_column in df.columns:
+            names = df[name_column].astype(object).fillna('nan').astype(str).str.lower()
+        else:
+            names = pd.Series('', index=df.index)
+        rows = names.map(self._rows).fillna(self._unknown_row).to_numpy().astype(np.int64)
+
+        suspicious = np.where(in_range, self._suspicious[clipped], ports >= self.ephemeral_min)
+        unusual = np.where(in_range, ~self._safe[rows, clipped], True)
+        return pd.DataFrame({
+            'suspicious_port': suspicious & valid,
+            'unusual_process_port': unusual & valid,
+        }, index=df.index)
+
+
+_cached = (None, None)
+_cached_lock = threading.Lock()
+
+
+def get_port_policy():
+    """PortPolicy for the current ruleset, rebuilt only when the rules are reloaded."""
+    global _cached
+    rules = get_rules()
+    with _cached_lock:
+        if _cached[0] is not rules:
+            _cached = (rules, PortPolicy.from_rules(rules))
+        return _cached[1]
@@ -0,0 +1,222 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+START_TIME_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+# Parent ids that mean "no parent" (System Idle / not reported by the collector)
+NO_PARENT = (0,)
+
+
+def parse_pid(value):
+    """Integer process id, or None for missing / 'N/A' values."""
+    try:
+        pid = int(float(str(value).strip()))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return pid if pid >= 0 else None
+
+
+def parse_pid_column(values):
+    """parse_pid over a whole column, as a list."""
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    valid = (numbers.notna() & (numbers >= 0) & np.isfinite(numbers)).to_numpy()
+    pids = np.zeros(len(numbers), dtype=np.int64)
+    pids[valid] = numbers[valid].astype(np.int64)
+    return [pid if ok else None for pid, ok in zip(pids.tolist(), valid.tolist())]
+
+
+class ProcessNode:
+    __slots__ = ('pid', 'name', 'index', 'start_time', 'declared_parent', 'parent', 'children')
+
+    def __init__(self, pid, name, index, start_time, declared_parent):
+        self.pid = pid
+        self.name = name
+        # Row label in the frame the tree was built from
+        self.index = index
+        self.start_time = start_time
+        # Parent id as exported; ``parent`` is only set when that process is in the snapshot
+        self.declared_parent = declared_parent
+        self.parent = None
+        self.children = []
+
+    def __repr__(self):
+        return f"ProcessNode({self.pid}, {self.name!r})"
+
+
+class ProcessTree:
+    """
+    Parent/child index over one RunningProcesses snapshot.
+
+    Built in a single pass: pid -> node, each node linked to its parent and
+    children. Links come from ParentProcessId; ChildProcessIds fills in the
+    parent of processes whose own ParentProcessId is missing. A parent that
+    started after its child is a reused pid, not the real parent, and is not
+    linked. Ancestor walks are O(depth) and stop on cycles.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    @classmethod
+    def from_frame(cls, df):
+        nodes = {}
+        if df is None or df.empty or 'Id' not in df.columns:
+            return cls(nodes)
+        names = df['Name'] if 'Name' in df.columns else pd.Series('', index=df.index)
+        names = names.astype(object).fillna('').astype(str).str.strip().str.lower()
+        if 'StartTime' in df.columns:
+            starts = pd.to_datetime(df['StartTime'], format=START_TIME_FORMAT, errors='coerce')
+        else:
+            starts = pd.Series(pd.NaT, index=df.index)
+        starts = starts.astype(object).where(starts.notna(), None)
+        parents = parse_pid_column(df['ParentProcessId']) if 'ParentProcessId' in df.columns else [None] * len(df)
+        children = df['ChildProcessIds'] if 'ChildProcessIds' in df.columns else pd.Series(None, index=df.index)
+
+        listed_children = []
+        for index, pid, name, start, parent, child_ids in zip(
+                df.index, parse_pid_column(df['Id']), names.tolist(), starts.tolist(), parents, children.tolist()):
+            if pid is None or pid in nodes:
+                continue
+            nodes[pid] = ProcessNode(pid, name, index, start, parent)
+            if isinstance(child_ids, str) and child_ids.strip():
+                listed_children.append((pid, child_ids))
+
+        for pid, child_ids in listed_children:
+            for child in child_ids.split(','):
+                child = parse_pid(child)
+                if child in nodes and nodes[child].declared_parent is None:
+                    nodes[child].declared_parent = pid
+
+        for node in nodes.values():
+            parent = nodes.get(node.declared_parent)
+            if parent is None or parent is node:
+                continue
+            if parent.start_time is not None and node.start_time is not None \
+                    and parent.start_time > node.start_time:
+                continue
+            node.parent = parent
+            parent.children.append(node)
+        return cls(nodes)
+
+    def __contains__(self, pid):
+        return pid in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node(self, pid):
+        return self.nodes.get(pid)
+
+    def parent(self, pid):
+        node = self.nodes.get(pid)
+        return node.parent if node else None
+
+    def children(self, pid):
+        node = self.nodes.get(pid)
+        return list(node.children) if node else []
+
+    def ancestors(self, pid):
+        """Nodes from the parent of ``pid`` up to the root."""
+        node = self.nodes.get(pid)
+        seen = {pid}
+        while node is not None and node.parent is not None and node.parent.pid not in seen:
+            node = node.parent
+            seen.add(node.pid)
+            yield node
+
+    def descendants(self, pid):
+        """Every node below ``pid``, breadth first."""
+        node = self.nodes.get(pid)
+        if node is None:
+            return
+        seen = {pid}
+        queue = deque(node.children)
+        while queue:
+            node = queue.popleft()
+            if node.pid in seen:
+                continue
+            seen.add(node.pid)
+            yield node
+            queue.extend(node.children)
+
+    def lineage(self, pid):
+        """Names from the root down to ``pid``."""
+        node = self.nodes.get(pid)
+        if node is None:
+            return []
+        return [n.name for n in reversed(list(self.ancestors(pid)))] + [node.name]
+
+    def is_orphan(self, pid):
+        """The process names a parent that is not running (or whose pid was reused)."""
+        node = self.nodes.get(pid)
+        if node is None or node.declared_parent is None or node.declared_parent in NO_PARENT:
+            return False
+        return node.parent is None
+
+    def has_parent_info(self, pid):
+        node = self.nodes.get(pid)
+        return node is not None and node.declared_parent is not None
+
+    def find_ancestor(self, pid, names):
+        """Nearest ancestor whose name is in ``names``, or None."""
+        for node in self.ancestors(pid):
+            if node.name in names:
+                return node
+        return None
+
+    def has_ancestor(self, pid, names):
+        return self.find_ancestor(pid, names) is not None
+
+    def find_descendants(self, pid, names):
+        """Descendants of ``pid`` whose name is in ``names``."""
+        return [node for node in self.descendants(pid) if node.name in names]
+
+    def lineage_reasons(self, pid, rules):
+        """
+        Lineage rules matched by ``pid``: ``rules`` is a list of (reason,
+        ancestor names, descendant names), and a rule matches a
+        descendant-name process with an ancestor-name process above it.
+        Each hit is reported as "reason: ancestor -> ... -> process".
+        """
+        node = self.nodes.get(pid)
+        reasons = []
+        if node is None:
+            return reasons
+        for reason, ancestor_names, descendant_names in rules:
+            if node.name not in descendant_names:
+                continue
+            chain = [node.name]
+            for above in self.ancestors(pid):
+                chain.append(above.name)
+                if above.name in ancestor_names:
+                    reasons.append(f"{reason}: {' -> '.join(reversed(chain))}")
+                    break
+        return reasons
+
+    def lineage_matches(self, rules):
+        """{pid: lineage_reasons} for every process that matches a rule."""
+        watched = set().union(*(descendants for _, _, descendants in rules)) if rules else set()
+        matches = {}
+        for node in self.nodes.values():
+            if node.name in watched:
+                reasons = self.lineage_reasons(node.pid, rules)
+                if reasons:
+                    matches[node.pid] = reasons
+        return matches
+
+    def frame_flags(self, df, lineage_rules=()):
+        """
+        Per-row columns for ``df`` (the frame the tree was built from):
+        'has_parent_info' (ParentProcessId/ChildProcessIds give a parent id),
+        'orphan' (see is_orphan) and 'lineage' (list of lineage reasons).
+        """
+        pids = parse_pid_column(df['Id']) if 'Id' in df.columns else [None] * len(df)
+        matches = self.lineage_matches(lineage_rules)
+        first = {node.index for node in self.nodes.values()}
+        own = np.array([index in first for index in df.index], dtype=bool)
+        has_info = np.array([self.has_parent_info(pid) for pid in pids], dtype=bool) & own
+        orphan = np.array([self.is_orphan(pid) for pid in pids], dtype=bool) & own
+        lineage = [matches.get(pid, []) if is_own else [] for pid, is_own in zip(pids, own)]
+        return pd.DataFrame({'has_parent_info': has_info, 'orphan': orphan, 'lineage': lineage},
+                            index=df.index)
+
@@ -0,0 +1,231 @@
+import os
+import json
+import ipaddress
+import time
+import bisect
+import logging
+import threading
+from rulematcher import KeywordMatcher, PatternMatcher
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+# Seconds between checks of the ruleset files for changes
+RELOAD_INTERVAL = 1.0
+
+
+class RuleError(ValueError):
+    pass
+
+
+class PortSet:
+    """
+    Ports and inclusive [low, high] port ranges, merged into sorted disjoint
+    intervals so membership is one bisect regardless of how many ranges a
+    rule lists.
+    """
+
+    def __init__(self, spec=()):
+        if isinstance(spec, PortSet):
+            spec = spec.intervals
+        intervals = []
+        for entry in spec:
+            low, high = (entry, entry) if isinstance(entry, int) else entry
+            intervals.append((int(low), int(high)))
+        intervals.sort()
+        merged = []
+        for low, high in intervals:
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        self.intervals = [tuple(interval) for interval in merged]
+        self._lows = [low for low, _ in self.intervals]
+
+    def __contains__(self, port):
+        i = bisect.bisect_right(self._lows, port) - 1
+        return i >= 0 and port <= self.intervals[i][1]
+
+    def __len__(self):
+        return sum(high - low + 1 for low, high in self.intervals)
+
+
+class RuleSet:
+    """A parsed ruleset compiled into sets, interval lists and matchers."""
+
+    def __init__(self, rules):
+        try:
+            ports = rules["ports"]
+            processes = rules["processes"]
+            file_changes = rules["file_changes"]
+            disk = rules["disk"]
+            volume = rules["volume"]
+            pe = rules["pe"]
+            correlation = rules["correlation"]
+
+            self.version = rules.get("version", 1)
+            self.uncommon_ports = PortSet(ports["uncommon"])
+            self.ephemeral_min = int(ports["ephemeral_min"])
+            self.lateral_ports = PortSet(ports["lateral_movement"])
+            self.process_safe_ports = {
+                name.lower(): PortSet(spec) for name, spec in ports["process_safe_ports"].items()
+            }
+            self.site_port_allowlist = {
+                name.lower(): PortSet(spec) for name, spec in ports.get("site_allowlist", {}).items()
+            }
+            # CIDR blocks treated as local (never sent for reputation lookups)
+            self.network_allowlist = tuple(
+                ipaddress.ip_network(network, strict=False) for network in rules.get("networks", {}).get("allowlist", [])
+            )
+
+            self.known_legit_names = frozenset(name.lower() for name in processes["known_legit_names"])
+            self.standard_path_patterns = tuple(processes["standard_path_patterns"])
+            self.standard_paths = PatternMatcher(self.standard_path_patterns, ignore_case=True)
+            # (reason, ancestor names, descendant names) for ProcessTree.lineage_matches
+            self.lineage_rules = tuple(
+                (rule["reason"], frozenset(n.lower() for n in rule["ancestors"]),
+                 frozenset(n.lower() for n in rule["descendants"]))
+                for rule in processes.get("lineage", [])
+            )
+
+            self.pe_packed_entropy = float(pe["packed_entropy"])
+            self.pe_future_skew = float(pe["future_skew_days"]) * 86400
+            self.suspicious_imphashes = frozenset(h.lower() for h in pe["suspicious_imphashes"])
+
+            self.brute_force_window = float(correlation["brute_force"]["window_seconds"])
+            self.brute_force_failures = int(correlation["brute_force"]["failures"])
+            self.spraying_window = float(correlation["spraying"]["window_seconds"])
+            self.spraying_users = int(correlation["spraying"]["users"])
+            self.lateral_window = float(correlation["lateral_movement"]["window_seconds"])
+            self.admin_shares = frozenset(share.upper() for share in correlation["lateral_movement"]["admin_shares"])
+            self.remote_logon_types = frozenset(int(t) for t in correlation["remote_logon_types"])
+            # Built-in and machine accounts whose privileged logons are routine ('*' wildcards)
+            self.service_accounts = tuple(name.lower() for name in correlation["service_accounts"])
+
+            self.risky_extensions = frozenset(ext.lower() for ext in file_changes["risky_extensions"])
+            self.risky_dirs = KeywordMatcher(file_changes["risky_dirs"])
+
+            self.disk_small_bytes = int(disk["small_bytes"])
+            self.disk_large_bytes = int(disk["large_bytes"])
+            self.removable_disk_names = KeywordMatcher(disk["removable_keywords"])
+
+            self.volume_small_bytes = int(volume["small_bytes"])
+            self.volume_large_bytes = int(volume["large_bytes"])
+            self.volume_low_free_ratio = float(volume["low_free_ratio"])
+            self.suspicious_volume_labels = KeywordMatcher(volume["suspicious_labels"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuleError(f"invalid ruleset: {e!r}")
+
+    def is_suspicious_port(self, port):
+        return port in self.uncommon_ports or port >= self.ephemeral_min
+
+    def is_unusual_process_port(self, name, port):
+        """A port the process is not known to use; unknown processes have no safe ports."""
+        safe = self.process_safe_ports.get(name)
+        return safe is None or port not in safe
+
+
+def _merge(base, override):
+    """Recursively overlay ``override`` on ``base``; lists and scalars are replaced."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_rules_file(path):
+    """Parse a JSON or (if PyYAML is installed) YAML ruleset file."""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuleError(f"{path}: YAML rulesets need PyYAML (pip install pyyaml)")
+            try:
+                return yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise RuleError(f"{path}: {e}")
+        return json.load(f)
+
+
+class RuleEngine:
+    """
+    Serves the current RuleSet and reloads it when its files change.
+
+    The shipped rules.json holds the defaults; an override file (argument
+    or the FORENSIEGHT_RULES environment variable) only needs the sections
+    it changes. Files are checked at most every RELOAD_INTERVAL seconds, and
+    a ruleset that fails to load is logged and the previous one kept.
+    """
+
+    def __init__(self, override_path=None, defaults_path=DEFAULT_RULES_PATH, reload_interval=RELOAD_INTERVAL):
+        self.defaults_path = defaults_path
+        self.override_path = override_path or os.environ.get("FORENSIEGHT_RULES")
+        self.reload_interval = reload_interval
+        self._rules = None
+        self._stamp = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _paths(self):
+        return [p for p in (self.defaults_path, self.override_path) if p]
+
+    def _file_stamp(self):
+        stamp = []
+        for path in self._paths():
+            try:
+                st = os.stat(path)
+                stamp.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((path, None, None))
+        return tuple(stamp)
+
+    def _load(self):
+        rules = load_rules_file(self.defaults_path)
+        if self.override_path:
+            rules = _merge(rules, load_rules_file(self.override_path))
+        return RuleSet(rules)
+
+    def current(self):
+        now = time.monotonic()
+        if self._rules is not None and now - self._checked < self.reload_interval:
+            return self._rules
+        with self._lock:
+            self._checked = now
+            stamp = self._file_stamp()
+            if self._rules is None or stamp != self._stamp:
+                try:
+                    self._rules = self._load()
+                    if self._stamp is not None:
+                        logging.info(f"Reloaded rules from {', '.join(self._paths())}")
+                except (OSError, ValueError) as e:
+                    if self._rules is None:
+                        raise
+                    logging.error(f"Keeping previous rules, reload failed: {e}")
+                self._stamp = stamp
+            return self._rules
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_rule_engine():
+    global _default_engine
+    if _default_engine is None:
+        with _default_lock:
+            if _default_engine is None:
+                _default_engine = RuleEngine()
+    return _default_engine
+
+
+def set_rule_engine(engine):
+    global _default_engine
+    with _default_lock:
+        _default_engine = engine
+
+
+def get_rules():
+    """The current RuleSet, reloaded if the ruleset files changed."""
+    return get_rule_engine().current()
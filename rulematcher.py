@@ -0,0 +1,97 @@
+import re
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    A set of literal keywords compiled into one alternation regex.
+
+    search() answers "does any keyword occur in the text" in a single scan,
+    however many keywords there are; hits() returns every keyword that
+    occurs. Longer keywords are tried first so the longest match wins at
+    each position.
+    """
+
+    def __init__(self, keywords, ignore_case=False):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self.ignore_case = ignore_case
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        alternation = '|'.join(re.escape(kw) for kw in ordered) or r'(?!)'
+        flags = re.IGNORECASE if ignore_case else 0
+        self.regex = re.compile(alternation, flags)
+        # Lookahead so matches may overlap: every start position is reported
+        self._overlapping = re.compile(f'(?=({alternation}))', flags)
+        fold = str.lower if ignore_case else (lambda s: s)
+        # Keywords that are prefixes of a longer one starting at the same position
+        self._prefixes = {
+            fold(kw): [other for other in self.keywords if fold(kw).startswith(fold(other))]
+            for kw in self.keywords
+        }
+        self._fold = fold
+
+    def search(self, text):
+        return self.regex.search(str(text)) is not None
+
+    def hits(self, text):
+        """Every keyword occurring in ``text``, in keyword-list order."""
+        found = set()
+        for match in self._overlapping.finditer(str(text)):
+            found.update(self._prefixes[self._fold(match.group(1))])
+        return [kw for kw in self.keywords if kw in found]
+
+    def search_series(self, series):
+        """Vectorized search() over a pandas Series of strings."""
+        return series.str.contains(self.regex, regex=True, na=False)
+
+
+class PatternMatcher:
+    """
+    A list of regular expressions compiled into one alternation.
+
+    match() anchors at the start of the text like re.match, search() looks
+    anywhere like re.search. which() reports the first pattern that matches.
+    """
+
+    def __init__(self, patterns, ignore_case=False):
+        self.patterns = tuple(patterns)
+        self.ignore_case = ignore_case
+        flags = re.IGNORECASE if ignore_case else 0
+        combined = '|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(self.patterns)) or r'(?!)'
+        self.regex = re.compile(combined, flags)
+
+    def match(self, text):
+        return self.regex.match(str(text)) is not None
+
+    def search(self, text):
+        return self.regex.search(str(text)) is not None
+
+    def which(self, text):
+        """The pattern whose match starts earliest in ``text`` (first listed on ties), or None."""
+        match = self.regex.search(str(text))
+        return self.patterns[int(match.lastgroup[1:])] if match else None
+
+    def match_series(self, series):
+        return series.str.match(self.regex, na=False)
+
+    def search_series(self, series):
+        return series.str.contains(self.regex, regex=True, na=False)
+
+
+@lru_cache(maxsize=None)
+def _keyword_matcher(keywords, ignore_case):
+    return KeywordMatcher(keywords, ignore_case)
+
+
+@lru_cache(maxsize=None)
+def _pattern_matcher(patterns, ignore_case):
+    return PatternMatcher(patterns, ignore_case)
+
+
+def keyword_matcher(keywords, ignore_case=False):
+    """Shared KeywordMatcher for ``keywords``; each distinct list is compiled once per process."""
+    return _keyword_matcher(tuple(keywords), ignore_case)
+
+
+def pattern_matcher(patterns, ignore_case=False):
+    """Shared PatternMatcher for ``patterns``; each distinct list is compiled once per process."""
+    return _pattern_matcher(tuple(patterns), ignore_case)
@@ -0,0 +1,67 @@
+"""analyze_dns_cache against the row-by-row checks it replaced."""
+import math
+import re
+
+import pandas as pd
+
+import AnalyzeData as ad
+
+SUSPICIOUS_TLDS = {'cn', 'ru', 'tk', 'top', 'xyz', 'pw', 'info', 'buzz', 'zip', 'icu', 'click'}
+SUSPICIOUS_KEYWORDS = [
+    'malware', 'phish', 'ransom', 'ddos', 'attack', 'steal', 'hack', 'evil', 'shell', 'crypt', 'cn',
+    'bank', 'login', 'secure', 'update', 'account', 'verify', 'confirm', 'click', 'download', 'free',
+    'promo', 'offer', 'win', 'prize', 'alert', 'warning', 'error', 'virus', 'trojan', 'ransomware',
+    'spyware', 'adware', 'botnet', 'exploit', 'hack', 'scam', 'fraud', 'fake',
+]
+
+DOMAINS = [
+    'İstanbul.com', 'example.com', 'WWW.Google.COM', 'ÄÖÜ-shop.de', 'xn--80ak6aa92e.com',
+    'secure-login.bank.ru', 'a1b2c3d4e5f6g7h8i9j0k.top', 'q8zk3v7xw1m9p2r4t6y0u5.net',
+    '٣٤٥٦٧٨٩٠١٢٣٤.example', 'under_score.local', 'ｆｕｌｌｗｉｄｔｈ.jp', 'nan',
+    'this-is-a-very-long-subdomain-name-for-testing.example.org',
+]
+
+
+def baseline_dns_cache(df_dns):
+    """analyze_dns_cache as it was before it became column operations."""
+    suspicious = []
+    for _, row in df_dns.iterrows():
+        name = str(row['Name']).lower()
+        reason = []
+        if len(name) > 50:
+            reason.append('Domain too long')
+        if any(kw in name for kw in SUSPICIOUS_KEYWORDS):
+            reason.append('Contains known malicious keyword')
+        domain_parts = name.split('.')
+        if len(domain_parts) > 1 and domain_parts[-1] in SUSPICIOUS_TLDS:
+            reason.append('Suspicious TLD')
+        entropy = -sum((name.count(c) / len(name)) * math.log2(name.count(c) / len(name)) for c in set(name))
+        if entropy > 4.0:
+            reason.append('High entropy domain (potential DGA)')
+        if sum(c.isdigit() for c in name) > 10:
+            reason.append('Excessive numeric characters')
+        if name.startswith('xn--'):
+            reason.append('Punycode domain (possible homograph attack)')
+        if re.search(r'[^a-z0-9.-]', name):
+            reason.append('Contains unusual characters')
+        if reason:
+            suspicious.append({'Domain': name, 'Data': row['Data'], 'Reason': ', '.join(reason)})
+    return suspicious
+
+
+def _frame(names):
+    return pd.DataFrame({'Name': names, 'Data': [f'10.0.0.{i}' for i in range(len(names))]})
+
+
+def test_dotted_capital_i_is_lowered_like_str_lower():
+    # read_csv gives pandas' Arrow-backed strings, whose lower() maps 'İ' to a plain 'i'
+    df = _frame(['İstanbul.com']).astype({'Name': str})
+    assert ad.analyze_dns_cache(df) == [
+        {'Domain': 'i̇stanbul.com', 'Data': '10.0.0.0', 'Reason': 'Contains unusual characters'},
+    ]
+
+
+def test_matches_baseline():
+    df = _frame(DOMAINS)
+    assert ad.analyze_dns_cache(df) == baseline_dns_cache(df)
+    assert ad.analyze_dns_cache(df.astype({'Name': str})) == baseline_dns_cache(df)
@@ -0,0 +1,139 @@
+"""The vectorized process heuristics against the per-row checks they replace."""
+import random
+import string
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import AnalyzeData as ad
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+NON_ASCII = [
+    'C:\\Windows\\ÄÖÜ\\täst.exe -ñ 12345 ａｂｃ',
+    'İstanbul.exe',
+    'ｘｙｚ１２３ｑｗｅ.exe',
+    'Ωμέγαλφα.exe',
+    'café-münchen ßtraße ñoño',
+    '进程监控服务程序.exe',
+    'C:\\Users\\Jörg\\AppData\\Local\\Temp\\рфъщцй.exe',
+]
+
+
+def baseline_is_suspicious_parent(row, df):
+    """is_suspicious_parent as it was before the process tree and the masks."""
+    parent = str(row.get('ParentProcessName', '')).strip().lower()
+    if not parent or parent == 'n/a':
+        return True
+    if 'system' in str(row.get('UserName', '')).lower():
+        return False
+    if parent.replace('.exe', '') in ad.get_rules().known_legit_names and not ad.is_non_standard_path(str(row.get('Path'))):
+        return False
+    parent_exists = any(df['Name'].str.lower() == parent)
+    return not parent_exists or ad.is_random_name(parent.replace('.exe', ''))
+
+
+def _random_text(rng, alphabet, low, high):
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def _frame(rows=400, seed=7):
+    rng = random.Random(seed)
+    ascii_chars = string.ascii_letters + string.digits
+    wide_chars = ascii_chars + 'ÄÖÜäöüßñéİıΩμ进程ａｂｃ１２３'
+    legit = sorted(ad.get_rules().known_legit_names)
+    names = [rng.choice(legit) + '.exe' for _ in range(5)] + ['cmd.exe', 'powershell.exe', 'svchost.exe']
+    base64_runs = ['SGVsbG8gV29ybGQgZnJvbSBiYXNlNjQ=', 'dGhpcyBpcyBub3QgdmFsaWQ=x', 'AAAAAAAAAAAAAAAAAAAA====']
+    paths = ['C:\\Windows\\System32\\', 'C:\\Program Files\\App\\', 'C:\\Users\\x\\AppData\\Temp\\', 'D:\\tools\\']
+    data = []
+    for i in range(rows):
+        kind = rng.random()
+        if kind < 0.3:
+            name = _random_text(rng, ascii_chars, 3, 12) + '.exe'
+        elif kind < 0.45:
+            name = _random_text(rng, wide_chars, 3, 12) + '.exe'
+        elif kind < 0.55:
+            name = rng.choice(NON_ASCII)
+        else:
+            name = rng.choice(names)
+        command = rng.choice([
+            _random_text(rng, wide_chars + ' -\\/:.', 0, 40),
+            f'{name} -enc {rng.choice(base64_runs)}',
+            rng.choice(NON_ASCII),
+            None,
+        ])
+        started = NOW - timedelta(hours=rng.choice([1, 23, 25, 200]))
+        data.append({
+            'Name': name if rng.random() > 0.03 else None,
+            'Path': rng.choice(paths) + name if rng.random() > 0.05 else None,
+            'ParentProcessName': rng.choice(names + [name, '', 'N/A', ' Explorer.EXE ', rng.choice(NON_ASCII), None]),
+            'UserName': rng.choice(['NT AUTHORITY\\SYSTEM', 'alice', 'Jörg', None]),
+            'StartTime': rng.choice([started.strftime('%m/%d/%Y %I:%M:%S %p'), 'not a time', None]),
+            'CommandLine': command,
+        })
+    return pd.DataFrame(data).astype(object)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return _frame()
+
+
+def _rowwise(df, check):
+    return df.apply(check, axis=1).astype(bool).to_numpy()
+
+
+def test_random_name_mask(frame):
+    expected = _rowwise(frame, lambda row: ad.is_random_name(row.get('Name')))
+    assert (ad.random_name_mask(frame['Name']).to_numpy() == expected).all()
+
+
+def test_non_standard_path_mask(frame):
+    expected = _rowwise(frame, lambda row: ad.is_non_standard_path(row.get('Path')))
+    assert (ad.non_standard_path_mask(frame['Path']).to_numpy() == expected).all()
+
+
+def test_new_process_mask(frame):
+    with mock.patch.object(ad, 'datetime', wraps=datetime) as clock:
+        clock.now.return_value = NOW
+        expected = _rowwise(frame, lambda row: ad.is_new_process(row.get('StartTime')))
+    assert (ad.new_process_mask(frame['StartTime'], NOW).to_numpy() == expected).all()
+
+
+def test_base64_command_line_mask(frame):
+    expected = _rowwise(frame, lambda row: ad.has_base64_command_line(row.get('CommandLine')))
+    assert expected.any()
+    assert (ad.base64_command_line_mask(frame['CommandLine']).to_numpy() == expected).all()
+
+
+def test_high_entropy_command_mask(frame):
+    expected = _rowwise(frame, lambda row: ad.is_high_entropy_command(row.get('CommandLine')))
+    assert (ad.high_entropy_command_mask(frame['CommandLine']).to_numpy() == expected).all()
+
+
+def test_suspicious_parent_child_mask(frame):
+    expected = _rowwise(frame, ad.is_suspicious_parent_child)
+    assert (ad.suspicious_parent_child_mask(frame).to_numpy() == expected).all()
+
+
+def test_suspicious_parent_mask(frame):
+    expected = _rowwise(frame, lambda row: baseline_is_suspicious_parent(row, frame))
+    assert (np.asarray(ad.suspicious_parent_mask(frame), dtype=bool) == expected).all()
+
+
+@pytest.mark.parametrize('command', NON_ASCII)
+def test_non_ascii_commands(command):
+    commands = pd.Series([command])
+    assert ad.high_entropy_command_mask(commands).tolist() == [ad.is_high_entropy_command(command)]
+    assert ad.random_name_mask(commands).tolist() == [ad.is_random_name(command)]
+
+
+def test_unicode_command_is_high_entropy():
+    command = 'C:\\Windows\\ÄÖÜ\\täst.exe -ñ 12345 ａｂｃ'
+    assert ad.is_high_entropy_command(command)
+    assert ad.high_entropy_command_mask(pd.Series([command])).tolist() == [True]
+    # read_csv and astype(str) give pandas' Arrow-backed strings
+    assert ad.high_entropy_command_mask(pd.Series([command]).astype(str)).tolist() == [True]
@@ -0,0 +1,164 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+# Point this at a shared location to reuse verdicts across hosts and runs
+DEFAULT_CACHE_PATH = os.environ.get(
+    "FORENSIEGHT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".forensieght", "verdicts.db")
+)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# How long each verdict stays valid, in seconds
+DEFAULT_TTLS = {
+    "malicious": 7 * DAY,
+    "safe": 3 * DAY,
+    "unknown": 2 * HOUR,
+}
+DEFAULT_TTL = DAY
+# Failed lookups (timeouts, HTTP errors) are remembered briefly so a dead
+# provider is not hammered, but retried soon after
+NEGATIVE_TTL = 15 * 60
+FAILED = "__failed__"
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+class VerdictCache:
+    """
+    Persistent (indicator, source) -> verdict store backed by SQLite.
+
+    Verdicts expire per-value (see DEFAULT_TTLS), failed lookups are kept as
+    short-lived negative entries, and the table is trimmed to ``max_entries``
+    by evicting the least recently used rows. WAL mode plus a busy timeout
+    lets several analyzer processes share one database file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, default_ttl=DEFAULT_TTL,
+                 negative_ttl=NEGATIVE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " indicator TEXT NOT NULL,"
+                " source TEXT NOT NULL,"
+                " verdict TEXT NOT NULL,"
+                " expires REAL NOT NULL,"
+                " accessed REAL NOT NULL,"
+                " PRIMARY KEY (indicator, source))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS verdicts_accessed ON verdicts(accessed)")
+
+    def get(self, indicator, source, default=None):
+        """
+        Return the cached verdict, or ``default`` on a miss or expired entry.
+
+        A cached failure is returned as FAILED so callers can skip the network
+        without mistaking it for a real verdict.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT verdict, expires FROM verdicts WHERE indicator=? AND source=?",
+                    (str(indicator), source)
+                ).fetchone()
+                if row is None:
+                    return default
+                if row[1] <= now:
+                    self._conn.execute(
+                        "DELETE FROM verdicts WHERE indicator=? AND source=?", (str(indicator), source))
+                    return default
+                self._conn.execute(
+                    "UPDATE verdicts SET accessed=? WHERE indicator=? AND source=?",
+                    (now, str(indicator), source))
+            return row[0]
+        except sqlite3.Error as e:
+            logging.warning(f"Verdict cache read failed for {indicator} ({source}): {e}")
+            return default
+
+    def put(self, indicator, source, verdict, ttl=None):
+        """Store ``verdict``; the TTL defaults to the per-verdict table."""
+        if ttl is None:
+            ttl = self.ttls.get(verdict, self.default_ttl)
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO verdicts (indicator, source, verdict, expires, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (str(indicator), source, verdict, now + ttl, now))
+                self._writes += 1
+                if self._writes % 500 == 0:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logging.warning(f"Verdict cache write failed for {indicator} ({source}): {e}")
+
+    def put_failure(self, indicator, source):
+        """Remember that a lookup failed so it is not retried until NEGATIVE_TTL passes."""
+        self.put(indicator, source, FAILED, ttl=self.negative_ttl)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM verdicts WHERE expires <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE rowid IN "
+                "(SELECT rowid FROM verdicts ORDER BY accessed LIMIT ?)", (excess,))
+
+    def evict(self):
+        """Drop expired rows and trim the table to ``max_entries``."""
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self, source=None):
+        with self._lock:
+            if source is None:
+                self._conn.execute("DELETE FROM verdicts")
+            else:
+                self._conn.execute("DELETE FROM verdicts WHERE source=?", (source,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_verdict_cache():
+    """Process-wide cache at DEFAULT_CACHE_PATH, opened on first use."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = VerdictCache()
+    return _default_cache
+
+
+def set_verdict_cache(cache):
+    """Replace the process-wide cache (e.g. with an in-memory one for offline runs)."""
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache